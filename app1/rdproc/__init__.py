@@ -0,0 +1,18 @@
+"""Vectorized RD03/RD05 classification helpers used by the RD scripts."""
+from .api import classify, classify_rd03, classify_rd05
+from .audit import Profiler, profile, write_audit
+from .metrics import collect as collect_metrics
+from .concession import group_concession
+from .dtypes import normalize as normalize_dtypes
+from .rd03 import classify_groups as classify_rd03_groups
+from .rd05 import classify_groups as classify_rd05_groups
+from .reader import iter_classified, iter_rd_chunks, read_rd
+from .rules import apply_rules, compile_rules, load_rules, load_rules_from_db
+from .cache import FrameCache, read_rd_cached
+from .writer import write_output
+from .batch import run_batch
+from .incremental import classify_incremental
+from .cube import Cube, read_cube, rollup, write_cube
+from .store import RunStore
+from .spatial import SpatialIndex, parse_coordinates
+from .conflicts import analyze as analyze_rules, analyze_domain as analyze_rule_domain
@@ -0,0 +1,31 @@
+"""In-memory classification API.
+
+These functions take an already-read RD frame (the ``RD03_COLS`` /
+``RD05_COLS`` layout, e.g. from ``read_rd``) and return a new frame with
+``GroupConcession`` and ``Group`` added; the input is not modified. They do
+no file, GUI or Colab I/O, so a resident worker can import them once and
+classify many frames.
+"""
+from .rd03 import classify as _classify_rd03
+from .rd05 import classify as _classify_rd05
+from .rules import apply_rules
+
+CLASSIFY = {'RD03': _classify_rd03, 'RD05': _classify_rd05}
+
+
+def classify(df, mode, rules=None):
+    """Classify ``df`` as ``mode`` with the built-in rules or the given UI rules."""
+    if mode not in CLASSIFY:
+        raise ValueError(f"unknown mode: {mode!r} (use RD03 or RD05)")
+    out = df.copy(deep=False)
+    if rules is None:
+        return CLASSIFY[mode](out)
+    return apply_rules(out, rules, mode)
+
+
+def classify_rd03(df, rules=None):
+    return classify(df, 'RD03', rules)
+
+
+def classify_rd05(df, rules=None):
+    return classify(df, 'RD05', rules)
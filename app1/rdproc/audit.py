@@ -0,0 +1,138 @@
+"""Unique-value audit report written before classification.
+
+The scripts used to build ``data.xlsx`` / ``data_summary.xlsx`` by calling
+``unique()``, sorting and writing one sheet per column. :func:`profile`
+counts the values of all audited columns in one scan each (``bincount`` over
+the factorized / category codes) and returns a single long table:
+
+``Column | Value | Count | GroupConcession | Unmapped``
+
+``GroupConcession`` is filled for ``Concession`` rows, and ``Unmapped``
+flags Concession values that fall through every group list (those rows get no
+GroupConcession and usually end up without a Group). Values are sorted
+numbers first, then text, so mixed-type columns no longer break the sort.
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .concession import concession_lookup
+from .dtypes import codes
+from .rules import NOT_FOUND
+from .writer import write_output
+
+AUDIT_COLUMNS = ('Line_Type', 'Cores', 'Diameter', 'Concession')
+MISSING = '(ว่าง)'
+
+
+def _sort_key(v):
+    if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        return (0, float(v), '')
+    return (1, 0.0, str(v))
+
+
+def value_counts(series):
+    """Return ``{value: count}`` for one column; missing values under ``MISSING``."""
+    c, uniques = codes(series)
+    counts = np.bincount(np.asarray(c) + 1, minlength=len(uniques) + 1)
+    out = {v: int(n) for v, n in zip(uniques, counts[1:]) if n}
+    if counts[0]:
+        out[MISSING] = int(counts[0])
+    return out
+
+
+class Profiler:
+    """Accumulates value counts over one frame or a stream of chunks."""
+
+    def __init__(self, columns=AUDIT_COLUMNS):
+        self.columns = columns
+        self.counts = {col: Counter() for col in columns}
+
+    def update(self, df):
+        for col in self.columns:
+            if col in df.columns:
+                self.counts[col].update(value_counts(df[col]))
+        return self
+
+    def report(self):
+        lookup = concession_lookup()
+        rows = []
+        for col in self.columns:
+            counts = self.counts[col]
+            for value in sorted((v for v in counts if v != MISSING), key=_sort_key):
+                group = lookup.get(value) if col == 'Concession' else None
+                rows.append((col, value, counts[value], group, col == 'Concession' and group is None))
+            if counts[MISSING]:
+                rows.append((col, MISSING, counts[MISSING], None, False))
+        return pd.DataFrame(rows, columns=['Column', 'Value', 'Count', 'GroupConcession', 'Unmapped'])
+
+
+def profile(df, columns=AUDIT_COLUMNS):
+    """Count the values of ``columns``; returns the long report frame."""
+    return Profiler(columns).update(df).report()
+
+
+def unmapped_concessions(report):
+    """Rows of ``report`` for Concession values outside every group list."""
+    return report[report['Unmapped']]
+
+
+def _labels(counts, missing):
+    return {missing if k == MISSING else str(k): n for k, n in counts.items()}
+
+
+def _sorted_text(counts):
+    # String(val) ของค่าว่างใน excelProcessor.ts คือ ""
+    return sorted('' if v == MISSING else str(v) for v in counts)
+
+
+def _sorted_numbers(counts, cast):
+    return sorted({cast(v) for v in counts if v != MISSING})
+
+
+class Summary(Profiler):
+    """Accumulates the ``SummaryData`` of ``types.ts`` over a frame or chunks."""
+
+    def __init__(self):
+        super().__init__(('Group', 'GroupConcession') + AUDIT_COLUMNS)
+        self.rows = 0
+
+    def update(self, df):
+        self.rows += len(df)
+        return super().update(df)
+
+    def data(self):
+        c = self.counts
+        return {
+            'totalRows': self.rows,
+            'groups': _labels(c['Group'], NOT_FOUND),
+            'concessions': _labels(c['GroupConcession'], NOT_FOUND),
+            'lineTypes': _labels(c['Line_Type'], 'Unknown'),
+            'uniqueValues': {
+                'Line_Type': _sorted_text(c['Line_Type']),
+                # parseInt ใน excelProcessor.ts ตัดทศนิยมทิ้ง
+                'Cores': _sorted_numbers(c['Cores'], lambda v: int(np.trunc(float(v)))),
+                'Diameter': _sorted_numbers(c['Diameter'], float),
+                'Concession': _sorted_text(c['Concession']),
+            },
+        }
+
+
+def summary_data(df):
+    """The ``SummaryData`` of ``types.ts`` for a classified frame."""
+    return Summary().update(df).data()
+
+
+def write_audit(data, path, columns=AUDIT_COLUMNS):
+    """Write the report of a frame (or a :class:`Profiler`) to ``path``.
+
+    The format follows the extension, as in ``write_output``.
+    """
+    report = data.report() if isinstance(data, Profiler) else profile(data, columns)
+    unmapped = unmapped_concessions(report)
+    if len(unmapped):
+        print(f"⚠️ พบ Concession ที่ไม่อยู่ในกลุ่มใด {len(unmapped):,} ค่า "
+              f"({unmapped['Count'].sum():,} แถว) ดูรายละเอียดใน {path}")
+    write_output(report, path)
+    return report
@@ -0,0 +1,240 @@
+"""Non-interactive batch classification of many RD03/RD05 exports.
+
+Each input is detected as RD03 or RD05, read (through the Arrow cache or as a
+stream of chunks), classified and written to ``<out_dir>/<stem>_Processed.<fmt>``
+(same-named workbooks from different directories get a hash of the directory
+in ``<stem>``).
+Files are spread over a ``ProcessPoolExecutor``; one failing file is reported
+in the summary instead of stopping the batch. A combined ``summary.csv`` /
+``summary.json`` with per-file Group counts is written next to the outputs,
+and the per-file aggregate cubes (:mod:`rdproc.cube`) are merged into
+``summary_cube.parquet`` with the file name in a ``Source`` column.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import partial
+
+import pandas as pd
+
+from . import metrics
+from .api import classify
+from .audit import Profiler, write_audit
+from .cache import FrameCache
+from .cube import CUBE_SUFFIX, Cube, read_cubes, write_cube
+from .dtypes import FAILURES_ATTR, merge_failures, report_failures
+from .reader import HEADER_ROWS, iter_rd_chunks, read_rd
+from .store import RunStore
+from .writer import write_output
+
+EXCEL_SUFFIXES = ('.xlsx', '.xlsm', '.xls')
+_MODE_IN_NAME = re.compile(r'(?<![A-Za-z])RD[\s_-]?0?([35])(?!\d)', re.IGNORECASE)
+# หัวตารางคอลัมน์ที่ 14: RD03 = หมายเหตุ (Notes), RD05 = ค่าตอบแทน (Compensation)
+_HEADER_MARKERS = (('RD05', 'RD05'), ('RD03', 'RD03'), ('ค่าตอบแทน', 'RD05'), ('หมายเหตุ', 'RD03'))
+
+
+def detect_mode(path):
+    """Return ``'RD03'`` or ``'RD05'`` from the file name or the header rows."""
+    m = _MODE_IN_NAME.search(os.path.basename(path))
+    if m:
+        return f"RD0{m.group(1)}"
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(max_row=HEADER_ROWS, values_only=True)
+        text = ' '.join(str(v) for row in rows for v in row if v is not None)
+    finally:
+        wb.close()
+    for marker, mode in _HEADER_MARKERS:
+        if marker in text:
+            return mode
+    raise ValueError(f"ไม่สามารถระบุประเภทไฟล์ (RD03/RD05) ได้: {path}")
+
+
+def expand_inputs(patterns):
+    """Expand directories and glob patterns into a sorted list of workbooks."""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        files.extend(p for p in candidates
+                     if p.lower().endswith(EXCEL_SUFFIXES) and not os.path.basename(p).startswith('~$'))
+    return sorted(set(files))
+
+
+def output_stems(files):
+    """Map each file to the stem of its outputs, unique within ``files``.
+
+    Workbooks with the same name in different directories (recursive globs)
+    get ``<stem>_<hash of the directory>``, so they do not overwrite each
+    other's output, cube and audit files.
+    """
+    stems = {p: os.path.splitext(os.path.basename(p))[0] for p in files}
+    taken = Counter(stems.values())
+    for p, stem in stems.items():
+        if taken[stem] > 1:
+            folder = os.path.dirname(os.path.abspath(p))
+            stems[p] = f"{stem}_{hashlib.sha1(folder.encode('utf-8')).hexdigest()[:8]}"
+    return stems
+
+
+def output_path(path, out_dir, fmt, stem=None):
+    stem = stem or os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(out_dir, f"{stem}_Processed.{fmt}")
+
+
+def side_path(path, out_dir, suffix, stem=None):
+    """``<out_dir>/<stem><suffix>`` for the per-file side outputs."""
+    stem = stem or os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(out_dir, f"{stem}{suffix}")
+
+
+def process_file(path, out_dir, fmt='xlsx', mode=None, rules=None, chunksize=None, use_cache=True,
+                 audit=False, collect_metrics=False, profile=False, cube=True, store=None, stem=None):
+    """Classify one workbook; returns a report dict (never raises).
+
+    ``stem`` names the outputs (default: the file name, see
+    :func:`output_stems`). With ``store`` (a :class:`~rdproc.store.RunStore`
+    path) the rows are also inserted as a new run; ``report['run_id']`` is
+    its id.
+
+    Side outputs next to the result: ``<stem>_cube.parquet`` with ``cube``
+    (built in the same pass), ``<stem>_audit.csv`` with ``audit``,
+    ``<stem>_metrics.json`` with ``collect_metrics`` and ``<stem>.prof``
+    (cProfile) with ``profile``.
+    """
+    start = time.perf_counter()
+    report = {'file': path, 'mode': mode, 'rows': 0, 'groups': {}, 'output': None,
+              'bytes': 0, 'seconds': 0.0, 'coercion_failures': {}, 'audit': None,
+              'cube': None, 'run_id': None, 'metrics': None, 'error': None}
+    name = os.path.basename(path) if stem is None else stem + os.path.splitext(path)[1]
+    if collect_metrics:
+        report['metrics'] = side_path(path, out_dir, '_metrics.json', stem)
+    collector = nullcontext()
+    if collect_metrics or profile:
+        prof = side_path(path, out_dir, '.prof', stem) if profile else None
+        collector = metrics.collect(report['metrics'], prof)
+    run = None
+    try:
+        with collector:
+            mode = report['mode'] = mode or detect_mode(path)
+            target = output_path(path, out_dir, fmt, stem)
+            groups = Counter()
+            failures = []
+            profiler = Profiler() if audit else None
+            cuber = Cube() if cube else None
+            if store:
+                run = RunStore(store).begin(mode, name, rules)
+
+            def count(df):
+                if profiler is not None:
+                    profiler.update(df)
+                if cuber is not None:
+                    cuber.update(df)
+                if run is not None:
+                    run.add(df)
+                for g, n in df['Group'].value_counts(dropna=False).items():
+                    groups['' if pd.isna(g) else str(g)] += int(n)
+                failures.append(df.attrs.get(FAILURES_ATTR, {}))
+
+            if chunksize:
+                def classified():
+                    for chunk in iter_rd_chunks(path, mode, chunksize):
+                        chunk = classify(chunk, mode, rules)
+                        count(chunk)
+                        yield chunk
+                written = write_output(classified(), target, fmt)
+                report_failures(merge_failures(failures))
+            else:
+                if use_cache:
+                    df = FrameCache().read(path, mode)
+                else:
+                    df = read_rd(path, mode).reset_index(drop=True)
+                df = classify(df, mode, rules)
+                count(df)
+                written = write_output(df, target, fmt)
+
+            if profiler is not None:
+                report['audit'] = side_path(path, out_dir, '_audit.csv', stem)
+                write_audit(profiler, report['audit'])
+            if cuber is not None:
+                report['cube'] = side_path(path, out_dir, CUBE_SUFFIX, stem)
+                write_cube(cuber, report['cube'], mode=mode, source=name)
+            if run is not None:
+                report['run_id'] = run.finish()
+                run.store.close()
+            report.update(rows=written['rows'], output=target, bytes=written['bytes'],
+                          groups=dict(sorted(groups.items())), coercion_failures=merge_failures(failures))
+    except Exception as e:
+        report['error'] = f"{type(e).__name__}: {e}"
+        print(f"❌ เกิดข้อผิดพลาด: {path}: {report['error']}")
+        if run is not None:
+            run.abort()
+            run.store.close()
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def write_summary(reports, out_dir):
+    """Write ``summary.json`` and a wide ``summary.csv`` (one row per file)."""
+    with open(os.path.join(out_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+    base = ['file', 'mode', 'rows', 'seconds', 'bytes', 'output', 'run_id', 'coercion_failures', 'error']
+    rows = []
+    for r in reports:
+        row = {k: r[k] for k in base}
+        row['coercion_failures'] = sum(f['count'] for f in r['coercion_failures'].values())
+        row.update({f"Group {g or '(ว่าง)'}": n for g, n in r['groups'].items()})
+        rows.append(row)
+    summary = pd.DataFrame(rows)
+    group_cols = sorted(c for c in summary.columns if c not in base)
+    summary[group_cols] = summary[group_cols].fillna(0).astype('int64')
+    summary = summary[base + group_cols]
+    summary.to_csv(os.path.join(out_dir, 'summary.csv'), index=False, encoding='utf-8-sig')
+    return summary
+
+
+def run_batch(inputs, out_dir, fmt='xlsx', mode=None, rules=None, workers=None,
+              chunksize=None, use_cache=True, audit=False, collect_metrics=False, profile=False, cube=True,
+              store=None):
+    """Classify every input across a process pool and write the summary."""
+    files = expand_inputs(inputs)
+    if not files:
+        print('ไม่พบไฟล์ Excel ที่จะประมวลผล')
+        return []
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    print(f"เริ่มประมวลผล {len(files)} ไฟล์ ด้วย {min(workers, len(files))} process")
+
+    start = time.perf_counter()
+    work = partial(process_file, out_dir=out_dir, fmt=fmt, mode=mode, rules=rules, chunksize=chunksize,
+                   use_cache=use_cache, audit=audit, collect_metrics=collect_metrics, profile=profile,
+                   cube=cube, store=store)
+    stems = output_stems(files)
+    reports = []
+    if workers == 1 or len(files) == 1:
+        reports = [work(p, stem=stems[p]) for p in files]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            futures = [pool.submit(work, p, stem=stems[p]) for p in files]
+            for fut in as_completed(futures):
+                reports.append(fut.result())
+        reports.sort(key=lambda r: r['file'])
+
+    write_summary(reports, out_dir)
+    cubes = [r['cube'] for r in reports if r['cube']]
+    if cubes:
+        write_cube(read_cubes(cubes), os.path.join(out_dir, 'summary_cube.parquet'))
+    failed = sum(1 for r in reports if r['error'])
+    print(f"เสร็จสิ้น {len(reports) - failed}/{len(reports)} ไฟล์ "
+          f"ใน {time.perf_counter() - start:.1f} วินาที (สรุปที่ {os.path.join(out_dir, 'summary.csv')})")
+    return reports
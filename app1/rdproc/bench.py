@@ -0,0 +1,164 @@
+"""Benchmark suite: stage timings on synthetic exports and a legacy check.
+
+For every mode and size :func:`run` generates a synthetic frame
+(:mod:`rdproc.synth`) and times each stage of the pipeline on it:
+
+* ``generate``: building the frame;
+* ``workbook`` / ``read``: writing an export workbook (8 header rows) and
+  reading it back with ``read_rd``; only up to ``workbook_max`` rows, since
+  xlsx is slow to write and one sheet holds about one million rows;
+* ``normalize``: the compact dtypes;
+* ``classify``: the compiled engine (``group_concession`` + ``rules``);
+* ``ui_rules``: the UI rule set (``--rules`` / ``--rules-db``), when given;
+* ``legacy``: the original query cascade (:mod:`rdproc.legacy`), only up to
+  ``legacy_max`` rows;
+* ``write_<fmt>``: writing the classified frame.
+
+The engine's ``GroupConcession`` / ``Group`` are compared row by row with the
+legacy labels, and the labels of the workbook that was read back with those of
+the generated frame. Any mismatch is reported; ``rdproc bench`` then exits 1.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from . import engine, legacy, metrics, rd03, rd05, synth
+from .api import classify
+from .dtypes import OUTPUT_COLUMNS, normalize
+from .reader import read_rd
+from .writer import write_output
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+WORKBOOK_MAX = 100_000
+LEGACY_MAX = 1_000_000
+WRITE_FORMATS = ('parquet', 'csv')
+# คอลัมน์ที่ชุดกฎเดิมใช้ ส่งเฉพาะคอลัมน์เหล่านี้ให้ legacy เพื่อประหยัดหน่วยความจำ
+RULE_COLUMNS = ('Concession', 'Line_Type', 'Diameter', 'Cores', 'Total_Distance')
+_NA = '<NA>'
+
+
+def parse_size(text):
+    """``'10k'`` -> 10000, ``'5M'`` -> 5000000."""
+    text = text.strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def _timed(result, name, rows, fn, *args):
+    """Run ``fn`` under its own collector and store its time and sub-stages."""
+    with metrics.collect() as m:
+        out = fn(*args)
+    stats = m.to_dict()
+    result['stages'][name] = {
+        'seconds': stats['seconds'],
+        'rows_per_second': round(rows / stats['seconds']) if stats['seconds'] else None,
+        'detail': {k: v['seconds'] for k, v in stats['stages'].items()},
+    }
+    result['peak_rss_mb'] = stats['peak_rss_mb']
+    return out
+
+
+def mismatches(expected, actual):
+    """Rows whose ``GroupConcession`` / ``Group`` differ (missing == missing)."""
+    out = {}
+    for col in OUTPUT_COLUMNS:
+        a = expected[col].astype(object).fillna(_NA).to_numpy()
+        b = actual[col].astype(object).fillna(_NA).to_numpy()
+        out[col] = int((a != b).sum())
+    return out
+
+
+def _labels(df, by='Tag'):
+    return df.set_index(by)[list(OUTPUT_COLUMNS)]
+
+
+def bench_one(mode, n, seed=0, rules=None, workbook_max=WORKBOOK_MAX, legacy_max=LEGACY_MAX,
+              formats=WRITE_FORMATS, work_dir=None):
+    """Benchmark one mode/size; returns the result dict."""
+    result = {'mode': mode, 'rows': n, 'stages': {}, 'mismatches': {}}
+    raw = _timed(result, 'generate', n, synth.frame, n, mode, seed)
+    raw.index = pd.RangeIndex(len(raw))
+
+    df = _timed(result, 'normalize', n, lambda: normalize(raw.copy(), verbose=False))
+    out = _timed(result, 'classify', n, classify, df, mode)
+    if rules is not None:
+        ui = _timed(result, 'ui_rules', n, classify, df, mode, rules)
+        result['ui_rules_group_counts'] = {str(k): int(v) for k, v in ui['Group'].value_counts().items()}
+
+    if n <= legacy_max:
+        expected = _timed(result, 'legacy', n, legacy.CLASSIFY[mode], raw[list(RULE_COLUMNS)].copy())
+        result['mismatches']['legacy'] = mismatches(expected, out)
+        result['speedup'] = round(result['stages']['legacy']['seconds']
+                                  / result['stages']['classify']['seconds'], 1)
+        del expected
+    if n <= workbook_max:
+        path = os.path.join(work_dir, f'bench_{mode}_{n}.xlsx')
+        _timed(result, 'workbook', n, synth.write_workbook, path, n, mode, seed)
+        read = _timed(result, 'read', n, read_rd, path, mode)
+        read = classify(read, mode)
+        result['mismatches']['read'] = mismatches(_labels(out), _labels(read).reindex(out['Tag']))
+        del read
+    del raw
+
+    for fmt in formats:
+        if fmt == 'xlsx' and n > workbook_max:
+            continue
+        path = os.path.join(work_dir, f'bench_{mode}_{n}_out.{fmt}')
+        _timed(result, f'write_{fmt}', n, write_output, out, path, fmt)
+        result.setdefault('output_mb', {})[fmt] = round(os.path.getsize(path) / 1024 ** 2, 1)
+        os.remove(path)
+    result['group_counts'] = {str(k): int(v) for k, v in out['Group'].value_counts().items()}
+    return result
+
+
+def ok(results):
+    return all(not any(m.values()) for r in results for m in r['mismatches'].values())
+
+
+def to_frame(results):
+    """One row per mode / size / stage."""
+    rows = []
+    for r in results:
+        for name, s in r['stages'].items():
+            rows.append({'mode': r['mode'], 'rows': r['rows'], 'stage': name,
+                         'seconds': s['seconds'], 'rows_per_second': s['rows_per_second']})
+    return pd.DataFrame(rows, columns=['mode', 'rows', 'stage', 'seconds', 'rows_per_second'])
+
+
+def run(sizes=DEFAULT_SIZES, modes=('RD03', 'RD05'), seed=0, rules=None, workbook_max=WORKBOOK_MAX,
+        legacy_max=LEGACY_MAX, formats=WRITE_FORMATS, json_path=None, csv_path=None):
+    """Benchmark every mode / size; returns the list of result dicts.
+
+    ``rules`` maps a mode to a UI rule set (``load_rules`` output) to time
+    alongside the built-in rules.
+    """
+    work_dir = tempfile.mkdtemp(prefix='rdbench_')
+    results = []
+    # กฎที่ไม่มีทางชนะถูกวิเคราะห์ครั้งเดียวต่อ process จึงทำไว้ก่อนเพื่อไม่ให้ปนในเวลา classify
+    for table in (rd03.RULES, rd05.RULES):
+        engine.live_rules(table)
+    try:
+        for mode in modes:
+            for n in sizes:
+                print(f'⏱️ {mode} {n:,} แถว ...')
+                r = bench_one(mode, n, seed, (rules or {}).get(mode), workbook_max, legacy_max,
+                              formats, work_dir)
+                summary = ', '.join(f"{k} {v['seconds']:.2f}s" for k, v in r['stages'].items())
+                print(f'   {summary}')
+                for check, counts in r['mismatches'].items():
+                    if any(counts.values()):
+                        print(f'❌ ผลไม่ตรงกับ {check}: {counts}')
+                results.append(r)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'บันทึกผลไว้ที่ {json_path}')
+    if csv_path:
+        to_frame(results).to_csv(csv_path, index=False)
+    print('✅ ผลการจัดกลุ่มตรงกับสคริปต์เดิมทุกแถว' if ok(results) else '❌ พบผลการจัดกลุ่มที่ไม่ตรงกัน')
+    return results
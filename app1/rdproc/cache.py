@@ -0,0 +1,164 @@
+"""Columnar cache of parsed RD03/RD05 workbooks.
+
+Parsing ``.xlsx`` dominates a run, and the same export is often classified
+again after a rule change. :class:`FrameCache` stores the normalized frame
+(renamed columns, blank PEA rows dropped) as an uncompressed Arrow IPC file
+named after the SHA-256 of the workbook, and later runs memory-map that file
+instead of opening the workbook.
+
+The key also contains a hash of the column layout (``RD03_COLS`` /
+``RD05_COLS``, header offset, cache version), so changing a layout or the
+stored dtypes invalidates old entries automatically. Least recently used
+entries are evicted once the directory grows past ``max_bytes``.
+
+Object columns mixing numbers and text outside the rule columns (e.g. a
+numeric cell in ``Route_Name``) are stored as text, and :meth:`FrameCache.read`
+returns them that way on a miss too, so a hit gives the same frame.
+
+pyarrow is optional; without it every read falls through to the reader.
+"""
+import hashlib
+import json
+import os
+
+from . import metrics
+from .dtypes import stringify
+from .reader import COLUMNS, HEADER_ROWS, read_rd
+
+CACHE_VERSION = 3
+# คอลัมน์ที่กฎใช้ต้องคงชนิดเดิม จึงไม่แปลงเป็นข้อความ
+RULE_COLUMNS = ('Concession', 'Line_Type', 'Cores', 'Diameter', 'Total_Distance')
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'rdproc')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+SUFFIX = '.arrow'
+
+
+def file_hash(path, block_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def layout_hash(mode):
+    payload = json.dumps({'version': CACHE_VERSION, 'mode': mode,
+                          'header_rows': HEADER_ROWS, 'columns': COLUMNS[mode]})
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FrameCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get('RD_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+
+    def entry_path(self, source_hash, mode):
+        name = f"{mode}_{source_hash[:32]}_{layout_hash(mode)[:12]}{SUFFIX}"
+        return os.path.join(self.directory, name)
+
+    def load(self, source_hash, mode):
+        """Return the cached frame or ``None`` on a miss."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return None
+        path = self.entry_path(source_hash, mode)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with pa.memory_map(path, 'r') as src:
+                table = pa.ipc.open_file(src).read_all()
+        except (OSError, pa.ArrowInvalid):
+            self._remove(path)
+            return None
+        meta = table.schema.metadata or {}
+        if meta.get(b'rdproc.layout', b'').decode() != layout_hash(mode):
+            self._remove(path)
+            return None
+        os.utime(path)  # LRU: อัปเดตเวลาใช้งานล่าสุด
+        return table.to_pandas()
+
+    def store(self, source_hash, mode, df):
+        """Write ``df`` to the cache; returns False when it cannot be stored.
+
+        Mixed object columns outside ``RULE_COLUMNS`` are stored as text.
+        Rule columns holding mixed types (e.g. text in ``Cores`` of an
+        uncompacted frame) have no lossless Arrow type, so such frames are
+        left uncached.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return False
+        try:
+            table = pa.Table.from_pandas(stringify(df, RULE_COLUMNS, mixed_only=True), preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            print(f"ไม่สามารถเก็บ cache ได้: {e}")
+            return False
+        meta = dict(table.schema.metadata or {})
+        meta[b'rdproc.layout'] = layout_hash(mode).encode()
+        meta[b'rdproc.source'] = source_hash.encode()
+        table = table.replace_schema_metadata(meta)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(source_hash, mode)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+        self.evict(keep=path)
+        return True
+
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.directory, name)
+                st = os.stat(path)
+                out.append((st.st_mtime, st.st_size, path))
+        return sorted(out)
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    def read(self, path, mode, reader=read_rd):
+        """Return the normalized frame for ``path``, parsing it only on a miss."""
+        with metrics.stage('cache_load') as info:
+            source_hash = file_hash(path)
+            df = self.load(source_hash, mode)
+            info['rows'] = 0 if df is None else len(df)
+        if df is not None:
+            print(f"ใช้ข้อมูลจาก cache: {os.path.basename(path)}")
+            return df
+        df = stringify(reader(path, mode).reset_index(drop=True), RULE_COLUMNS, mixed_only=True)
+        with metrics.stage('cache_store') as info:
+            info['rows'] = len(df) if self.store(source_hash, mode, df) else 0
+        return df
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def read_rd_cached(path, mode, cache=None):
+    """``read_rd`` through the default (or given) :class:`FrameCache`."""
+    return (cache or FrameCache()).read(path, mode)
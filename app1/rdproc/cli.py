@@ -0,0 +1,299 @@
+"""Command line entry point: ``python -m rdproc <command> ...``."""
+import argparse
+import os
+import tempfile
+from contextlib import nullcontext
+
+from . import batch, bench, conflicts, cube, incremental, metrics, rd03, rd05, service, spatial, store, synth
+from .cache import FrameCache
+from .concession import group_concession
+from .dtypes import normalize
+from .reader import read_rd
+from .rules import load_rules, load_rules_from_db
+from .writer import FORMATS, read_output, write_output
+
+
+def _rules_from_args(args, mode):
+    if args.rules:
+        return load_rules(args.rules, mode or 'RD03', args.profile)
+    if args.rules_db:
+        return load_rules_from_db(args.rules_db, mode or 'RD03', args.profile)
+    return None
+
+
+def cmd_batch(args):
+    if (args.rules or args.rules_db) and not args.mode:
+        raise SystemExit('--rules/--rules-db ต้องระบุ --mode (RD03 หรือ RD05) ด้วย')
+    reports = batch.run_batch(
+        args.inputs, args.out_dir, fmt=args.format, mode=args.mode,
+        rules=_rules_from_args(args, args.mode), workers=args.workers,
+        chunksize=args.chunksize, use_cache=not args.no_cache, audit=args.audit,
+        collect_metrics=args.metrics, profile=args.cprofile, cube=not args.no_cube, store=args.store,
+    )
+    return 1 if any(r['error'] for r in reports) else 0
+
+
+def cmd_incremental(args):
+    mode = args.mode or batch.detect_mode(args.input)
+    rules = _rules_from_args(args, mode)
+    with metrics.collect(args.metrics, args.cprofile) if args.metrics or args.cprofile else nullcontext():
+        df = read_rd(args.input, mode).reset_index(drop=True) if args.no_cache else FrameCache().read(args.input, mode)
+        df, _ = incremental.classify_incremental(df, mode, args.state, rules)
+        output = args.output or batch.output_path(args.input, '.', args.format)
+        write_output(df, output, args.format)
+    if args.store:
+        with store.RunStore(args.store) as runs:
+            runs.add_run(df, mode, os.path.basename(args.input), rules)
+    return 0
+
+
+def cmd_bench(args):
+    rules = None
+    if args.rules or args.rules_db:
+        rules = {mode: _rules_from_args(args, mode) for mode in args.modes}
+    results = bench.run(
+        [bench.parse_size(s) for s in args.sizes.split(',')], args.modes, seed=args.seed, rules=rules,
+        workbook_max=args.workbook_max, legacy_max=args.legacy_max, formats=args.formats,
+        json_path=args.json or os.path.join(tempfile.mkdtemp(prefix='rdbench_'), 'bench.json'),
+        csv_path=args.csv,
+    )
+    return 0 if bench.ok(results) else 1
+
+
+def cmd_cube(args):
+    where = {}
+    for item in args.where:
+        col, sep, values = item.partition('=')
+        if not sep or col not in cube.KEYS + (cube.SOURCE,):
+            raise SystemExit(f"--where ต้องอยู่ในรูป <คอลัมน์>=<ค่า>[,<ค่า>...] เช่น PEA=กฟจ.01: {item}")
+        where[col] = values.split(',')
+    by = [c for c in args.by.split(',') if c]
+    data = cube.read_cubes(args.cubes) if len(args.cubes) > 1 else cube.read_cube(args.cubes[0])
+    out = cube.rollup(data, by, where)
+    if args.output:
+        write_output(out, args.output)
+    else:
+        print(out.to_string(index=False))
+    return 0
+
+
+def _print(df):
+    print(df.to_string(index=False) if len(df) else '(ไม่พบข้อมูล)')
+
+
+def cmd_store(args):
+    with store.RunStore(args.db) as runs:
+        if args.action == 'runs':
+            _print(runs.runs(args.source))
+        elif args.action == 'lookup':
+            _print(runs.lookup(args.tag))
+        elif args.action == 'query':
+            filters = {col: value.split(',') for col, value in
+                       (('PEA', args.pea), ('Concession', args.concession), ('Group', args.group)) if value}
+            df = runs.query(args.run, args.limit, **filters)
+            if args.output:
+                write_output(df, args.output)
+            else:
+                _print(df)
+        elif args.action == 'compare':
+            df = runs.compare(args.old, args.new)
+            print(df['Change'].value_counts().to_string() if len(df) else 'ไม่มีเส้นทางที่เปลี่ยนไป')
+            if args.output:
+                write_output(df, args.output)
+        elif args.action == 'prune':
+            runs.prune(args.days, args.keep)
+    return 0
+
+
+def _floats(text, n, name):
+    try:
+        values = [float(v) for v in text.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != n:
+        raise SystemExit(f"{name} ต้องเป็นตัวเลข {n} ค่าคั่นด้วย ,: {text}")
+    return values
+
+
+def cmd_spatial(args):
+    df = read_output(args.data)
+    index = spatial.cached_index(df, args.data, args.cell)
+    distances = None
+    if args.bbox:
+        rows = index.bbox(*_floats(args.bbox, 4, '--bbox'))
+    elif args.near:
+        rows, distances = index.radius(*_floats(args.near, 2, '--near'), args.radius)
+    else:
+        rows = index.polygon(spatial.read_polygon(args.polygon), 'all' if args.all_inside else 'any')
+    out = df.iloc[rows].reset_index(drop=True)
+    if distances is not None:
+        out.insert(0, 'Distance_m', distances.round(1))
+    if args.group:
+        out = out[out['Group'].astype('str').str.startswith(tuple(args.group), na=False)]
+    if args.output:
+        write_output(out, args.output)
+    else:
+        print(f"พบ {len(out):,} เส้นทาง")
+        _print(out[[c for c in ('Distance_m', 'Tag', 'PEA', 'GroupConcession', 'Group', 'Line_Type',
+                                'Start_Coordinates', 'End_Coordinates') if c in out.columns]])
+    return 0
+
+
+def cmd_rules_check(args):
+    if args.input:
+        mode = args.mode or batch.detect_mode(args.input)
+        df = read_rd(args.input, mode) if args.no_cache else FrameCache().read(args.input, mode)
+    elif args.synth:
+        mode = args.mode or 'RD03'
+        df = normalize(synth.frame(args.synth, mode, args.seed), verbose=False)
+    else:
+        mode = args.mode or 'RD03'
+        df = None
+    rules = {'RD03': rd03.RULES, 'RD05': rd05.RULES}[mode]
+    if df is None:
+        report = conflicts.analyze_domain(rules, args.top)
+        title = f"{mode} (ทุกชุดค่าที่กฎแยกได้) "
+    else:
+        df['GroupConcession'] = group_concession(df['Concession'])
+        report = conflicts.analyze(df, rules, args.top)
+        title = f"{mode} "
+    conflicts.print_report(report, title)
+    if args.output:
+        conflicts.write_report(report, args.output)
+    return 0
+
+
+def cmd_serve(args):
+    service.serve(args.host, args.port, args.workers, args.out_dir, args.rules_db, args.max_upload_mb,
+                  args.max_jobs, args.store)
+    return 0
+
+
+def _add_rules_args(p):
+    p.add_argument('--rules', help='GroupRule JSON (rule list, configs or backup export) to use instead of the built-in rules')
+    p.add_argument('--rules-db', help="main API SQLite database to read the app1 rules from")
+    p.add_argument('--profile', help='rule profile id (default: the active profile)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='rdproc', description='RD03/RD05 classification tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('batch', help='classify a directory or glob of RD03/RD05 workbooks')
+    p.add_argument('inputs', nargs='+', help='directories, files or glob patterns')
+    p.add_argument('-o', '--out-dir', default='processed', help='output directory (default: processed)')
+    p.add_argument('-f', '--format', choices=FORMATS, default='xlsx', help='output format (default: xlsx)')
+    p.add_argument('-m', '--mode', choices=('RD03', 'RD05'), help='force the layout instead of detecting it')
+    p.add_argument('-j', '--workers', type=int, help='worker processes (default: all cores)')
+    p.add_argument('--chunksize', type=int, help='stream the workbook in chunks of this many rows')
+    p.add_argument('--no-cache', action='store_true', help='do not read/write the Arrow cache')
+    p.add_argument('--audit', action='store_true', help='also write <name>_audit.csv with the unique-value report')
+    p.add_argument('--metrics', action='store_true', help='also write <name>_metrics.json (stage timings, rule hits)')
+    p.add_argument('--cprofile', action='store_true', help='also write a cProfile dump <name>.prof')
+    p.add_argument('--no-cube', action='store_true', help='do not write the <name>_cube.parquet aggregates')
+    p.add_argument('--store', metavar='DB', help='also insert every file as a run into this SQLite run store')
+    _add_rules_args(p)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser('incremental', help='re-classify only the rows that changed since the last run')
+    p.add_argument('input', help='RD03/RD05 workbook')
+    p.add_argument('-s', '--state', required=True, help='state file of the previous run (created when missing)')
+    p.add_argument('-o', '--output', help='output file (default: <name>_Processed.<format>)')
+    p.add_argument('-f', '--format', choices=FORMATS, default='xlsx', help='output format (default: xlsx)')
+    p.add_argument('-m', '--mode', choices=('RD03', 'RD05'), help='force the layout instead of detecting it')
+    p.add_argument('--no-cache', action='store_true', help='do not read/write the Arrow cache')
+    p.add_argument('--metrics', metavar='JSON', help='write stage timings and rule hit counts to this file')
+    p.add_argument('--cprofile', metavar='PROF', help='write a cProfile dump to this file')
+    p.add_argument('--store', metavar='DB', help='also insert the result as a run into this SQLite run store')
+    _add_rules_args(p)
+    p.set_defaults(func=cmd_incremental)
+
+    p = sub.add_parser('bench', help='time every stage on synthetic exports and check against the original cascade')
+    p.add_argument('--sizes', default='10k,100k,1M', help='comma separated row counts, e.g. 10k,100k,1M,5M (default: 10k,100k,1M)')
+    p.add_argument('-m', '--modes', nargs='+', choices=('RD03', 'RD05'), default=['RD03', 'RD05'])
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--workbook-max', type=bench.parse_size, default=bench.WORKBOOK_MAX,
+                   help='largest size to also write and read back as xlsx (default: 100k)')
+    p.add_argument('--legacy-max', type=bench.parse_size, default=bench.LEGACY_MAX,
+                   help='largest size to run the original query cascade on (default: 1M)')
+    p.add_argument('--formats', nargs='+', choices=FORMATS, default=list(bench.WRITE_FORMATS),
+                   help='output formats to time (default: parquet csv)')
+    p.add_argument('--json', help='result file (default: bench.json in a new temporary directory)')
+    p.add_argument('--csv', help='also write one row per mode/size/stage to this file')
+    _add_rules_args(p)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser('cube', help='Routes / distance / pole totals from the aggregate cubes of batch or the service')
+    p.add_argument('cubes', nargs='+', help='<name>_cube.parquet files (several are summed, see Source)')
+    p.add_argument('--by', default='PEA,Group', help='comma separated breakdown columns, empty for the grand total '
+                   '(default: PEA,Group)')
+    p.add_argument('--where', action='append', default=[], metavar='COL=V1[,V2]', help='keep only these key values')
+    p.add_argument('-o', '--output', help='write the table to this file (.csv, .xlsx or .parquet) instead of printing it')
+    p.set_defaults(func=cmd_cube)
+
+    p = sub.add_parser('store', help='look up routes and compare runs in the SQLite run store')
+    p.add_argument('--db', help=f'run store (default: $RD_STORE or {store.DEFAULT_STORE})')
+    actions = p.add_subparsers(dest='action', required=True)
+    a = actions.add_parser('runs', help='list the stored runs, newest first')
+    a.add_argument('--source', help='only runs of this file name')
+    a = actions.add_parser('lookup', help='every stored version of one route')
+    a.add_argument('tag')
+    a = actions.add_parser('query', help='routes of one run by PEA / Concession / Group')
+    a.add_argument('--run', type=int, help='run id (default: the newest run)')
+    a.add_argument('--pea')
+    a.add_argument('--concession')
+    a.add_argument('--group', help='comma separated values, e.g. 1.1,1.2')
+    a.add_argument('--limit', type=int)
+    a.add_argument('-o', '--output', help='write the rows to this file instead of printing them')
+    a = actions.add_parser('compare', help='routes added, removed, relabelled or modified between two runs')
+    a.add_argument('old', type=int)
+    a.add_argument('new', type=int)
+    a.add_argument('-o', '--output', help='write the changed routes to this file')
+    a = actions.add_parser('prune', help='delete old runs')
+    a.add_argument('--days', type=float, default=store.DEFAULT_RETENTION_DAYS,
+                   help=f'delete runs older than this (default: {store.DEFAULT_RETENTION_DAYS})')
+    a.add_argument('--keep', type=int, help='keep only the newest KEEP runs of each file')
+    p.set_defaults(func=cmd_store)
+
+    p = sub.add_parser('spatial', help='routes of a classified file inside a box / polygon or near a point')
+    p.add_argument('data', help='classified output (.parquet, .csv or .xlsx); the index is kept in <data>.spatial.npz')
+    where = p.add_mutually_exclusive_group(required=True)
+    where.add_argument('--bbox', metavar='MIN_LAT,MIN_LON,MAX_LAT,MAX_LON')
+    where.add_argument('--near', metavar='LAT,LON', help='routes passing within --radius meters of this point')
+    where.add_argument('--polygon', metavar='GEOJSON', help='routes with an end point inside this polygon')
+    p.add_argument('--radius', type=float, default=100.0, help='meters for --near (default: 100)')
+    p.add_argument('--all-inside', action='store_true', help='with --polygon: both end points inside')
+    p.add_argument('--group', action='append', metavar='PREFIX', help='only these Groups, e.g. --group 4. (repeatable)')
+    p.add_argument('--cell', type=float, default=spatial.DEFAULT_CELL,
+                   help=f'grid cell size in degrees (default: {spatial.DEFAULT_CELL})')
+    p.add_argument('-o', '--output', help='write the routes to this file instead of printing them')
+    p.set_defaults(func=cmd_spatial)
+
+    p = sub.add_parser('rules-check', help='overlapping, shadowed and dead rules of the built-in RD03/RD05 tables')
+    p.add_argument('input', nargs='?', help='RD03/RD05 workbook to check the rules on '
+                   '(default: every combination of values the rules can tell apart)')
+    p.add_argument('-m', '--mode', choices=('RD03', 'RD05'), help='rule table (default: detected from the input, or RD03)')
+    p.add_argument('--synth', type=bench.parse_size, metavar='N', help='check on N synthetic rows instead, e.g. 1M')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--no-cache', action='store_true', help='do not read/write the Arrow cache')
+    p.add_argument('--top', type=int, default=50, help='unmatched value combinations to keep (default: 50)')
+    p.add_argument('-o', '--output', help='write the rules / overlaps / unmatched tables to this .xlsx or .json')
+    p.set_defaults(func=cmd_rules_check)
+
+    p = sub.add_parser('serve', help='HTTP classification service for the app1 frontend (/api/app1/process)')
+    p.add_argument('--host', default='127.0.0.1', help='bind address (default: 127.0.0.1)')
+    p.add_argument('--port', type=int, default=service.DEFAULT_PORT, help=f'port (default: {service.DEFAULT_PORT})')
+    p.add_argument('-j', '--workers', type=int, help='worker processes (default: all cores)')
+    p.add_argument('-o', '--out-dir', help='where results are kept until downloaded (default: a temp directory)')
+    p.add_argument('--rules-db', help='main API SQLite database to read the app1 rules from (default: built-in rules)')
+    p.add_argument('--max-upload-mb', type=int, default=service.MAX_UPLOAD_MB,
+                   help=f'largest accepted upload (default: {service.MAX_UPLOAD_MB})')
+    p.add_argument('--max-jobs', type=int, help='background jobs run at the same time (default: --workers)')
+    p.add_argument('--store', metavar='DB', help='also keep every processed upload as a run in this SQLite run store')
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
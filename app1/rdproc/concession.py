@@ -0,0 +1,65 @@
+"""Concession -> GroupConcession lookup shared by the RD03/RD05 scripts."""
+import numpy as np
+import pandas as pd
+
+from . import dtypes, metrics
+
+DIGITAL = 'กระทรวจดิจิทัล'
+NBTC = 'กสทช'
+NT = 'NT'
+NT_CONCESSION = 'สัมปทาน NT'
+NON_NT_CONCESSION = 'ไม่ใช่สัมปทาน NT'
+
+# 1. กระทรวงดิจิทัล
+DIGITAL_LIST = ['กระทรวงดิจิทัลเพื่อเศรษฐกิจและสังคม', 'กระทรวงดิจิทัลเศรษฐกิจและสังคมตรวจสอบเส้นทางแล้ว']
+# 2. กสทช
+NBTC_LIST = ['NBTC/CAT', 'NBTC/TOT']
+# 3. NT
+NT_LIST = ['-', 'บริษัท กสท โทรคมนาคม จำกัด(มหาชน)', 'บริษัท ทีโอที จำกัด(มหาชน)',
+           'ย้ายข้อมูลจากTAMS1', 'Cleansing ข้อมูลสายสื่อสาร', 'บริษัท โทรคมนาคมแห่งชาติ จำกัด (มหาชน)']
+# 4. สัมปทาน NT
+NT_CONCESSION_LIST = ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)',
+                      'CAT-TAC #สัมปทาน', 'TOT/AIS #สัมปทาน', 'TOT-TT&T #สัมปทาน',
+                      'บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'บริษัท บีเอฟเคที จำกัด']
+# 5. ไม่ใช่สัมปทาน NT
+NON_NT_CONCESSION_LIST = ['Big Patrol', 'CAT-SINET #สัมปทาน', 'CAT-TRUE #สัมปทาน', 'เคเบิ้ลทีวี (รวม)',
+                          'บริษัท เอแอลที เทเลคอม จำกัด (มหาชน)', 'บริษัท แอดวานซ์ ไวร์เลส เน็ทเวอร์ค จำกัด',
+                          'บริษัท ไซแมท เทคโนโลยี จำกัด (มหาชน)', 'บริษัท ดีแทค ไตรเน็ต จำกัด',
+                          'บริษัท ทริปเปิลที บรอดแบนด์ จำกัด (มหาชน)', 'บริษัท ทริปเปิลที อินเทอร์เน็ต จำกัด',
+                          'บริษัท ทรู มูฟ เอช ยูนิเวอร์แซล คอมมิวนิเคชั่น จำกัด', 'บริษัท ทรู มูฟ จำกัด (มหาชน)',
+                          'บริษัท ทรู อินเทอร์เน็ต คอร์ปอเรชั่น จำกัด', 'บริษัท พีทีที  ไอซีที โซลูชั่น จำกัด',
+                          'บริษัท ยูไนเต็ด อินฟอร์เมชั่น ไฮเวย์ จำกัด', 'บริษัท อินเตอร์ลิ้งค์ เทเลคอม จำกัด (มหาชน)',
+                          'บริษัท ฮัทชิสัน ซีเอที ไวร์เลส มัลติมีเดีย จำกัด',
+                          'สำนักงานบริหารเทคโนโลยีสารสนเทศเพื่อพัฒนาการศึกษา (สกอ.)']
+
+# ลำดับเดียวกับสคริปต์เดิม (กลุ่มหลังทับกลุ่มก่อน)
+CONCESSION_GROUPS = [
+    (DIGITAL, DIGITAL_LIST),
+    (NBTC, NBTC_LIST),
+    (NT, NT_LIST),
+    (NT_CONCESSION, NT_CONCESSION_LIST),
+    (NON_NT_CONCESSION, NON_NT_CONCESSION_LIST),
+]
+
+
+def concession_lookup():
+    """Return a dict Concession -> GroupConcession (later groups win)."""
+    lookup = {}
+    for group, names in CONCESSION_GROUPS:
+        for name in names:
+            lookup[name] = group
+    return lookup
+
+
+def group_concession(concession):
+    """Map a Concession column to GroupConcession in one pass.
+
+    The lookup is done once per distinct Concession value and broadcast back
+    through the factorized codes; unmapped values stay ``pd.NA``.
+    """
+    with metrics.stage('group_concession') as info:
+        codes, uniques = dtypes.codes(concession)
+        lookup = concession_lookup()
+        mapped = np.array([lookup.get(u, pd.NA) for u in uniques] + [pd.NA], dtype=object)
+        info['rows'] = len(concession)
+        return pd.Series(mapped[codes], index=concession.index, dtype=object)
@@ -0,0 +1,224 @@
+"""Overlap / shadowing analysis of the compiled RD03/RD05 rule tables.
+
+The tables resolve with "last matching rule wins", so the result depends on
+the order of the rules (2.2.3 is listed twice, 1.4 overwrites 1.3 for
+non-NT coaxial, 4.4.x overwrites 4.1.x for 12-core Fig.8) and on the
+``&``/``|`` grouping kept from the legacy query strings. :func:`analyze`
+evaluates every rule mask once over a frame and reports:
+
+* ``rules``: per rule the rows it matches, the rows it wins, the rows it
+  loses to later rules (``Lost``; the opposite direction of ``overwritten``
+  in the metrics JSON) and the later rules that overwrite it; ``Status`` is ``dead`` (matches nothing),
+  ``shadowed`` (every match is overwritten), ``overwritten`` (some are) or
+  ``ok``;
+* ``overlaps``: every pair of rules matching the same rows, with the
+  number of rows (the later rule wins);
+* ``unmatched``: the value combinations of the rows no rule matches.
+
+:func:`domain` builds the frame symbolically instead: one row per
+combination of the values that the rules can tell apart (every constant a
+rule tests, one value outside them and a blank per column; the bounds, the
+gaps between them and the values outside them for ``Diameter`` /
+``Total_Distance``). Over that frame the counts are value combinations, not
+routes, and ``dead`` / ``shadowed`` are proofs: such a rule can never win on
+any data, so :func:`live_rules` drops it from the plan that
+``engine.select_groups`` evaluates.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from . import engine
+from .concession import CONCESSION_GROUPS, concession_lookup
+
+DEAD, SHADOWED, OVERWRITTEN, OK = 'dead', 'shadowed', 'overwritten', 'ok'
+UNMATCHED_KEYS = ('GroupConcession', 'Concession', 'Line_Type', 'Cores')
+NUMERIC_COLUMNS = ('Cores', 'Diameter', 'Total_Distance')
+OTHER = '(ค่าอื่น)'
+# จำนวนแถวต่อรอบของการนับ overlap ด้วย matmul (float32 นับได้แม่นถึง 2^24)
+CHUNK_ROWS = 1 << 20
+
+
+class _Recorder(engine.Predicates):
+    """Predicates that also note every constant the rules test."""
+
+    def __init__(self, df):
+        super().__init__(df)
+        self.values = {}
+        self.bounds = {'Diameter': set(), 'Total_Distance': set()}
+
+    def isin(self, col, *values):
+        self.values.setdefault(col, set()).update(values)
+        return super().isin(col, *values)
+
+    def cores(self, *values):
+        self.values.setdefault('Cores', set()).update(values)
+        return super().cores(*values)
+
+    def diameter(self, lo, hi):
+        self.bounds['Diameter'].update((lo, hi))
+        return super().diameter(lo, hi)
+
+    def distance(self, op, value):
+        self.bounds['Total_Distance'].add(value)
+        return super().distance(op, value)
+
+
+def _empty_frame():
+    return pd.DataFrame({'GroupConcession': pd.Series(dtype=object), 'Concession': pd.Series(dtype=object),
+                         'Line_Type': pd.Series(dtype=object), 'Cores': pd.Series(dtype='float64'),
+                         'Diameter': pd.Series(dtype='float64'), 'Total_Distance': pd.Series(dtype='float64')})
+
+
+def constants(rules):
+    """``(values, bounds)``: the constants each column is tested against."""
+    p = _Recorder(_empty_frame())
+    for _, fn in rules:
+        fn(p)
+    return p.values, p.bounds
+
+
+def _points(bounds):
+    """One value per class a set of comparison constants splits the line into."""
+    b = sorted(bounds)
+    if not b:
+        return [0.0, np.nan]
+    gaps = [(lo + hi) / 2 for lo, hi in zip(b, b[1:])]
+    return sorted([b[0] - 1, *b, *gaps, b[-1] + 1]) + [np.nan]
+
+
+def _concessions(tested):
+    # Concession ที่ไม่มีกฎใดระบุชื่อ ต่างกันได้แค่ผ่าน GroupConcession จึงใช้ค่าเดียวแทนทั้งกลุ่ม
+    out = list(tested)
+    for _, names in CONCESSION_GROUPS:
+        rest = [name for name in names if name not in tested]
+        if rest:
+            out.append(rest[0])
+    return out + [OTHER, None]
+
+
+def domain(rules):
+    """One row per combination of values the rules can tell apart."""
+    values, bounds = constants(rules)
+    lookup = concession_lookup()
+    columns = {
+        'Concession': _concessions(sorted(values.get('Concession', ()))),
+        'Line_Type': sorted(values.get('Line_Type', ())) + [OTHER, None],
+        'Cores': sorted(values.get('Cores', ())) + [max(values.get('Cores', (0,))) + 1, np.nan],
+        'Diameter': _points(bounds['Diameter']),
+        'Total_Distance': _points(bounds['Total_Distance']),
+    }
+    for col in sorted(set(values) - set(columns) - {'GroupConcession'}):
+        columns[col] = sorted(values[col]) + [OTHER, None]
+    # ค่าทุกคอลัมน์เป็น code ของผลคูณคาร์ทีเซียน ส่งให้ Predicates เป็น category โดยไม่ต้อง factorize ซ้ำ
+    index = pd.MultiIndex.from_product([pd.Index(v, dtype=object) for v in columns.values()], names=list(columns))
+    df = pd.DataFrame(index=pd.RangeIndex(len(index)))
+    for col, level, code in zip(columns, index.levels, index.codes):
+        if col in NUMERIC_COLUMNS:
+            df[col] = np.append(level.to_numpy(dtype='float64'), np.nan)[code]
+        else:
+            df[col] = pd.Categorical.from_codes(code, level)
+    groups = np.array([lookup.get(c, pd.NA) for c in index.levels[0]] + [pd.NA], dtype=object)
+    df.insert(0, 'GroupConcession', pd.Series(groups[index.codes[0]], dtype=object).astype('category'))
+    return df
+
+
+def _overlaps(matrix):
+    """``k x k`` counts of rows matched by both rules, in row chunks."""
+    k, n = matrix.shape
+    counts = np.zeros((k, k), dtype=np.int64)
+    for start in range(0, n, CHUNK_ROWS):
+        part = matrix[:, start:start + CHUNK_ROWS].astype(np.float32)
+        counts += np.rint(part @ part.T).astype(np.int64)
+    return counts
+
+
+def _name(i, label):
+    return f"#{i} {label}"
+
+
+def analyze(df, rules, top=50):
+    """Overlap report of ``rules`` over ``df`` (see the module docstring).
+
+    ``df`` needs the columns the rules test (``GroupConcession`` included);
+    ``unmatched`` keeps the ``top`` most frequent combinations.
+    """
+    masks = engine.rule_masks(df, rules)
+    labels = [label for label, _ in masks]
+    k, n = len(masks), len(df)
+    matrix = np.vstack([mask for _, mask in masks]) if k else np.zeros((0, n), dtype=bool)
+    any_rule = matrix.any(axis=0)
+    # กฎที่ชนะคือกฎสุดท้ายที่ตรง เหมือน np.select แบบกลับด้านใน select_groups
+    winner = np.where(any_rule, k - 1 - np.argmax(matrix[::-1], axis=0), -1)
+    won = np.bincount(winner[winner >= 0], minlength=k)
+    both = _overlaps(matrix)
+    matched = np.diag(both)
+
+    rows, pairs = [], []
+    for i in range(k):
+        later = [j for j in range(i + 1, k) if both[i, j]]
+        if matched[i] == 0:
+            status = DEAD
+        elif won[i] == 0:
+            status = SHADOWED
+        elif won[i] < matched[i]:
+            status = OVERWRITTEN
+        else:
+            status = OK
+        rows.append((i, labels[i], int(matched[i]), int(won[i]), int(matched[i] - won[i]), status,
+                     ', '.join(_name(j, labels[j]) for j in later)))
+        pairs.extend((i, labels[i], j, labels[j], int(both[i, j]), labels[i] == labels[j]) for j in later)
+
+    rule_report = pd.DataFrame(rows, columns=['Rule', 'Group', 'Matched', 'Won', 'Lost', 'Status',
+                                              'Overwritten_By'])
+    overlaps = pd.DataFrame(pairs, columns=['Rule', 'Group', 'Later_Rule', 'Later_Group', 'Rows', 'Same_Group'])
+    keys = [c for c in UNMATCHED_KEYS if c in df.columns]
+    rest = df.loc[~any_rule, keys].astype(object) if top else df.iloc[:0][keys]
+    unmatched = (rest.groupby(keys, dropna=False, sort=False).size().rename('Rows').reset_index()
+                 .sort_values('Rows', ascending=False, kind='stable').head(top).reset_index(drop=True))
+    return {'rows': n, 'unmatched_rows': int((~any_rule).sum()), 'rules': rule_report,
+            'overlaps': overlaps, 'unmatched': unmatched}
+
+
+def analyze_domain(rules, top=50):
+    """:func:`analyze` over :func:`domain`: counts are value combinations."""
+    return analyze(domain(rules), rules, top)
+
+
+def live_rules(rules):
+    """Positions of the rules that can win on some data.
+
+    Rules that are dead or shadowed over :func:`domain` are left out; the
+    Group of every row stays the same.
+    """
+    report = analyze_domain(rules, top=0)
+    status = report['rules']['Status'].to_numpy()
+    return [i for i in range(len(rules)) if status[i] not in (DEAD, SHADOWED)]
+
+
+def print_report(report, title=''):
+    r = report['rules']
+    print(f"{title}{report['rows']:,} แถว, {len(r)} กฎ, ไม่ตรงกฎใดเลย {report['unmatched_rows']:,} แถว")
+    for status, text in ((DEAD, 'ไม่ตรงแถวใดเลย'), (SHADOWED, 'ถูกกฎหลังทับทั้งหมด'),
+                         (OVERWRITTEN, 'ถูกกฎหลังทับบางส่วน')):
+        for row in r[r['Status'] == status].itertuples():
+            by = f" โดย {row.Overwritten_By}" if row.Overwritten_By else ''
+            print(f"  {_name(row.Rule, row.Group)}: {text} ({row.Lost:,}/{row.Matched:,}){by}")
+    cross = report['overlaps'][~report['overlaps']['Same_Group']]
+    print(f"  กฎต่างกลุ่มที่ตรงแถวเดียวกัน {len(cross):,} คู่")
+
+
+def write_report(report, path):
+    """Write the three tables to ``path``: one sheet each (.xlsx) or one JSON object."""
+    tables = {name: report[name] for name in ('rules', 'overlaps', 'unmatched')}
+    if path.lower().endswith('.json'):
+        data = {'rows': report['rows'], 'unmatched_rows': report['unmatched_rows']}
+        data.update({name: json.loads(df.to_json(orient='records', force_ascii=False))
+                     for name, df in tables.items()})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return
+    with pd.ExcelWriter(path) as xl:
+        for name, df in tables.items():
+            df.to_excel(xl, sheet_name=name, index=False)
@@ -0,0 +1,159 @@
+"""Pre-aggregated summary cubes of classified RD frames.
+
+Dashboards and the app1 summary view only need totals per PEA and Group,
+not the rows. A :class:`Cube` is fed the classified frame (or each chunk of a
+stream) in the same pass as the writer and keeps, per combination of
+``PEA`` x ``GroupConcession`` x ``Group``:
+
+* ``Routes``: the number of rows;
+* ``Total_Distance``, ``Distance_in_Area``, ``Poles_in_Area``: their sums
+  (missing values count as 0).
+
+:func:`write_cube` stores it as a small Parquet file (``<stem>_cube.parquet``
+next to the output, key columns dictionary-encoded) and :func:`rollup`
+answers any breakdown of one or more cubes, e.g. Group totals of one PEA::
+
+    rollup(read_cube('RD03_cube.parquet'), by=['Group'], where={'PEA': 'กฟจ.01'})
+"""
+import json
+import os
+
+import pandas as pd
+
+KEYS = ('PEA', 'GroupConcession', 'Group')
+MEASURES = ('Total_Distance', 'Distance_in_Area', 'Poles_in_Area')
+COUNT = 'Routes'
+SOURCE = 'Source'
+CUBE_SUFFIX = '_cube.parquet'
+CUBE_VERSION = 1
+# รวมผลย่อยของแต่ละ chunk ทุกๆ กี่ chunk เพื่อไม่ให้รายการผลย่อยยาวเกินไป
+MAX_PARTS = 32
+_META = b'rdproc.cube'
+
+
+def _finish(df, keys):
+    df[COUNT] = df[COUNT].astype('int64')
+    df['Poles_in_Area'] = df['Poles_in_Area'].astype('int64')
+    for col in ('Total_Distance', 'Distance_in_Area'):
+        # ผลรวมแบบทีละ chunk กับทั้งไฟล์ต่างกันที่หลักท้ายๆ ของทศนิยม
+        df[col] = df[col].astype('float64').round(6)
+    out = df[[*keys, COUNT, *MEASURES]]
+    out.attrs = {}
+    return out
+
+
+def aggregate(df, keys=KEYS):
+    """``Routes`` and the measure sums of ``df`` per combination of ``keys``."""
+    grouped = df.groupby(list(keys), observed=True, dropna=False, sort=False)
+    out = grouped[list(MEASURES)].sum()
+    out[COUNT] = grouped.size()
+    out = out.reset_index()
+    for k in keys:
+        out[k] = out[k].astype('str')
+    return _finish(out, keys)
+
+
+def combine(parts, keys=KEYS):
+    """Merge partial aggregates (same ``keys``) into one sorted cube."""
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return _finish(pd.DataFrame({c: pd.Series(dtype='str') for c in keys}
+                                    | {c: pd.Series(dtype='int64') for c in (COUNT, *MEASURES)}), keys)
+    df = pd.concat(parts, ignore_index=True)
+    out = df.groupby(list(keys), dropna=False, sort=True)[[COUNT, *MEASURES]].sum().reset_index()
+    return _finish(out, keys)
+
+
+class Cube:
+    """Accumulates the aggregates of one frame or a stream of chunks."""
+
+    def __init__(self, keys=KEYS):
+        self.keys = keys
+        self.parts = []
+        self.rows = 0
+
+    def update(self, df):
+        self.rows += len(df)
+        self.parts.append(aggregate(df, self.keys))
+        if len(self.parts) >= MAX_PARTS:
+            self.parts = [combine(self.parts, self.keys)]
+        return self
+
+    def frame(self):
+        return combine(self.parts, self.keys)
+
+
+def write_cube(data, path, **meta):
+    """Write a :class:`Cube` (or cube frame) as Parquet; returns the frame.
+
+    ``meta`` (e.g. ``mode``, ``source``) is stored in the file's schema
+    metadata and comes back in ``read_cube(...).attrs['cube']``.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = data.frame() if isinstance(data, Cube) else data
+    keys = [k for k in df.columns if k not in (COUNT, *MEASURES)]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for k in keys:
+        i = table.schema.get_field_index(k)
+        table = table.set_column(i, k, table.column(k).cast(pa.string()).dictionary_encode())
+    info = dict(meta, version=CUBE_VERSION, keys=keys, rows=int(df[COUNT].sum()))
+    schema_meta = dict(table.schema.metadata or {})
+    schema_meta[_META] = json.dumps(info, ensure_ascii=False).encode()
+    table = table.replace_schema_metadata(schema_meta)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    pq.write_table(table, path, compression='zstd')
+    return df
+
+
+def read_cube(path):
+    """Read a cube written by :func:`write_cube`."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    meta = table.schema.metadata or {}
+    if _META not in meta:
+        raise ValueError(f"ไม่ใช่ไฟล์ cube ของ rdproc: {path}")
+    info = json.loads(meta[_META])
+    df = table.to_pandas()
+    for k in info['keys']:
+        df[k] = df[k].astype('str')
+    df.attrs['cube'] = info
+    return df
+
+
+def read_cubes(paths):
+    """Concatenate several cubes, with the file name in a ``Source`` column."""
+    frames = []
+    for path in paths:
+        df = read_cube(path)
+        df.insert(0, SOURCE, df.attrs['cube'].get('source') or os.path.basename(path))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _matches(values, wanted):
+    if isinstance(wanted, (list, tuple, set)):
+        return values.isin([str(w) for w in wanted])
+    return values == str(wanted)
+
+
+def rollup(cube, by=('PEA',), where=None):
+    """Totals of ``cube`` per ``by`` columns, after filtering with ``where``.
+
+    ``where`` maps a key column to a value or a list of values; ``by=()``
+    gives the grand total. Missing keys are kept as their own row.
+    """
+    df = cube
+    for col, wanted in (where or {}).items():
+        df = df[_matches(df[col], wanted)]
+    if not by:
+        return _finish(df[[COUNT, *MEASURES]].sum().to_frame().T, [])
+    out = df.groupby(list(by), dropna=False, sort=True)[[COUNT, *MEASURES]].sum().reset_index()
+    return _finish(out, list(by))
+
+
+def to_records(df):
+    """JSON-ready rows (missing keys as ``None``)."""
+    return json.loads(df.to_json(orient='records', force_ascii=False))
@@ -0,0 +1,123 @@
+"""Compact dtypes for normalized RD frames.
+
+``pd.read_excel`` leaves the text columns as Python strings and turns a
+numeric column into ``object`` as soon as one cell holds text. ``normalize``
+converts the low-cardinality text columns to ``category`` (one small integer
+code per row) and coerces the numeric columns:
+
+* ``Cores``, ``Total_Poles``, ``Poles_in_Area``: nullable integers;
+* ``Diameter``, ``Total_Distance``, ``Distance_in_Area``: float64, kept at
+  full precision because the rules compare them against range bounds.
+
+Cells that cannot be coerced (``'12F'``, ``'-'``, fractional core counts)
+become missing and are reported per column, both printed and stored in
+``df.attrs['coercion_failures']`` (which also survives the Arrow cache).
+"""
+import numpy as np
+import pandas as pd
+
+from . import metrics
+
+OUTPUT_COLUMNS = ('GroupConcession', 'Group')
+CATEGORY_COLUMNS = ('PEA', 'Owner', 'Concession', 'Line_Type') + OUTPUT_COLUMNS
+INTEGER_COLUMNS = {'Cores': 'Int16', 'Total_Poles': 'Int32', 'Poles_in_Area': 'Int32'}
+FLOAT_COLUMNS = ('Diameter', 'Total_Distance', 'Distance_in_Area')
+FAILURES_ATTR = 'coercion_failures'
+MAX_EXAMPLES = 5
+
+
+def codes(values):
+    """Return ``(codes, uniques)``; categorical columns reuse their own codes."""
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values)
+
+
+def categorize(df, columns=CATEGORY_COLUMNS):
+    """Convert the given (present) columns to ``category`` in place."""
+    for col in columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _needs_text(s, mixed_only):
+    values = s.cat.categories if isinstance(s.dtype, pd.CategoricalDtype) else s
+    if values.dtype != object:
+        return False
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    return kind.startswith('mixed') if mixed_only else kind not in ('string', 'empty')
+
+
+def stringify(df, skip=(), mixed_only=False):
+    """Return ``df`` with its non-text object columns as ``str`` values.
+
+    Missing cells stay missing. With ``mixed_only`` only columns mixing
+    numbers and text (e.g. ``Route_Name`` in a dirty export) are converted;
+    ``skip`` columns are left as they are. ``df`` itself is not modified.
+    """
+    columns = [c for c in df.columns if c not in skip and _needs_text(df[c], mixed_only)]
+    if not columns:
+        return df
+    out = df.copy(deep=False)
+    for col in columns:
+        text = out[col].astype(object).map(str, na_action='ignore')
+        out[col] = text.astype('category') if isinstance(out[col].dtype, pd.CategoricalDtype) else text
+    return out
+
+
+def coerce_numeric(s, dtype='float64'):
+    """Coerce ``s`` to ``dtype``; returns ``(series, failed_mask)``."""
+    num = pd.to_numeric(s, errors='coerce')
+    if not isinstance(num.dtype, np.dtype) or num.dtype.kind not in 'iuf':
+        num = num.astype('float64')
+    failed = s.notna().to_numpy() & num.isna().to_numpy()
+    if dtype != 'float64':
+        info = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+        values = num.to_numpy(dtype='float64', na_value=np.nan, copy=True)
+        bad = ~np.isnan(values) & ((values != np.floor(values)) | (values < info.min) | (values > info.max))
+        if bad.any():
+            failed |= bad
+            values[bad] = np.nan
+        num = pd.Series(values, index=s.index)
+    return num.astype(dtype), failed
+
+
+def normalize(df, verbose=True):
+    """Apply the compact dtypes to ``df`` in place and record coercion failures."""
+    with metrics.stage('normalize') as info:
+        failures = {}
+        for col, dtype in [*INTEGER_COLUMNS.items(), *((c, 'float64') for c in FLOAT_COLUMNS)]:
+            if col not in df.columns:
+                continue
+            coerced, failed = coerce_numeric(df[col], dtype)
+            if failed.any():
+                bad = df[col][failed]
+                failures[col] = {
+                    'count': int(failed.sum()),
+                    'examples': [str(v) for v in pd.unique(bad.to_numpy(dtype=object))[:MAX_EXAMPLES]],
+                }
+            df[col] = coerced
+        categorize(df)
+        df.attrs[FAILURES_ATTR] = failures
+        info['rows'] = len(df)
+    if verbose:
+        report_failures(failures)
+    return df
+
+
+def merge_failures(reports):
+    """Combine the per-chunk failure dicts of a streamed read."""
+    merged = {}
+    for failures in reports:
+        for col, info in failures.items():
+            entry = merged.setdefault(col, {'count': 0, 'examples': []})
+            entry['count'] += info['count']
+            entry['examples'] = list(dict.fromkeys(entry['examples'] + info['examples']))[:MAX_EXAMPLES]
+    return merged
+
+
+def report_failures(failures):
+    for col, info in failures.items():
+        print(f"⚠️ แปลงค่า {col} เป็นตัวเลขไม่ได้ {info['count']:,} แถว "
+              f"(เช่น {', '.join(info['examples'])}) ถือเป็นค่าว่าง")
@@ -0,0 +1,138 @@
+"""Shared mask machinery for the compiled RD03/RD05 rule tables.
+
+A rule table is a list of ``(Group, fn)`` where ``fn(p)`` builds a boolean
+mask from a :class:`Predicates` instance. Tables are listed in the order of
+the original scripts and resolved with one ``np.select`` pass run in reverse,
+so the last matching rule wins. Rules that can never win (see
+:mod:`rdproc.conflicts`) are left out of the pass, except while metrics are
+collected: the per-rule counts need every rule of the table.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .dtypes import codes
+
+_LIVE_CACHE = {}
+
+
+class Predicates:
+    """Lazily computed, cached boolean masks over one RD03 frame.
+
+    Text columns are factorized once (categorical columns reuse their
+    codes); membership is tested against the (small) set of distinct values
+    and broadcast back through the codes. Negating a mask with ``~`` gives
+    the same NaN behaviour as the legacy ``!=`` / ``~(...)`` query terms.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._codes = {}
+        self._cache = {}
+
+    def _factorized(self, col):
+        if col not in self._codes:
+            self._codes[col] = codes(self.df[col])
+        return self._codes[col]
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def isin(self, col, *values):
+        def compute():
+            codes, uniques = self._factorized(col)
+            hit = np.append(np.asarray(pd.Index(uniques).isin(values)), False)
+            return hit[codes]
+        return self._cached(('isin', col, values), compute)
+
+    def gc(self, *values):
+        return self.isin('GroupConcession', *values)
+
+    def concession(self, *values):
+        return self.isin('Concession', *values)
+
+    def line_type(self, *values):
+        return self.isin('Line_Type', *values)
+
+    def cores(self, *values):
+        return self._cached(('cores', values),
+                            lambda: self.df['Cores'].isin(values).to_numpy(dtype=bool))
+
+    def diameter(self, lo, hi):
+        def compute():
+            d = self.df['Diameter']
+            return ((d >= lo) & (d <= hi)).to_numpy(dtype=bool)
+        return self._cached(('diameter', lo, hi), compute)
+
+    def distance(self, op, value):
+        def compute():
+            s = self.df['Total_Distance']
+            return getattr(s, op)(value).to_numpy(dtype=bool)
+        return self._cached(('distance', op, value), compute)
+
+
+def rule_masks(df, rules, timings=None):
+    """Evaluate every rule once; returns a list of (Group, mask).
+
+    With ``timings`` (a list) the seconds spent on each mask are appended;
+    shared predicates are cached, so the first rule using one pays for it.
+    """
+    p = Predicates(df)
+    if timings is None:
+        return [(label, fn(p)) for label, fn in rules]
+    masks = []
+    for label, fn in rules:
+        start = time.perf_counter()
+        masks.append((label, fn(p)))
+        timings.append(time.perf_counter() - start)
+    return masks
+
+
+def live_rules(rules):
+    """Positions of the rules of a table that can win, computed once per table."""
+    key = tuple(rules)
+    if key not in _LIVE_CACHE:
+        from .conflicts import live_rules as analyze
+
+        try:
+            _LIVE_CACHE[key] = analyze(rules)
+        except KeyError:
+            # กฎที่อ่านคอลัมน์อื่นนอกจาก Predicates วิเคราะห์ไม่ได้ จึงประเมินทุกข้อ
+            _LIVE_CACHE[key] = list(range(len(rules)))
+    return _LIVE_CACHE[key]
+
+
+def _record_rules(m, table, masks, index, timings, positions):
+    """Matched / overwritten / won counts per rule, in cascade order."""
+    won = np.bincount(index[index >= 0], minlength=len(masks))
+    seen = np.zeros(len(index), dtype=bool)
+    for i, (label, mask) in enumerate(masks):
+        m.add_rule(table, positions[i], label, mask.sum(), (mask & seen).sum(), won[i], timings[i])
+        seen |= mask
+
+
+def select_groups(df, rules, default=pd.NA, table='rules', prune=True):
+    """Resolve ``rules`` over ``df`` in one pass; last matching rule wins.
+
+    With ``prune`` the rules that can never win are not evaluated; the
+    result is the same. Under an active metrics collector every rule is
+    evaluated so the per-rule ``matched`` / ``overwritten`` counts stay exact.
+    """
+    m = metrics.active()
+    timings = [] if m is not None else None
+    # กฎที่ถูกตัดออกไม่มี mask จึงนับ overwritten ของกฎถัดไปไม่ได้ ตอนเก็บ metrics ต้องประเมินครบทุกข้อ
+    positions = live_rules(rules) if prune and m is None else range(len(rules))
+    with metrics.stage('rules') as info:
+        masks = rule_masks(df, [rules[i] for i in positions], timings)
+        labels = np.array([label for label, _ in masks] + [default], dtype=object)
+        # np.select เลือกเงื่อนไขแรกที่เป็นจริง จึงส่งกฎกลับด้านเพื่อให้กฎหลังสุดชนะ
+        index = np.select([mask for _, mask in reversed(masks)],
+                          np.arange(len(masks) - 1, -1, -1), default=-1)
+        info['rows'] = len(df)
+    if m is not None:
+        _record_rules(m, table, masks, index, timings, positions)
+    return pd.Series(labels[index], index=df.index, dtype=object)
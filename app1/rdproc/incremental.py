@@ -0,0 +1,176 @@
+"""Incremental re-classification against the previous run of the same export.
+
+Monthly RD exports of one PEA are mostly identical to the previous month.
+:func:`classify_incremental` keeps a small state file from the last run
+(64-bit hashes of each row's ``Tag`` and content, ``GroupConcession`` and
+``Group``) and on the next run:
+
+* hashes every row of the new frame (all layout columns except
+  ``Date_Edit``, which changes on every edit);
+* reuses the stored labels of rows whose content hash was seen before;
+* runs the Group rules only on the new or modified rows;
+* reports new / modified / unchanged / removed rows by ``Tag``.
+
+A row's labels depend only on its own values and on the rule set, so the
+state is only reused while the rule set is the same: its key is the hash of
+the UI rules and the source of their evaluator, or the source of the
+built-in rule tables and of the modules resolving them (``engine`` and the
+``conflicts`` analysis that prunes them). Any other change (layout, rules,
+engine) falls back to a full run that rewrites the state.
+
+Frames should come from ``read_rd`` / the cache (compact dtypes), so equal
+rows always hash equally.
+"""
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import concession, conflicts, engine, metrics, rd03, rd05
+from . import rules as ui_rules
+from .api import classify
+from .cache import layout_hash
+from .dtypes import OUTPUT_COLUMNS
+from .rules import rules_hash
+
+STATE_VERSION = 1
+TAG_COLUMN = 'Tag_Hash'
+HASH_COLUMN = 'Row_Hash'
+IGNORED_COLUMNS = ('Tag', 'Date_Edit') + OUTPUT_COLUMNS
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BUILTIN_MODULES = {'RD03': (concession, engine, conflicts, rd03), 'RD05': (concession, engine, conflicts, rd05)}
+_UI_MODULES = (ui_rules,)
+
+
+def row_hashes(df):
+    """Return uint64 ``(tag_hashes, content_hashes)`` per row.
+
+    The content hash covers every column but ``Date_Edit`` and the labels;
+    ``Tag`` is hashed once and mixed in.
+    """
+    tags = pd.util.hash_pandas_object(df['Tag'], index=False).to_numpy()
+    cols = [c for c in df.columns if c not in IGNORED_COLUMNS]
+    rest = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    return tags, (rest * _MIX) ^ tags
+
+
+def state_key(mode, rules=None):
+    """Identify the rule set a state file was produced with."""
+    h = hashlib.sha256(f"{STATE_VERSION}:{mode}:{layout_hash(mode)}".encode())
+    if rules is not None:
+        h.update(rules_hash(rules).encode())
+    for module in _UI_MODULES if rules is not None else _BUILTIN_MODULES[mode]:
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load_state(path, key):
+    """Return the previous state frame, or ``None`` when missing or stale."""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    try:
+        with pa.memory_map(path, 'r') as src:
+            table = pa.ipc.open_file(src).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+    meta = table.schema.metadata or {}
+    if meta.get(b'rdproc.state', b'').decode() != key:
+        print('กฎหรือโครงสร้างไฟล์เปลี่ยนไปจากครั้งก่อน จะประมวลผลใหม่ทั้งหมด')
+        return None
+    return table.to_pandas()
+
+
+def save_state(path, key, df, tags, hashes):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print('ไม่พบ pyarrow จึงไม่สามารถบันทึกสถานะสำหรับการประมวลผลครั้งถัดไปได้')
+        return False
+    state = pd.DataFrame({
+        TAG_COLUMN: tags,
+        HASH_COLUMN: hashes,
+        'GroupConcession': df['GroupConcession'],
+        'Group': df['Group'],
+    })
+    table = pa.Table.from_pandas(state, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[b'rdproc.state'] = key.encode()
+    table = table.replace_schema_metadata(meta)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return True
+
+
+def _isin(values, other):
+    return pd.Index(values).isin(other)
+
+
+def _diff(tags, hashes, previous):
+    """Count rows by change type; ``Tag`` identifies a route across runs."""
+    if previous is None:
+        return {'new': len(tags), 'modified': 0, 'unchanged': 0, 'removed': 0}
+    prev_tags = previous[TAG_COLUMN].to_numpy()
+    seen = _isin(hashes, previous[HASH_COLUMN].to_numpy())
+    known = _isin(tags, prev_tags)
+    return {
+        'new': int((~seen & ~known).sum()),
+        'modified': int((~seen & known).sum()),
+        'unchanged': int(seen.sum()),
+        'removed': int((~_isin(prev_tags, tags)).sum()),
+    }
+
+
+def classify_incremental(df, mode, state_path, rules=None):
+    """Classify ``df`` reusing the labels stored at ``state_path``.
+
+    Returns ``(classified, report)``; the state file is rewritten with the
+    new result. ``report`` has the diff counts, the number of rows that went
+    through the rules and the time taken.
+    """
+    start = time.perf_counter()
+    key = state_key(mode, rules)
+    with metrics.stage('hash') as info:
+        tags, hashes = row_hashes(df)
+        info['rows'] = len(df)
+    previous = load_state(state_path, key)
+    if previous is not None and previous.empty:
+        previous = None
+    report = _diff(tags, hashes, previous)
+
+    out = df.copy(deep=False)
+    if previous is None:
+        out = classify(out, mode, rules)
+        report['classified'] = len(out)
+    else:
+        # แถวที่เนื้อหาเหมือนกันจะได้กลุ่มเดียวกันเสมอ จึงเก็บไว้ค่าเดียวต่อ hash
+        known = previous.drop_duplicates(HASH_COLUMN).set_index(HASH_COLUMN)
+        pos = known.index.get_indexer(hashes)
+        todo = pos < 0
+        fresh = classify(df[todo], mode, rules) if todo.any() else None
+        for col in OUTPUT_COLUMNS:
+            # รวมผลด้วยรหัส category เพื่อไม่ต้องแปลงเป็นข้อความทีละแถว
+            old = pd.Categorical(known[col])
+            new = pd.Categorical(fresh[col]) if fresh is not None else old[:0]
+            categories = old.categories.union(new.categories)
+            codes = old.set_categories(categories).codes[pos]
+            codes[todo] = new.set_categories(categories).codes
+            out[col] = pd.Categorical.from_codes(codes, categories)
+        report['classified'] = int(todo.sum())
+
+    save_state(state_path, key, out, tags, hashes)
+    report['rows'] = len(out)
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    print(f"แถวใหม่ {report['new']:,} แก้ไข {report['modified']:,} เหมือนเดิม {report['unchanged']:,} "
+          f"ถูกลบ {report['removed']:,} (จัดกลุ่มใหม่ {report['classified']:,} แถว, {report['seconds']:.2f} วินาที)")
+    return out, report
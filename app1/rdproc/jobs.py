@@ -0,0 +1,321 @@
+"""Asyncio job queue for long RD runs, with per-stage / per-chunk progress.
+
+:meth:`JobQueue.submit` returns a :class:`Job` right away. An asyncio loop
+running in its own thread starts at most ``concurrency`` jobs at a time; each
+job runs :func:`run_job` in the worker pool, which streams the workbook in
+chunks and pushes progress events (``read`` with the mode and estimated row
+count, one ``classify`` per chunk with rows done / total, ``write``) through a
+multiprocessing queue given to the pool initializer. The loop appends them to
+the job and wakes the threads waiting on it (server-sent event streams, long polls).
+
+A failed job keeps a structured error instead of a printed message::
+
+    {"type": "KeyError", "message": "...", "stage": "classify", "traceback": "..."}
+"""
+import asyncio
+import itertools
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+
+from .api import classify
+from .audit import Summary
+from .batch import detect_mode, output_path, side_path
+from .cube import CUBE_SUFFIX, Cube, write_cube
+from .dtypes import FAILURES_ATTR, merge_failures
+from .reader import DEFAULT_CHUNKSIZE, count_rows, iter_rd_chunks
+from .store import RunStore
+from .writer import write_output
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+DEFAULT_CONCURRENCY = 2
+WARMUP_ROWS = 2000
+
+_progress = None
+
+
+# --- worker side -----------------------------------------------------------------
+
+def warm():
+    """Pay the import and first-call costs of a worker up front."""
+    from . import synth
+    from .dtypes import normalize
+
+    for mode in ('RD03', 'RD05'):
+        classify(normalize(synth.frame(WARMUP_ROWS, mode), verbose=False), mode)
+
+
+def init_worker(progress=None):
+    """Pool initializer: keep the progress queue and warm up."""
+    global _progress
+    _progress = progress
+    warm()
+
+
+def emit(job_id, stage, **info):
+    if _progress is not None:
+        _progress.put(dict(info, job=job_id, stage=stage, time=round(time.time(), 3)))
+
+
+def error_info(e, stage):
+    return {'type': type(e).__name__, 'message': str(e), 'stage': stage,
+            'traceback': traceback.format_exc()}
+
+
+def run_job(job_id, path, out_dir, fmt='xlsx', mode=None, rules=None, chunksize=DEFAULT_CHUNKSIZE,
+            remove_input=False, store=None, source=None):
+    """Classify one workbook chunk by chunk, reporting progress; never raises.
+
+    ``remove_input`` deletes ``path`` afterwards (uploaded copies). With
+    ``store`` the rows are also inserted into that run store under
+    ``source`` (default: the file name). Returns ``{'mode', 'output', 'cube',
+    'run_id', 'rows', 'summary', 'coercion_failures', 'error'}`` with
+    ``error`` set (see :func:`error_info`) on failure. The aggregate cube
+    (:mod:`rdproc.cube`) is written next to the output.
+    """
+    state = {'stage': 'detect'}
+    run = None
+    try:
+        mode = mode or detect_mode(path)
+        state['stage'] = 'read'
+        total = count_rows(path)
+        emit(job_id, 'read', mode=mode, rows=0, total=total)
+        summary = Summary()
+        cube = Cube()
+        failures = []
+        if store:
+            run = RunStore(store).begin(mode, source or os.path.basename(path), rules)
+
+        def classified():
+            chunks = iter_rd_chunks(path, mode, chunksize)
+            for i in itertools.count():
+                state['stage'] = 'read'
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                state['stage'] = 'classify'
+                chunk = classify(chunk, mode, rules)
+                summary.update(chunk)
+                cube.update(chunk)
+                if run is not None:
+                    run.add(chunk)
+                failures.append(chunk.attrs.get(FAILURES_ATTR, {}))
+                emit(job_id, 'classify', chunk=i, rows=summary.rows, total=total)
+                state['stage'] = 'write'
+                yield chunk
+
+        target = output_path(path, out_dir, fmt)
+        written = write_output(classified(), target, fmt)
+        cube_path = side_path(path, out_dir, CUBE_SUFFIX)
+        write_cube(cube, cube_path, mode=mode, source=os.path.basename(path))
+        run_id = run.finish() if run is not None else None
+        emit(job_id, 'write', rows=written['rows'], total=total, bytes=written['bytes'])
+        return {'mode': mode, 'output': target, 'cube': cube_path, 'run_id': run_id,
+                'rows': written['rows'], 'summary': summary.data(),
+                'coercion_failures': merge_failures(failures), 'error': None}
+    except Exception as e:
+        if run is not None:
+            run.abort()
+        return {'mode': mode, 'output': None, 'cube': None, 'run_id': None, 'rows': 0, 'summary': None,
+                'coercion_failures': {}, 'error': error_info(e, state['stage'])}
+    finally:
+        if run is not None:
+            run.store.close()
+        if remove_input and os.path.exists(path):
+            os.remove(path)
+
+
+# --- queue side ------------------------------------------------------------------
+
+class Job:
+    """State and progress events of one submitted workbook."""
+
+    def __init__(self, name, args, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.name = name
+        self.args = args
+        self.status = QUEUED
+        self.mode = args[3]
+        self.stage = None
+        self.rows = 0
+        self.total = None
+        self.created = time.time()
+        self.started = self.finished = None
+        self.events = []
+        self.result = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def add_event(self, event):
+        event['seq'] = len(self.events)
+        self.events.append(event)
+        self.stage = event.get('stage', self.stage)
+        self.mode = event.get('mode', self.mode)
+        self.rows = event.get('rows', self.rows)
+        self.total = event.get('total', self.total)
+
+    def set_status(self, status, **info):
+        self.status = status
+        self.add_event(dict(info, stage=status, status=status, time=round(time.time(), 3)))
+
+    def to_dict(self, events=False):
+        out = {
+            'id': self.id, 'name': self.name, 'status': self.status, 'mode': self.mode,
+            'stage': self.stage, 'rows': self.rows, 'total': self.total,
+            'progress': round(min(self.rows / self.total, 1.0), 3) if self.total else None,
+            'created': self.created, 'started': self.started, 'finished': self.finished,
+            'error': self.error,
+        }
+        if self.result is not None:
+            out.update(summary=self.result['summary'], coercion_failures=self.result['coercion_failures'],
+                       fileName=os.path.basename(self.result['output']), runId=self.result['run_id'])
+        if events:
+            out['events'] = list(self.events)
+        return out
+
+
+class JobQueue:
+    """Runs submitted jobs in ``executor``, at most ``concurrency`` at a time.
+
+    ``progress`` is the multiprocessing queue the pool workers were
+    initialized with (:func:`init_worker`).
+    """
+
+    def __init__(self, executor, progress=None, concurrency=DEFAULT_CONCURRENCY):
+        self.executor = executor
+        self.progress = progress
+        self.concurrency = concurrency
+        self.jobs = {}
+        self.changed = threading.Condition()
+        self.loop = None
+        # เรียกพร้อม executor ที่เสีย เมื่อ worker process หยุดทำงานกะทันหัน
+        self.on_broken = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name='rd-jobs', daemon=True).start()
+        self._call(self._init)
+        if self.progress is not None:
+            threading.Thread(target=self._pump, name='rd-progress', daemon=True).start()
+        return self
+
+    async def _init(self):
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    def close(self):
+        if self.progress is not None:
+            self.progress.put(None)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _call(self, fn, *args):
+        """Run coroutine ``fn`` on the loop from another thread and wait for it."""
+        return asyncio.run_coroutine_threadsafe(fn(*args), self.loop).result()
+
+    def _notify(self):
+        with self.changed:
+            self.changed.notify_all()
+
+    def _pump(self):
+        # อ่าน progress จาก worker process แล้วส่งต่อเข้า event loop
+        while True:
+            event = self.progress.get()
+            if event is None:
+                return
+            self.loop.call_soon_threadsafe(self._on_event, event)
+
+    def _on_event(self, event):
+        job = self.jobs.get(event.pop('job', None))
+        if job is not None and job.status == RUNNING:
+            job.add_event(event)
+            self._notify()
+
+    async def _run(self, job):
+        async with self._slots:
+            if job.done:
+                return
+            job.started = time.time()
+            job.set_status(RUNNING)
+            self._notify()
+            executor = self.executor
+            try:
+                result = await self.loop.run_in_executor(executor, run_job, job.id, *job.args)
+            except Exception as e:
+                result = {'error': error_info(e, job.stage)}
+                if isinstance(e, BrokenProcessPool) and self.on_broken is not None:
+                    await self.loop.run_in_executor(None, self.on_broken, executor)
+            job.finished = time.time()
+            if result['error'] is None:
+                job.result = result
+                job.mode = result['mode']
+                job.set_status(DONE, rows=result['rows'], total=result['rows'])
+            else:
+                job.error = result['error']
+                job.set_status(FAILED, error=job.error['message'])
+            self._notify()
+
+    def set_executor(self, executor):
+        """Use a new pool (after the old one broke) for jobs started from now on."""
+        self.executor = executor
+
+    def submit(self, name, path, out_dir, fmt='xlsx', mode=None, rules=None, chunksize=DEFAULT_CHUNKSIZE,
+               remove_input=False, store=None, job_id=None):
+        """Queue a workbook; returns the :class:`Job` immediately.
+
+        The arguments are those of :func:`run_job`; ``name`` is for display
+        (and the run store source).
+        """
+        job = Job(name, (path, out_dir, fmt, mode, rules, chunksize, remove_input, store, name), job_id)
+
+        async def add():
+            self.jobs[job.id] = job
+            job.set_status(QUEUED)
+            self.loop.create_task(self._run(job))
+
+        self._call(add)
+        self._notify()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return sorted(self.jobs.values(), key=lambda j: j.created)
+
+    def cancel(self, job_id):
+        """Cancel a queued job; running jobs cannot be interrupted."""
+        async def cancel():
+            job = self.jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            job.finished = time.time()
+            job.set_status(CANCELLED)
+            return True
+
+        cancelled = self._call(cancel)
+        self._notify()
+        return cancelled
+
+    def wait(self, job, seen, timeout=None):
+        """Block until ``job`` has more than ``seen`` events or has finished."""
+        with self.changed:
+            return self.changed.wait_for(lambda: len(job.events) > seen or job.done, timeout)
+
+    def prune(self, max_age):
+        """Forget finished jobs older than ``max_age`` seconds; returns their ids."""
+        cutoff = time.time() - max_age
+
+        async def prune():
+            old = [j.id for j in self.jobs.values() if j.done and j.finished < cutoff]
+            for job_id in old:
+                del self.jobs[job_id]
+            return old
+
+        return self._call(prune)
@@ -0,0 +1,139 @@
+"""Reference implementation of the original query cascade.
+
+RD03.py used to classify with one ``df.query`` / ``assign`` / ``df.update``
+step per group; RD05.py with one ``df.loc[...] = ...`` per group. The steps
+are kept here verbatim (same query strings, same order, last step wins) so the
+benchmark can check that the compiled engine gives identical labels. They are
+slow on large frames and are not used by the pipeline.
+
+Both functions expect an un-normalized frame (``compact=False``, object /
+float columns) with a unique index, as ``pd.read_excel`` returns it.
+"""
+import pandas as pd
+
+from .concession import CONCESSION_GROUPS
+
+# (คอลัมน์, ค่าที่กำหนด, เงื่อนไข) ตามลำดับในสคริปต์เดิม
+RD03_STEPS = [
+    ('GroupConcession', 'กระทรวจดิจิทัล',
+     "Concession == ['กระทรวงดิจิทัลเพื่อเศรษฐกิจและสังคม', 'กระทรวงดิจิทัลเศรษฐกิจและสังคมตรวจสอบเส้นทางแล้ว']"),
+    ('GroupConcession', 'กสทช',
+     "Concession == ['NBTC/CAT', 'NBTC/TOT']"),
+    ('GroupConcession', 'NT',
+     "Concession == ['-', 'บริษัท กสท โทรคมนาคม จำกัด(มหาชน)', 'บริษัท ทีโอที จำกัด(มหาชน)', 'ย้ายข้อมูลจากTAMS1', 'Cleansing ข้อมูลสายสื่อสาร', 'บริษัท โทรคมนาคมแห่งชาติ จำกัด (มหาชน)']"),
+    ('GroupConcession', 'สัมปทาน NT',
+     "Concession == ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน', 'TOT/AIS #สัมปทาน', 'TOT-TT&T #สัมปทาน', 'บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'บริษัท บีเอฟเคที จำกัด']"),
+    ('GroupConcession', 'ไม่ใช่สัมปทาน NT',
+     "Concession == ['Big Patrol', 'CAT-SINET #สัมปทาน', 'CAT-TRUE #สัมปทาน', 'เคเบิ้ลทีวี (รวม)', 'บริษัท เอแอลที เทเลคอม จำกัด (มหาชน)', 'บริษัท แอดวานซ์ ไวร์เลส เน็ทเวอร์ค จำกัด', 'บริษัท ไซแมท เทคโนโลยี จำกัด (มหาชน)', 'บริษัท ดีแทค ไตรเน็ต จำกัด', 'บริษัท ทริปเปิลที บรอดแบนด์ จำกัด (มหาชน)', 'บริษัท ทริปเปิลที อินเทอร์เน็ต จำกัด', 'บริษัท ทรู มูฟ เอช ยูนิเวอร์แซล คอมมิวนิเคชั่น จำกัด', 'บริษัท ทรู มูฟ จำกัด (มหาชน)', 'บริษัท ทรู อินเทอร์เน็ต คอร์ปอเรชั่น จำกัด', 'บริษัท พีทีที  ไอซีที โซลูชั่น จำกัด', 'บริษัท ยูไนเต็ด อินฟอร์เมชั่น ไฮเวย์ จำกัด', 'บริษัท อินเตอร์ลิ้งค์ เทเลคอม จำกัด (มหาชน)', 'บริษัท ฮัทชิสัน ซีเอที ไวร์เลส มัลติมีเดีย จำกัด', 'สำนักงานบริหารเทคโนโลยีสารสนเทศเพื่อพัฒนาการศึกษา (สกอ.)']"),
+    ('Group', '1.1',
+     "GroupConcession == 'กระทรวจดิจิทัล'"),
+    ('Group', '1.2',
+     "GroupConcession == ['กสทช']"),
+    ('Group', '1.3',
+     "(Line_Type == 'เส้นทองแดง(Coaxial)')"),
+    ('Group', '1.4',
+     "(GroupConcession == ['ไม่ใช่สัมปทาน NT']) or (Concession == ['บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน', 'TOT/AIS #สัมปทาน', 'บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)' ,'บริษัท บีเอฟเคที จำกัด']) & (Line_Type == ['เส้นทองแดง(CU)', 'เส้นทองแดง(Dropwire)'])"),
+    ('Group', '1.4',
+     "(GroupConcession == ['สัมปทาน NT']) & ~(Concession == ['CAT-TAC #สัมปทาน', 'บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)']) & (Line_Type == ['เส้นใยแก้วนำแสง(ADSS)', 'เส้นใยแก้วนำแสง(ARSS)', 'เส้นใยแก้วนำแสง(dropwire)'])"),
+    ('Group', '1.4',
+     "(Concession == ['CAT-TAC #สัมปทาน', 'บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)']) & (Line_Type == ['เส้นใยแก้วนำแสง(ARSS)', 'เส้นใยแก้วนำแสง(dropwire)'])"),
+    ('Group', '2.1.2',
+     "(GroupConcession == ['NT'] or (Concession == ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน'])) & (Line_Type == 'เส้นทองแดง(Dropwire)')"),
+    ('Group', '2.2.1',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(dropwire)') & (5 <= Diameter <= 8) & (Cores == [1, 2]) & (0 < Total_Distance <= 0.5)"),
+    ('Group', '2.2.3',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(dropwire)') & (Cores == [1, 2]) & (Total_Distance > 0.5)"),
+    ('Group', '2.2.3',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(dropwire)') & (Cores == [1, 2]) & ~(5 <= Diameter <= 8)& (Total_Distance != 0)"),
+    ('Group', '2.2.4',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(dropwire)') & (~(Cores == [1, 2]) or (Total_Distance == 0))"),
+    ('Group', '3.1.2',
+     "((GroupConcession == ['NT']) or (Concession == ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน'])) & (Line_Type == 'เส้นทองแดง(CU)')"),
+    ('Group', '4.1.1',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)' & (Cores == [12, 24] & 18 <= Diameter <= 20) or (Cores == [48, 60] & 20 <= Diameter <= 22) or (Cores == 120 & 24 <= Diameter <= 27))"),
+    ('Group', '4.1.3',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)' & (Cores == [12, 24] & ~(18 <= Diameter <= 20)) or (Cores == [48, 60] & ~(20 <= Diameter <= 22)) or (Cores == 120 & ~(24 <= Diameter <= 27)))"),
+    ('Group', '4.1.4',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)' & (Cores != [12, 24, 48, 60, 120]))"),
+    ('Group', '4.2.1',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(ADSS)') & ((Cores == [12, 24, 48, 60] & (10 <= Diameter <= 12)) or (Cores == 120 & (15 <= Diameter <= 17)))"),
+    ('Group', '4.2.3',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(ADSS)') & ((Cores == [12, 24, 48, 60] & ~(10 <= Diameter <= 12)) or (Cores == 120 & ~(15 <= Diameter <= 17)))"),
+    ('Group', '4.2.4',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(ADSS)') & ((Cores != [12, 24, 48, 60, 120]))"),
+    ('Group', '4.3.1',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(ARSS)') & ((Cores == [12, 24, 48, 60] & (10 <= Diameter <= 12)) or (Cores == 120 & (15 <= Diameter <= 17)))"),
+    ('Group', '4.3.3',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(ARSS)') & ((Cores == [12, 24, 48, 60] & ~(10 <= Diameter <= 12)) or (Cores == 120 & ~(15 <= Diameter <= 17)))"),
+    ('Group', '4.3.4',
+     "(GroupConcession == ['NT']) & (Line_Type == 'เส้นใยแก้วนำแสง(ARSS)') & ((Cores != [12, 24, 48, 60, 120]))"),
+    ('Group', '4.4.1',
+     "(GroupConcession == ['NT']) & (Line_Type == ['เส้นใยแก้วนำแสง(Fig.8)', 'เส้นใยแก้วนำแสง(dropwire)']) & ((Cores == [12] & (10 <= Diameter <= 13)))"),
+    ('Group', '4.4.3',
+     "(GroupConcession == ['NT']) & (Line_Type == ['เส้นใยแก้วนำแสง(Fig.8)', 'เส้นใยแก้วนำแสง(dropwire)']) & ((Cores == [12] & ~(10 <= Diameter <= 13)))"),
+    ('Group', '5.1.1',
+     "(Concession == ['บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)','TOT/AIS #สัมปทาน']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & (Cores == [12, 24] & (18 <= Diameter <= 20))"),
+    ('Group', '5.1.3',
+     "(Concession == ['บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)','TOT/AIS #สัมปทาน']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & (Cores == [12, 24] & ~(18 <= Diameter <= 20))"),
+    ('Group', '5.1.4',
+     "(Concession == ['บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)','TOT/AIS #สัมปทาน']) & ((Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & (Cores != [12, 24]) or (Line_Type != 'เส้นใยแก้วนำแสง(Fig.8)'))"),
+    ('Group', '5.2.1',
+     "(Concession == ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores == [12, 24] & (18 <= Diameter <= 20)) or (Cores == 48 & (20 <= Diameter <= 22)))"),
+    ('Group', '5.2.3',
+     "(Concession == ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores == [12, 24] & ~(18 <= Diameter <= 20)) or (Cores == 48 & ~(20 <= Diameter <= 22)))"),
+    ('Group', '5.2.4',
+     "(Concession == ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน']) & ((Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores != [12, 24, 48])) or (Line_Type == ['เส้นใยแก้วนำแสง(ARSS)', 'เส้นใยแก้วนำแสง(ADSS)']))"),
+    ('Group', '5.3.1',
+     "(Concession == ['บริษัท บีเอฟเคที จำกัด']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores == [12, 24] & (18 <= Diameter <= 20)) or (Cores == 48 & (20 <= Diameter <= 22)))"),
+    ('Group', '5.3.3',
+     "(Concession == ['บริษัท บีเอฟเคที จำกัด']) & (Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores == [12, 24] & ~(18 <= Diameter <= 20)) or (Cores == 48 & ~(20 <= Diameter <= 22)))"),
+    ('Group', '5.3.4',
+     "(Concession == ['บริษัท บีเอฟเคที จำกัด']) & ((Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores != [12, 24, 48])) or (Line_Type == ['เส้นใยแก้วนำแสง(ARSS)', 'เส้นใยแก้วนำแสง(ADSS)']))"),
+    ('Group', '5.4.1',
+     "(Concession == ['บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน']) & (((Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores == [12, 24] & (18 <= Diameter <= 20)))) or ((Line_Type == 'เส้นใยแก้วนำแสง(ADSS)') & ((Cores == [12, 24] & (10 <= Diameter <= 12)))))"),
+    ('Group', '5.4.3',
+     "(Concession == ['บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน']) & (((Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores == [12, 24] & ~(18 <= Diameter <= 20)))) or ((Line_Type == 'เส้นใยแก้วนำแสง(ADSS)') & ((Cores == [12, 24] & ~(10 <= Diameter <= 12)))))"),
+    ('Group', '5.4.4',
+     "(Concession == ['บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน']) & (((Line_Type == 'เส้นใยแก้วนำแสง(Fig.8)') & ((Cores != [12, 24]))) or ((Line_Type == 'เส้นใยแก้วนำแสง(ADSS)') & ((Cores != [12, 24]))) or (Line_Type != ['เส้นใยแก้วนำแสง(Fig.8)', 'เส้นใยแก้วนำแสง(ADSS)']))"),
+]
+
+
+def classify_rd03(df):
+    """Run the original RD03 cascade on ``df`` in place."""
+    df['GroupConcession'] = pd.NA
+    df['Group'] = pd.NA
+    for target, label, query in RD03_STEPS:
+        df_filter = df.query(query)
+        df_filter = df_filter.assign(**{target: label})
+        df.update({target: df_filter[target]})
+    return df
+
+
+def classify_rd05(df):
+    """Run the original RD05 ``.loc`` rules on ``df`` in place."""
+    df['GroupConcession'] = pd.NA
+    df['Group'] = pd.NA
+    # รายชื่อใน RD05.py เดิมเป็นชุดเดียวกับ concession.CONCESSION_GROUPS
+    for label, values in CONCESSION_GROUPS:
+        df.loc[df['Concession'].isin(values), 'GroupConcession'] = label
+
+    df.loc[df['GroupConcession'] == 'กระทรวจดิจิทัล', 'Group'] = '1.1'
+    df.loc[(df['GroupConcession'] == 'NT') &
+           (df['Line_Type'] == 'เส้นใยแก้วนำแสง(dropwire)') &
+           (df['Diameter'].between(5, 8)) &
+           (df['Total_Distance'] > 0) & (df['Total_Distance'] < 0.5), 'Group'] = '2.1'
+    df.loc[(df['GroupConcession'] == 'NT') &
+           (df['Line_Type'] == 'เส้นทองแดง(Dropwire)'), 'Group'] = '2.2'
+    df.loc[(df['Concession'] == 'บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)') &
+           (df['Line_Type'] != 'เส้นใยแก้วนำแสง(Fig.8)') &
+           (df['Cores'].isin([12, 24])), 'Group'] = '4.1'
+    df.loc[(df['Concession'].isin(['-', 'บริษัท ทีโอที จำกัด(มหาชน)'])) &
+           (df['Line_Type'].isin(['เส้นใยแก้วนำแสง(Fig.8)', 'เส้นใยแก้วนำแสง(ADSS)', 'เส้นใยแก้วนำแสง(ARSS)'])) &
+           (df['Cores'].isin([12, 24, 48, 60, 120])), 'Group'] = '5.1'
+    df.loc[(df['Line_Type'].isin(['เส้นทองแดง(Dropwire)', 'เส้นใยแก้วนำแสง(dropwire)', 'เส้นใยแก้วนำแสง(Fig.8)'])) &
+           (~df['Cores'].isin([1, 2])), 'Group'] = '6.2'
+    df['Group'] = df['Group'].fillna('3.0')
+    return df
+
+
+CLASSIFY = {'RD03': classify_rd03, 'RD05': classify_rd05}
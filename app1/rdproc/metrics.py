@@ -0,0 +1,145 @@
+"""Per-stage timings, memory and per-rule hit counts.
+
+Instrumentation is off unless a collector is active::
+
+    with metrics.collect('run.json', profile_path='run.prof') as m:
+        df = read_rd_cached(path, 'RD03')
+        df = classify_rd03(df)
+        write_output(df, out)
+
+Inside ``collect`` the pipeline records the ``read``, ``cache_load``,
+``normalize``, ``group_concession``, ``rules`` and ``write`` stages (wall time
+excluding nested stages, RSS after the stage, rows) and, for every rule, how
+many rows it matched, how many of those an earlier rule had already labelled
+(``overwritten``), how many it finally decided (``won``) and the time spent
+building its mask. Repeated stages (one per chunk) are summed. The result is
+written as JSON and, with ``profile_path``, as a cProfile dump.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_active = None
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss เป็น KB บน Linux แต่เป็น byte บน macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _round(v, digits=3):
+    return None if v is None else round(v, digits)
+
+
+class Metrics:
+    def __init__(self):
+        self.stages = {}
+        self.rules = {}
+        self.info = {}
+        self._children = [0.0]
+        self._start = time.perf_counter()
+        self.seconds = None
+
+    def add_stage(self, name, seconds, rows=None, inclusive=None):
+        entry = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'inclusive': 0.0, 'rows': 0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['inclusive'] += seconds if inclusive is None else inclusive
+        entry['rows'] += rows or 0
+        entry['rss_mb'] = _rss_mb()
+
+    def add_rule(self, table, index, group, matched, overwritten=0, won=None, seconds=0.0):
+        key = (table, index)
+        entry = self.rules.setdefault(key, {'table': table, 'index': index, 'group': group,
+                                            'matched': 0, 'overwritten': 0, 'won': 0, 'seconds': 0.0})
+        entry['matched'] += int(matched)
+        entry['overwritten'] += int(overwritten)
+        entry['won'] += int(matched if won is None else won)
+        entry['seconds'] += seconds
+
+    def to_dict(self):
+        seconds = self.seconds if self.seconds is not None else time.perf_counter() - self._start
+        stages = {name: dict(s, seconds=_round(s['seconds']), inclusive=_round(s['inclusive']),
+                             rss_mb=_round(s.get('rss_mb'), 1))
+                  for name, s in self.stages.items()}
+        rules = [dict(r, seconds=_round(r['seconds'], 4)) for r in self.rules.values()]
+        return {'seconds': _round(seconds), 'peak_rss_mb': _round(_peak_mb(), 1),
+                'info': self.info, 'stages': stages, 'rules': rules}
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def active():
+    """Return the collecting :class:`Metrics`, or ``None`` when off."""
+    return _active
+
+
+@contextmanager
+def collect(json_path=None, profile_path=None):
+    """Collect metrics for the enclosed block; optionally dump JSON / cProfile."""
+    global _active
+    previous, m = _active, Metrics()
+    _active = m
+    profiler = None
+    if profile_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield m
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        _active = previous
+        m.seconds = time.perf_counter() - m._start
+        if json_path:
+            m.write_json(json_path)
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage; set ``info['rows']`` on the yielded dict."""
+    m = _active
+    info = {}
+    if m is None:
+        yield info
+        return
+    m._children.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        inclusive = time.perf_counter() - start
+        nested = m._children.pop()
+        m._children[-1] += inclusive
+        m.add_stage(name, inclusive - nested, info.get('rows'), inclusive)
+
+
+def record(name, seconds, rows=None):
+    """Add an externally timed stage (e.g. reading between generator yields)."""
+    m = _active
+    if m is not None:
+        m._children[-1] += seconds
+        m.add_stage(name, seconds, rows)
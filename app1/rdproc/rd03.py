@@ -0,0 +1,160 @@
+"""Single-pass RD03 Group classifier.
+
+The original ``Group_Select()`` evaluated ~30 ``df.query`` strings, each
+followed by ``assign`` + ``df.update``. Here the shared predicates
+(GroupConcession, Line_Type, Concession, Cores sets, Diameter ranges) are
+computed once as boolean masks and every rule is resolved in a single
+``np.select`` pass. Rules are listed in the original order and the select is
+run in reverse, so "last rule wins" is kept exactly.
+
+Each rule mask mirrors the precedence of the legacy query string, where
+``&``/``|`` bind like ``and``/``or`` (e.g. 4.1.1 only applies Fig.8 to the
+12F/24F branch).
+"""
+import pandas as pd
+
+from . import dtypes, engine
+from .concession import DIGITAL, NBTC, NT, NT_CONCESSION, NON_NT_CONCESSION, group_concession
+
+FIG8 = 'เส้นใยแก้วนำแสง(Fig.8)'
+ADSS = 'เส้นใยแก้วนำแสง(ADSS)'
+ARSS = 'เส้นใยแก้วนำแสง(ARSS)'
+OFC_DROPWIRE = 'เส้นใยแก้วนำแสง(dropwire)'
+CU = 'เส้นทองแดง(CU)'
+CU_DROPWIRE = 'เส้นทองแดง(Dropwire)'
+COAXIAL = 'เส้นทองแดง(Coaxial)'
+
+AIS = ['บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)', 'TOT/AIS #สัมปทาน']
+TTT = ['บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน']
+BFKT = ['บริษัท บีเอฟเคที จำกัด']
+TAC = ['บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน']
+
+
+# (Group, mask) ตามลำดับของสคริปต์เดิม กฎที่อยู่หลังจะทับกฎก่อนหน้า
+RULES = [
+    ## Group 1
+    #1.1	หน่วยงาน = 'กระทรวจดิจิทัล'
+    ('1.1', lambda p: p.gc(DIGITAL)),
+    #1.2	หน่วยงาน = 'กสทช'
+    ('1.2', lambda p: p.gc(NBTC)),
+    #1.3	หน่วยงานทั้งหมด =  และ (Line_Type == 'เส้นทองแดง(Coaxial)')
+    ('1.3', lambda p: p.line_type(COAXIAL)),
+    #1.4	หน่วยงานใต้สัมปทาน = 'ไม่ใช่สัมปทาน NT'
+    ('1.4', lambda p: p.gc(NON_NT_CONCESSION)
+        | (p.concession(*AIS, *TAC, *BFKT) & p.line_type(CU, CU_DROPWIRE))),
+    ('1.4', lambda p: p.gc(NT_CONCESSION) & ~p.concession(*TAC)
+        & p.line_type(ADSS, ARSS, OFC_DROPWIRE)),
+    ('1.4', lambda p: p.concession(*TAC) & p.line_type(ARSS, OFC_DROPWIRE)),
+
+    ## Group 2
+    #2.1.2	ประเภทสาย = 'เส้นทองแดง(Dropwire)'
+    ('2.1.2', lambda p: (p.gc(NT) | p.concession(*TTT)) & p.line_type(CU_DROPWIRE)),
+    #2.2.1	ประเภทสาย = 'เส้นใยแก้วนำแสง(dropwire)' และ เส้นผ่านศูนย์กลาง(มม.) = ‘5-8 mm.’ และ จำนวน Core = 1-2 และ 0 < ระยะทาง(กม.) = <= 500 m.
+    ('2.2.1', lambda p: p.gc(NT) & p.line_type(OFC_DROPWIRE) & p.diameter(5, 8) & p.cores(1, 2)
+        & p.distance('gt', 0) & p.distance('le', 0.5)),
+    #2.2.3	ประเภทสาย = 'เส้นใยแก้วนำแสง(dropwire)' และ จำนวน Core = 1-2 และ ระยะทาง(กม.) > 500 m.
+    ('2.2.3', lambda p: p.gc(NT) & p.line_type(OFC_DROPWIRE) & p.cores(1, 2) & p.distance('gt', 0.5)),
+    #2.2.3	ประเภทสาย = 'เส้นใยแก้วนำแสง(dropwire)' และ จำนวน Core = 1-2 และ เส้นผ่าศูนย์กลางไม่ใช่ 5-8 และ ระยะทาง(กม.) != 0 m.
+    ('2.2.3', lambda p: p.gc(NT) & p.line_type(OFC_DROPWIRE) & p.cores(1, 2) & ~p.diameter(5, 8)
+        & p.distance('ne', 0)),
+    #2.2.4	ประเภทสาย = 'เส้นใยแก้วนำแสง(dropwire)' และ จำนวน Core != 1-2 และ ระยะทาง(กม.) == 0 m.
+    ('2.2.4', lambda p: p.gc(NT) & p.line_type(OFC_DROPWIRE) & (~p.cores(1, 2) | p.distance('eq', 0))),
+
+    # Group 3
+    #3.1.2	กลุ่ม == ['NT']+TT&T และ ประเภทสาย = 'เส้นทองแดง(CU)'
+    ('3.1.2', lambda p: (p.gc(NT) | p.concession(*TTT)) & p.line_type(CU)),
+
+    # Group 4
+    #4.1.1 กลุ่ม == ['NT'] และ OFC(Fig.8) 12F, 24F และ Ø = 18-20 mm หรือ OFC(Fig.8) 48F, 60F และ Ø = 20-22 mm หรือ OFC(Fig.8) 120F และ Ø = 24-27 mm
+    ('4.1.1', lambda p: p.gc(NT) & ((p.line_type(FIG8) & p.cores(12, 24) & p.diameter(18, 20))
+                                    | (p.cores(48, 60) & p.diameter(20, 22))
+                                    | (p.cores(120) & p.diameter(24, 27)))),
+    #4.1.3 กลุ่ม == ['NT'] และ OFC(Fig.8) 12F, 24F และ Ø != 18-20 mm หรือ OFC(Fig.8) 48F, 60F และ Ø != 20-22 mm หรือ OFC(Fig.8) 120F และ Ø != 24-27 mm
+    ('4.1.3', lambda p: p.gc(NT) & ((p.line_type(FIG8) & p.cores(12, 24) & ~p.diameter(18, 20))
+                                    | (p.cores(48, 60) & ~p.diameter(20, 22))
+                                    | (p.cores(120) & ~p.diameter(24, 27)))),
+    #4.1.4 กลุ่ม == ['NT'] และ OFC(Fig.8) != 12F, 24F,  48F,  120F
+    ('4.1.4', lambda p: p.gc(NT) & p.line_type(FIG8) & ~p.cores(12, 24, 48, 60, 120)),
+    #4.2.1 กลุ่ม == ['NT'] และ เส้นใยแก้วนำแสง(ADSS) 12F, 24F, 48F, 60F และ Ø = 10-12 mm หรือ เส้นใยแก้วนำแสง(ADSS) 120F และ Ø = 15-17 mm
+    ('4.2.1', lambda p: p.gc(NT) & p.line_type(ADSS) & ((p.cores(12, 24, 48, 60) & p.diameter(10, 12))
+                                                        | (p.cores(120) & p.diameter(15, 17)))),
+    #4.2.3 กลุ่ม == ['NT'] และ เส้นใยแก้วนำแสง(ADSS) 12F, 24F, 48F, 60F และ Ø != 10-12 mm หรือ เส้นใยแก้วนำแสง(ADSS) 120F และ Ø != 15-17 mm
+    ('4.2.3', lambda p: p.gc(NT) & p.line_type(ADSS) & ((p.cores(12, 24, 48, 60) & ~p.diameter(10, 12))
+                                                        | (p.cores(120) & ~p.diameter(15, 17)))),
+    #4.2.4 กลุ่ม == ['NT'] และ 'เส้นใยแก้วนำแสง(ADSS)' != 12F, 24F, 48F, 60F, 120F
+    ('4.2.4', lambda p: p.gc(NT) & p.line_type(ADSS) & ~p.cores(12, 24, 48, 60, 120)),
+    #4.3.1 กลุ่ม == ['NT'] และ เส้นใยแก้วนำแสง(ARSS) 12F, 24F, 48F, 60F และ Ø = 10-12 mm หรือ เส้นใยแก้วนำแสง(ARSS) 120F และ Ø = 15-17 mm
+    ('4.3.1', lambda p: p.gc(NT) & p.line_type(ARSS) & ((p.cores(12, 24, 48, 60) & p.diameter(10, 12))
+                                                        | (p.cores(120) & p.diameter(15, 17)))),
+    #4.3.3 กลุ่ม == ['NT'] และ เส้นใยแก้วนำแสง(ARSS) 12F, 24F, 48F, 60F และ Ø != 10-12 mm หรือ เส้นใยแก้วนำแสง(ARSS) 120F และ Ø != 15-17 mm
+    ('4.3.3', lambda p: p.gc(NT) & p.line_type(ARSS) & ((p.cores(12, 24, 48, 60) & ~p.diameter(10, 12))
+                                                        | (p.cores(120) & ~p.diameter(15, 17)))),
+    #4.3.4 กลุ่ม == ['NT'] และ 'เส้นใยแก้วนำแสง(ARSS)' != 12F, 24F, 48F, 60F, 120F
+    ('4.3.4', lambda p: p.gc(NT) & p.line_type(ARSS) & ~p.cores(12, 24, 48, 60, 120)),
+    #4.4.1 Concession == 'บริษัท กสท โทรคมนาคม จำกัด(มหาชน)' และ ‘เส้นใยแก้วนำแสง(Fig.8)’, 'เส้นใยแก้วนำแสง(dropwire)' Core 12F และ Ø = 10-13 mm
+    ('4.4.1', lambda p: p.gc(NT) & p.line_type(FIG8, OFC_DROPWIRE) & p.cores(12) & p.diameter(10, 13)),
+    #4.4.3 Concession == 'บริษัท กสท โทรคมนาคม จำกัด(มหาชน)' และ ‘เส้นใยแก้วนำแสง(Fig.8)’, 'เส้นใยแก้วนำแสง(dropwire)' Core 12F และ Ø != 10-13 mm
+    ('4.4.3', lambda p: p.gc(NT) & p.line_type(FIG8, OFC_DROPWIRE) & p.cores(12) & ~p.diameter(10, 13)),
+
+    ### บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)
+    #5.1.1  'บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)','TOT/AIS #สัมปทาน' , และ เส้นใยแก้วนำแสง(Fig.8) Core 12F, 24F และ Ø = 18-20 mm
+    ('5.1.1', lambda p: p.concession(*AIS) & p.line_type(FIG8) & p.cores(12, 24) & p.diameter(18, 20)),
+    #5.1.3  'บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)','TOT/AIS #สัมปทาน' , และ เส้นใยแก้วนำแสง(Fig.8) Core 12F, 24F และ Ø != 18-20 mm
+    ('5.1.3', lambda p: p.concession(*AIS) & p.line_type(FIG8) & p.cores(12, 24) & ~p.diameter(18, 20)),
+    #5.1.4  'บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)','TOT/AIS #สัมปทาน' , และ เส้นใยแก้วนำแสง(Fig.8) Core != 12F, 24F หรือ ไม่ใช่ Fig.8
+    ('5.1.4', lambda p: p.concession(*AIS) & ((p.line_type(FIG8) & ~p.cores(12, 24)) | ~p.line_type(FIG8))),
+
+    ### บริษัท ทีทีแอนด์ที จำกัด (มหาชน)
+    #5.2.1  'บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน'  และ 'เส้นใยแก้วนำแสง(Fig.8)' และ Core 12F, 24F และ Ø = 18-20 mm  และ Core 48F และ Ø = 20-22 mm
+    ('5.2.1', lambda p: p.concession(*TTT) & p.line_type(FIG8) & ((p.cores(12, 24) & p.diameter(18, 20))
+                                                                 | (p.cores(48) & p.diameter(20, 22)))),
+    #5.2.3  'บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน'  และ 'เส้นใยแก้วนำแสง(Fig.8)' และ Core 12F, 24F และ Ø != 18-20 mm  และ Core 48F และ Ø != 20-22 mm
+    ('5.2.3', lambda p: p.concession(*TTT) & p.line_type(FIG8) & ((p.cores(12, 24) & ~p.diameter(18, 20))
+                                                                 | (p.cores(48) & ~p.diameter(20, 22)))),
+    #5.2.4  'บริษัท ทีทีแอนด์ที จำกัด (มหาชน)', 'TOT-TT&T #สัมปทาน'  และ 'เส้นใยแก้วนำแสง(Fig.8)' และ Core != 12F, 24F, 48F
+    ('5.2.4', lambda p: p.concession(*TTT) & ((p.line_type(FIG8) & ~p.cores(12, 24, 48))
+                                              | p.line_type(ARSS, ADSS))),
+
+    ### บริษัท บีเอฟเคที จำกัด
+    #5.3.1  'บริษัท บีเอฟเคที จำกัด' และ 'เส้นใยแก้วนำแสง(Fig.8)' และ Core 12F, 24F และ Ø = 18-20 mm  และ Core 48F และ Ø = 20-22 mm
+    ('5.3.1', lambda p: p.concession(*BFKT) & p.line_type(FIG8) & ((p.cores(12, 24) & p.diameter(18, 20))
+                                                                  | (p.cores(48) & p.diameter(20, 22)))),
+    #5.3.3  'บริษัท บีเอฟเคที จำกัด'  และ 'เส้นใยแก้วนำแสง(Fig.8)' และ Core 12F, 24F และ Ø != 18-20 mm  และ Core 48F และ Ø != 20-22 mm
+    ('5.3.3', lambda p: p.concession(*BFKT) & p.line_type(FIG8) & ((p.cores(12, 24) & ~p.diameter(18, 20))
+                                                                  | (p.cores(48) & ~p.diameter(20, 22)))),
+    #5.3.4  'บริษัท บีเอฟเคที จำกัด'  และ 'เส้นใยแก้วนำแสง(Fig.8)' และ Core != 12F, 24F, 48F
+    ('5.3.4', lambda p: p.concession(*BFKT) & ((p.line_type(FIG8) & ~p.cores(12, 24, 48))
+                                               | p.line_type(ARSS, ADSS))),
+
+    ### 'บริษัท โทเทิ่ล แอ็คเซ็ส คอมมูนิเคชั่น จำกัด (มหาชน)', 'CAT-TAC #สัมปทาน'
+    #5.4.1  'เส้นใยแก้วนำแสง(Fig.8)' และ Core 12F, 24F และ Ø = 18-20 mm or 'เส้นใยแก้วนำแสง(ADSS)' Core 12F, 24F และ Ø = 10-12 mm
+    ('5.4.1', lambda p: p.concession(*TAC) & ((p.line_type(FIG8) & p.cores(12, 24) & p.diameter(18, 20))
+                                              | (p.line_type(ADSS) & p.cores(12, 24) & p.diameter(10, 12)))),
+    #5.4.3  'เส้นใยแก้วนำแสง(Fig.8)' และ Core 12F, 24F และ Ø != 18-20 mm or 'เส้นใยแก้วนำแสง(ADSS)' Core 12F, 24F และ Ø != 10-12 mm
+    ('5.4.3', lambda p: p.concession(*TAC) & ((p.line_type(FIG8) & p.cores(12, 24) & ~p.diameter(18, 20))
+                                              | (p.line_type(ADSS) & p.cores(12, 24) & ~p.diameter(10, 12)))),
+    #5.4.4  'เส้นใยแก้วนำแสง(Fig.8)' และ Core != 12F, 24F  or 'เส้นใยแก้วนำแสง(ADSS)' Core != 12F, 24F or  != 'เส้นใยแก้วนำแสง(Fig.8)','เส้นใยแก้วนำแสง(ADSS)'
+    ('5.4.4', lambda p: p.concession(*TAC) & ((p.line_type(FIG8) & ~p.cores(12, 24))
+                                              | (p.line_type(ADSS) & ~p.cores(12, 24))
+                                              | ~p.line_type(FIG8, ADSS))),
+]
+
+
+def rule_masks(df, rules=RULES):
+    """Evaluate every rule once; returns a list of (Group, mask)."""
+    return engine.rule_masks(df, rules)
+
+
+def classify_groups(df, rules=RULES):
+    """Return the RD03 ``Group`` column for ``df`` (needs ``GroupConcession``).
+
+    Rows that match no rule get ``pd.NA``, same as the legacy cascade.
+    """
+    return engine.select_groups(df, rules, default=pd.NA, table='RD03')
+
+
+def classify(df):
+    """Fill ``GroupConcession`` and ``Group`` on a renamed RD03 frame in place."""
+    df['GroupConcession'] = group_concession(df['Concession'])
+    df['Group'] = classify_groups(df)
+    return dtypes.categorize(df, dtypes.OUTPUT_COLUMNS)
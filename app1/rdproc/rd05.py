@@ -0,0 +1,41 @@
+"""Single-pass RD05 Group classifier (rules 1.1 - 6.2 of ``RD05.py``)."""
+from . import dtypes, engine
+from .concession import DIGITAL, NT, group_concession
+from .rd03 import ADSS, ARSS, CU_DROPWIRE, FIG8, OFC_DROPWIRE
+
+DEFAULT_GROUP = '3.0'
+
+# (Group, mask) ตามลำดับของสคริปต์เดิม กฎที่อยู่หลังจะทับกฎก่อนหน้า
+RULES = [
+    ('1.1', lambda p: p.gc(DIGITAL)),
+    # 2.1 NT + Dropwire
+    ('2.1', lambda p: p.gc(NT) & p.line_type(OFC_DROPWIRE) & p.diameter(5, 8)
+        & p.distance('gt', 0) & p.distance('lt', 0.5)),
+    # 2.2 NT + Copper Dropwire
+    ('2.2', lambda p: p.gc(NT) & p.line_type(CU_DROPWIRE)),
+    # 4.1 สัมปทานต่างๆ
+    ('4.1', lambda p: p.concession('บริษัท แอดวานซ์ อินโฟร์เซอร์วิส จำกัด (มหาชน)') & ~p.line_type(FIG8)
+        & p.cores(12, 24)),
+    # 5.1 NT เดิม
+    ('5.1', lambda p: p.concession('-', 'บริษัท ทีโอที จำกัด(มหาชน)') & p.line_type(FIG8, ADSS, ARSS)
+        & p.cores(12, 24, 48, 60, 120)),
+    # 6.2 พิเศษ
+    ('6.2', lambda p: p.line_type(CU_DROPWIRE, OFC_DROPWIRE, FIG8) & ~p.cores(1, 2)),
+]
+
+
+def rule_masks(df, rules=RULES):
+    """Evaluate every rule once; returns a list of (Group, mask)."""
+    return engine.rule_masks(df, rules)
+
+
+def classify_groups(df, rules=RULES):
+    """Return the RD05 ``Group`` column; unmatched rows become ``'3.0'``."""
+    return engine.select_groups(df, rules, default=DEFAULT_GROUP, table='RD05')
+
+
+def classify(df):
+    """Fill ``GroupConcession`` and ``Group`` on a renamed RD05 frame in place."""
+    df['GroupConcession'] = group_concession(df['Concession'])
+    df['Group'] = classify_groups(df)
+    return dtypes.categorize(df, dtypes.OUTPUT_COLUMNS)
@@ -0,0 +1,179 @@
+"""RD03/RD05 workbook readers.
+
+``read_rd`` is the original whole-file path (``pd.read_excel`` with the
+8-row header offset). ``iter_rd_chunks`` streams the first sheet with
+openpyxl ``read_only``/``iter_rows`` (or calamine when installed) and yields
+typed DataFrame chunks of at most ``chunksize`` rows, so peak memory depends
+on the chunk size rather than the file size.
+
+Both return the same normalized frame: the export's first column dropped,
+the ``RD03_COLS``/``RD05_COLS`` names applied, rows with a blank ``PEA``
+removed and, unless ``compact=False``, the compact dtypes of
+:mod:`rdproc.dtypes` applied.
+"""
+import time
+
+import pandas as pd
+
+from . import dtypes, metrics, rd03, rd05
+
+HEADER_ROWS = 8
+DEFAULT_CHUNKSIZE = 50000
+
+RD03_COLS = ["PEA", "Route_Name", "Tag", "Owner", "Concession",
+             "Line_Type", "Diameter", "Cores", "Total_Poles", "Poles_in_Area",
+             "Total_Distance", "Distance_in_Area", "Installation", "Notes",
+             "Start_Coordinates", "End_Coordinates", "Tag_of_Poles_Pass",
+             "Data_Source", "Username", "Name_Lastname"]
+
+RD05_COLS = ["PEA", "Route_Name", "Tag", "Owner", "Concession",
+             "Line_Type", "Diameter", "Cores", "Total_Poles", "Poles_in_Area",
+             "Total_Distance", "Distance_in_Area", "Installation", "Compensation",
+             "Start_Coordinates", "End_Coordinates", "Tag_of_Poles_Pass",
+             "Data_Source", "Username", "Name_Lastname", "Date_Edit"]
+
+COLUMNS = {'RD03': RD03_COLS, 'RD05': RD05_COLS}
+CLASSIFIERS = {'RD03': rd03.classify, 'RD05': rd05.classify}
+
+# ข้อความที่ pd.read_excel ถือเป็นค่าว่างโดยปริยาย (ใช้ให้ผลเหมือนกันตอนอ่านแบบ stream)
+NA_STRINGS = frozenset(['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                        '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+                        'n/a', 'nan', 'null'])
+
+
+def normalize_raw(raw, mode, compact=True):
+    """Name the columns of a raw ``header=None`` frame and drop blank PEA rows.
+
+    Column 0 of the export is a running number (``index_col=0`` in RD03.py,
+    ``iloc[:, 1:22]`` in RD05.py); anything past the layout, such as the RD03
+    ``Date_Edit`` column 21, is dropped.
+    """
+    cols = COLUMNS[mode]
+    df = raw.iloc[:, 1:1 + len(cols)].copy()
+    df.columns = cols
+    df = df.dropna(subset=['PEA'])
+    if compact:
+        dtypes.normalize(df)
+    return df
+
+
+def read_rd(path, mode, compact=True):
+    """Read a whole RD03/RD05 workbook into one normalized frame."""
+    with metrics.stage('read') as info:
+        raw = pd.read_excel(path, skiprows=HEADER_ROWS, header=None)
+        info['rows'] = len(raw)
+    return normalize_raw(raw, mode, compact)
+
+
+def _rows_openpyxl(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        yield from ws.iter_rows(min_row=HEADER_ROWS + 1, values_only=True)
+    finally:
+        wb.close()
+
+
+def count_rows(path):
+    """Rows below the header according to the sheet dimension, or ``None``.
+
+    Cheap (no cells are read); includes blank ``PEA`` rows, so it is only an
+    upper bound used for progress reporting.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        max_row = wb.worksheets[0].max_row
+    finally:
+        wb.close()
+    return None if max_row is None else max(max_row - HEADER_ROWS, 0)
+
+
+def _calamine_cell(v):
+    # calamine คืนค่าเซลล์ว่างเป็น "" และตัวเลขจำนวนเต็มเป็น float
+    if v == '':
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _rows_calamine(path):
+    from python_calamine import CalamineWorkbook
+
+    sheet = CalamineWorkbook.from_path(str(path)).get_sheet_by_index(0)
+    for i, row in enumerate(sheet.to_python(skip_empty_area=False)):
+        if i >= HEADER_ROWS:
+            yield tuple(_calamine_cell(v) for v in row)
+
+
+def _row_source(path, engine):
+    if engine == 'auto':
+        try:
+            import python_calamine  # noqa: F401
+            engine = 'calamine'
+        except ImportError:
+            engine = 'openpyxl'
+    if engine == 'calamine':
+        return _rows_calamine(path)
+    if engine == 'openpyxl':
+        return _rows_openpyxl(path)
+    raise ValueError(f"unknown engine: {engine!r}")
+
+
+def _frame(rows, cols, start, compact):
+    df = pd.DataFrame.from_records(rows, columns=cols)
+    df.index = pd.RangeIndex(start, start + len(df))
+    if compact:
+        # รายงานค่าที่แปลงไม่ได้อยู่ใน chunk.attrs ให้ผู้เรียกรวมผลเอง
+        dtypes.normalize(df, verbose=False)
+    return df
+
+
+def iter_rd_chunks(path, mode, chunksize=DEFAULT_CHUNKSIZE, engine='openpyxl', compact=True):
+    """Yield normalized frames of at most ``chunksize`` rows.
+
+    ``engine`` is ``'openpyxl'`` (bounded memory), ``'calamine'`` (faster,
+    but calamine holds the sheet's cells) or ``'auto'``. Chunks carry a
+    running RangeIndex so they can be concatenated or written in order.
+    Coercion failures of each chunk are in ``chunk.attrs`` (see
+    :func:`rdproc.dtypes.merge_failures`).
+    """
+    cols = COLUMNS[mode]
+    width = len(cols)
+    buf = []
+    start = 0
+    # เวลาอ่านไม่รวมช่วงที่ผู้เรียกประมวลผล chunk (ระหว่าง yield)
+    t = time.perf_counter()
+    for row in _row_source(path, engine):
+        values = tuple(None if type(v) is str and v in NA_STRINGS else v for v in row[1:1 + width])
+        if len(values) < width:
+            values += (None,) * (width - len(values))
+        # นำแถวว่าง ออกจากข้อมูล โดยดูจาก PEA
+        if values[0] is None:
+            continue
+        buf.append(values)
+        if len(buf) >= chunksize:
+            metrics.record('read', time.perf_counter() - t, len(buf))
+            yield _frame(buf, cols, start, compact)
+            start += len(buf)
+            buf = []
+            t = time.perf_counter()
+    if buf:
+        metrics.record('read', time.perf_counter() - t, len(buf))
+        yield _frame(buf, cols, start, compact)
+
+
+def classify_chunks(chunks, mode):
+    """Run the GroupConcession mapping and Group rules on each chunk."""
+    classify = CLASSIFIERS[mode]
+    for chunk in chunks:
+        yield classify(chunk)
+
+
+def iter_classified(path, mode, chunksize=DEFAULT_CHUNKSIZE, engine='openpyxl'):
+    """Stream a workbook and yield classified chunks."""
+    return classify_chunks(iter_rd_chunks(path, mode, chunksize, engine), mode)
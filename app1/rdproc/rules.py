@@ -0,0 +1,318 @@
+"""Vectorized evaluator for the app1 GroupRule/Condition JSON.
+
+The web UI stores rule sets as ``rd03_rules_v2`` / ``rd05_rules_v2`` (and per
+profile in ``rd_profiles_v2``) and evaluates them row by row in
+``services/excelProcessor.ts``. This module loads the same JSON, compiles it
+once into per-column operations and applies it to a whole DataFrame:
+
+* every condition is evaluated against the distinct values of its column and
+  broadcast back through factorized codes, so no per-row interpretation;
+* compiled plans are cached by a hash of the rule set, so a UI edit only costs
+  one recompile.
+
+Semantics follow ``checkCondition`` / ``matchesRule`` / ``processExcelFile``
+exactly, including the JS coercions (``String(v || "")``, ``parseFloat(v) || 0``),
+priority ordering, ``onlyIfEmpty`` and "first Group match stops the row".
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import dtypes, metrics
+
+NOT_FOUND = 'ไม่พบกลุ่ม'
+RD05_DEFAULT_GROUP = '3.0'
+STATE_COLUMNS = ('GroupConcession', 'Group')
+
+_GROUPING_RE = re.compile(r'^[0-9]+(\.[0-9]+)+')
+_FLOAT_RE = re.compile(r'^[+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+_PLAN_CACHE = OrderedDict()
+_PLAN_CACHE_SIZE = 32
+
+
+# --- JS coercion helpers -----------------------------------------------------
+
+def _js_string(v):
+    """``String(v)`` as JavaScript would print a JSON/Excel value."""
+    if v is None or v is pd.NA:
+        return 'null'
+    if isinstance(v, (bool, np.bool_)):
+        return 'true' if v else 'false'
+    if isinstance(v, (float, np.floating)):
+        if np.isnan(v):
+            return 'NaN'
+        if np.isinf(v):
+            return 'Infinity' if v > 0 else '-Infinity'
+        if float(v).is_integer():
+            return str(int(v))
+        return repr(float(v))
+    if isinstance(v, (int, np.integer)):
+        return str(int(v))
+    return str(v)
+
+
+def _row_string(v):
+    """``String(rowValue || "").trim()`` from ``checkCondition``."""
+    if v is None or v is pd.NA or v is False or v == '':
+        return ''
+    if isinstance(v, (int, float, np.integer, np.floating)) and (v == 0 or v != v):
+        return ''
+    return _js_string(v).strip()
+
+
+def _parse_float(s):
+    """JavaScript ``parseFloat`` (leading numeric prefix, NaN when none)."""
+    m = _FLOAT_RE.match(str(s).lstrip())
+    if not m:
+        return np.nan
+    return float(m.group(0).replace('Infinity', 'inf'))
+
+
+def _parse_target_float(v):
+    if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        return float(v)
+    return _parse_float(_js_string(v))
+
+
+def _target_list(target):
+    if isinstance(target, list):
+        return {_js_string(item).strip() for item in target}
+    return {s.strip() for s in _js_string(target).split(',')}
+
+
+# --- compilation ---------------------------------------------------------------
+
+def _compile_condition(cond):
+    """Return ``fn(vals, nums) -> bool array`` over the distinct values of a column."""
+    op = cond.get('operator')
+    target = cond.get('value')
+
+    if op in ('equals', 'not_equals'):
+        t = _js_string(target).strip()
+        if op == 'equals':
+            return lambda vals, nums: vals == t
+        return lambda vals, nums: vals != t
+    if op == 'contains':
+        t = _js_string(target).lower().strip()
+        return lambda vals, nums: np.array([t in v.lower() for v in vals], dtype=bool)
+    if op in ('in_list', 'not_in_list'):
+        items = list(_target_list(target))
+        if op == 'in_list':
+            return lambda vals, nums: np.isin(vals, items)
+        return lambda vals, nums: ~np.isin(vals, items)
+    if op == 'between':
+        lo, hi = (0.0, 0.0)
+        if isinstance(target, list):
+            bounds = [_parse_target_float(v) for v in target] + [np.nan, np.nan]
+            lo, hi = bounds[0], bounds[1]
+        return lambda vals, nums: (nums >= lo) & (nums <= hi)
+    if op in ('gt', 'gte', 'lt', 'lte'):
+        t = _parse_target_float(target)
+        compare = {'gt': np.greater, 'gte': np.greater_equal,
+                   'lt': np.less, 'lte': np.less_equal}[op]
+        return lambda vals, nums: compare(nums, t)
+    return lambda vals, nums: np.zeros(len(vals), dtype=bool)
+
+
+def _target_field(rule):
+    """Same rule as ``sanitizeRules`` in App.tsx: x.y ids/names target ``Group``."""
+    for key in ('id', 'name', 'resultValue'):
+        v = rule.get(key)
+        if v and _GROUPING_RE.match(str(v)):
+            return 'Group'
+    return 'GroupConcession'
+
+
+class CompiledRule:
+    __slots__ = ('id', 'target', 'value', 'only_if_empty', 'conditions')
+
+    def __init__(self, rule):
+        self.id = str(rule.get('id'))
+        self.target = rule.get('targetField') or 'Group'
+        fallback = (rule.get('name') or rule.get('id')) if self.target == 'GroupConcession' else rule.get('id')
+        self.value = rule.get('resultValue') or fallback
+        self.only_if_empty = bool(rule.get('onlyIfEmpty'))
+        self.conditions = [(c.get('column'), _compile_condition(c)) for c in rule.get('conditions') or []]
+
+
+class _ColumnView:
+    """Coded column: codes plus JS string / number forms of each distinct value."""
+
+    def __init__(self, codes, uniques):
+        # code -1 (NaN) -> last slot, which holds the "" an empty cell becomes in JS
+        self.codes = codes
+        self.vals = np.array([_row_string(u) for u in uniques] + [''], dtype=object)
+        self.nums = np.array([_parse_float(v) for v in self.vals], dtype=float)
+        self.nums[np.isnan(self.nums)] = 0.0
+
+    @classmethod
+    def factorize(cls, values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return cls(values.cat.codes.to_numpy(), values.cat.categories)
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        return cls(codes, uniques)
+
+    def mask(self, fn):
+        return np.asarray(fn(self.vals, self.nums), dtype=bool)[self.codes]
+
+
+def _is_empty(v):
+    return not v or v in (NOT_FOUND, RD05_DEFAULT_GROUP)
+
+
+class RulePlan:
+    """A compiled rule set; reuse it across frames via :func:`compile_rules`."""
+
+    def __init__(self, rules, key=None):
+        self.key = key or rules_hash(rules)
+        ordered = sorted(rules, key=lambda r: r.get('priority', 0))
+        self.rules = [CompiledRule(r) for r in ordered]
+        self.columns = sorted({col for r in self.rules for col, _ in r.conditions})
+
+    def apply(self, df, mode='RD03'):
+        """Return ``(GroupConcession, Group)`` Series for ``df``."""
+        n = len(df)
+        default_group = NOT_FOUND if mode == 'RD03' else RD05_DEFAULT_GROUP
+        # GroupConcession/Group are kept as integer codes into a small value table
+        table = list(dict.fromkeys([NOT_FOUND, default_group] + [r.value for r in self.rules]))
+        code_of = {v: i for i, v in enumerate(table)}
+        empty = np.array([_is_empty(v) for v in table], dtype=bool)
+        state = {
+            'GroupConcession': np.full(n, code_of[NOT_FOUND], dtype=np.int32),
+            'Group': np.full(n, code_of[default_group], dtype=np.int32),
+        }
+        views = {}
+        for col in self.columns:
+            if col in STATE_COLUMNS:
+                views[col] = _ColumnView(state[col], table)
+            elif col in df.columns:
+                views[col] = _ColumnView.factorize(df[col])
+            else:
+                views[col] = _ColumnView.factorize(pd.Series(np.full(n, None, dtype=object)))
+        done = np.zeros(n, dtype=bool)
+        m = metrics.active()
+        # ใช้เก็บว่าแถวได้ค่าจากกฎข้อใด (เฉพาะตอนเก็บ metrics)
+        source = {col: np.full(n, -1, dtype=np.int32) for col in STATE_COLUMNS} if m is not None else None
+
+        for i, rule in enumerate(self.rules):
+            start = time.perf_counter()
+            active = ~done
+            if rule.only_if_empty:
+                active &= empty[state[rule.target]]
+            for col, fn in rule.conditions:
+                if not active.any():
+                    break
+                active &= views[col].mask(fn)
+            if active.any():
+                if source is not None:
+                    matched, overwritten = active.sum(), (~empty[state[rule.target][active]]).sum()
+                    source[rule.target][active] = i
+                state[rule.target][active] = code_of[rule.value]
+                if rule.target != 'GroupConcession':
+                    done |= active
+            elif source is not None:
+                matched = overwritten = 0
+            if source is not None:
+                m.add_rule(f"UI {mode}", i, rule.value, matched, overwritten, 0, time.perf_counter() - start)
+
+        if source is not None:
+            for col in STATE_COLUMNS:
+                won = np.bincount(source[col][source[col] >= 0], minlength=len(self.rules))
+                for i, rule in enumerate(self.rules):
+                    if rule.target == col:
+                        m.add_rule(f"UI {mode}", i, rule.value, 0, 0, won[i])
+
+        values = np.array(table, dtype=object)
+        return (pd.Series(values[state['GroupConcession']], index=df.index, dtype=object),
+                pd.Series(values[state['Group']], index=df.index, dtype=object))
+
+
+# --- public API ----------------------------------------------------------------
+
+def rules_hash(rules):
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def sanitize_rules(rules):
+    """Fix ``targetField`` the way the UI does before saving/using rules."""
+    return [dict(r, targetField=_target_field(r)) for r in rules]
+
+
+def compile_rules(rules):
+    """Compile a GroupRule list, reusing a cached plan for identical rule sets."""
+    key = rules_hash(rules)
+    plan = _PLAN_CACHE.get(key)
+    if plan is None:
+        plan = RulePlan(rules, key)
+        _PLAN_CACHE[key] = plan
+        if len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+            _PLAN_CACHE.popitem(last=False)
+    else:
+        _PLAN_CACHE.move_to_end(key)
+    return plan
+
+
+def apply_rules(df, rules, mode='RD03'):
+    """Fill ``GroupConcession`` and ``Group`` on ``df`` in place using UI rules."""
+    with metrics.stage('rules') as info:
+        df['GroupConcession'], df['Group'] = compile_rules(rules).apply(df, mode)
+        info['rows'] = len(df)
+    return dtypes.categorize(df, dtypes.OUTPUT_COLUMNS)
+
+
+def _rules_key(mode):
+    return 'rd03Rules' if mode == 'RD03' else 'rd05Rules'
+
+
+def rules_from_configs(configs, mode='RD03', profile_id=None):
+    """Pick the active rule set out of an ``/api/app1/configs`` payload."""
+    profiles = configs.get('rd_profiles_v2') or [{
+        'id': 'default',
+        'rd03Rules': configs.get('rd03_rules_v2') or [],
+        'rd05Rules': configs.get('rd05_rules_v2') or [],
+    }]
+    active_id = profile_id or configs.get('rd_active_profile_id') or 'default'
+    profile = next((p for p in profiles if p.get('id') == active_id), profiles[0])
+    return sanitize_rules(profile.get(_rules_key(mode)) or [])
+
+
+def load_rules(source, mode='RD03', profile_id=None):
+    """Load a GroupRule list from a list, a JSON file or a backup/config export.
+
+    Accepts a plain rule list, the configs object, a profile backup
+    (``{"profiles": [...]}``) or an old-style ``{"rd03Rules", "rd05Rules"}`` backup.
+    """
+    data = source
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            data = json.load(f)
+    if isinstance(data, list):
+        return sanitize_rules(data)
+    if 'profiles' in data:
+        data = {'rd_profiles_v2': data['profiles'], 'rd_active_profile_id': data.get('activeProfileId')}
+    elif _rules_key(mode) in data:
+        return sanitize_rules(data[_rules_key(mode)])
+    return rules_from_configs(data, mode, profile_id)
+
+
+def load_rules_from_db(db_path, mode='RD03', profile_id=None):
+    """Read the rule set straight from the main API's ``app1_configs`` table."""
+    con = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        rows = con.execute('SELECT key, value FROM app1_configs').fetchall()
+    finally:
+        con.close()
+    configs = {}
+    for key, value in rows:
+        try:
+            configs[key] = json.loads(value)
+        except (TypeError, ValueError):
+            configs[key] = value
+    return rules_from_configs(configs, mode, profile_id)
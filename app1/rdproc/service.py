@@ -0,0 +1,492 @@
+"""HTTP classification service for the app1 frontend.
+
+The web UI parses and classifies workbooks in the browser
+(``processExcelFile``), which freezes the tab on large exports. This service
+does the same work server-side with the vectorized rules, in a pool of worker
+processes that are started and warmed up (imports, a small classification per
+mode) before the first request:
+
+``POST /api/app1/process?mode=RD03&format=xlsx&name=<file name>``
+    Body: the raw workbook (``fetch(url, {method: 'POST', body: file})``).
+    ``mode`` is detected from the name / header rows when omitted; ``format``
+    is ``xlsx`` (default), ``csv`` or ``parquet``. The rules are the UI rules
+    of the active profile (or ``profile=<id>``) when the service was started
+    with a rules database, otherwise the built-in rules; ``rules=builtin``
+    forces the built-in ones. Returns JSON with the ``SummaryData`` of
+    ``types.ts`` under ``summary``, a ``download`` URL and a ``cube`` URL.
+    When started with ``--store`` the rows are also kept as a run in the
+    SQLite run store (:mod:`rdproc.store`), whose id is ``runId``.
+
+``GET /api/app1/process/<id>/file``
+    Streams the result file. Results are removed after ``RESULT_TTL``.
+
+``GET /api/app1/process/<id>/cube?by=PEA,Group&PEA=<value>``
+    Routes / distance / pole totals from the result's aggregate cube
+    (:mod:`rdproc.cube`), broken down by ``by`` and filtered by any key
+    column given as a parameter (comma separated values).
+
+``POST /api/app1/process/jobs?...``
+    Same parameters (plus ``chunksize``), but returns ``202`` with the job
+    right away and runs it in the background (:mod:`rdproc.jobs`), at most
+    ``max_jobs`` at a time.
+
+``GET /api/app1/process/jobs[/<id>]``
+    All jobs, or one job with its status, progress and the events after
+    ``since=<seq>``; ``wait=<seconds>`` long-polls for the next event. A
+    failed job has a structured ``error`` (type, message, stage, traceback).
+
+``GET /api/app1/process/jobs/<id>/events``
+    The same events as server-sent events (``progress``, then ``end`` with
+    the final job); resumes after ``Last-Event-ID``.
+
+``DELETE /api/app1/process/jobs/<id>``
+    Cancels a job that has not started yet.
+
+``GET /api/app1/process/health``
+    Worker count, uptime and jobs by status.
+
+Errors are returned as ``{"error": message}`` like the Express routes. Run it
+with ``python -m rdproc serve``; the Express ``/api/app1`` router forwards
+``/process`` requests to it.
+"""
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from . import jobs
+from .api import classify
+from .audit import summary_data
+from .batch import detect_mode, output_path, side_path
+from .cube import CUBE_SUFFIX, KEYS, Cube, read_cube, rollup, to_records, write_cube
+from .reader import read_rd
+from .rules import load_rules_from_db
+from .store import RunStore
+from .writer import FORMATS, write_output
+
+PREFIX = '/api/app1/process'
+DEFAULT_PORT = 8001
+MAX_UPLOAD_MB = 200
+RESULT_TTL = 3600
+READ_BLOCK = 1024 * 1024
+SSE_KEEPALIVE = 15
+MAX_POLL_WAIT = 30
+_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_CONTENT_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ServiceError(Exception):
+    """An error reported to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- worker side -----------------------------------------------------------------
+
+def _ready():
+    return os.getpid()
+
+
+def process_upload(path, out_dir, fmt='xlsx', mode=None, rules=None, store=None):
+    """Classify one uploaded workbook; returns ``(mode, output, summary, run_id)``.
+
+    The aggregate cube is written next to the output; with ``store`` the
+    rows are also inserted into that run store (``run_id`` is ``None``
+    otherwise).
+    """
+    mode = mode or detect_mode(path)
+    df = read_rd(path, mode).reset_index(drop=True)
+    df = classify(df, mode, rules)
+    target = output_path(path, out_dir, fmt)
+    write_output(df, target, fmt)
+    write_cube(Cube().update(df), side_path(path, out_dir, CUBE_SUFFIX), mode=mode,
+               source=os.path.basename(path))
+    run_id = None
+    if store:
+        with RunStore(store) as runs:
+            run_id = runs.add_run(df, mode, os.path.basename(path), rules)
+    return mode, target, summary_data(df), run_id
+
+
+# --- server side -----------------------------------------------------------------
+
+class Service:
+    """The worker pool, result directory and rule source shared by requests."""
+
+    def __init__(self, workers=None, out_dir=None, rules_db=None, max_upload_mb=MAX_UPLOAD_MB,
+                 max_jobs=None, store=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs or self.workers
+        self.out_dir = out_dir or tempfile.mkdtemp(prefix='rdservice_')
+        self.rules_db = rules_db
+        self.store = store
+        self.max_upload = max_upload_mb * 1024 ** 2
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.pool = None
+        self.progress = None
+        self.jobs = None
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    def _start_pool(self):
+        start = time.perf_counter()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=jobs.init_worker, initargs=(self.progress,))
+        # ส่งงานว่างให้ครบทุก worker เพื่อให้ทุก process ถูกสร้างและ warm ก่อนรับคำขอจริง
+        for f in [self.pool.submit(_ready) for _ in range(self.workers)]:
+            f.result()
+        print(f"✅ เตรียม worker {self.workers} process เรียบร้อย ({time.perf_counter() - start:.1f} วินาที)")
+
+    def start(self):
+        """Start the pool (waiting until every worker has warmed up) and the job queue."""
+        self.progress = multiprocessing.Queue()
+        self._start_pool()
+        self.jobs = jobs.JobQueue(self.pool, self.progress, self.max_jobs).start()
+        self.jobs.on_broken = self._restart
+        return self
+
+    def close(self):
+        if self.jobs is not None:
+            self.jobs.close()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def _restart(self, broken):
+        with self._lock:
+            if self.pool is not broken:
+                return
+            print('⚠️ worker หยุดทำงานกะทันหัน กำลังเริ่ม worker ชุดใหม่')
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._start_pool()
+            self.jobs.set_executor(self.pool)
+
+    def rules(self, mode, source=None, profile=None):
+        if source == 'builtin' or not self.rules_db:
+            return None
+        return load_rules_from_db(self.rules_db, mode, profile) or None
+
+    def prune(self):
+        """Remove finished jobs and result directories older than ``RESULT_TTL``."""
+        self.jobs.prune(RESULT_TTL)
+        cutoff = time.time() - RESULT_TTL
+        for name in os.listdir(self.out_dir):
+            path = os.path.join(self.out_dir, name)
+            job = self.jobs.get(name)
+            if job is not None and not job.done:
+                continue
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def job_dir(self, job_id):
+        if not _ID_RE.match(job_id):
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบผลลัพธ์')
+        return os.path.join(self.out_dir, job_id)
+
+    def process(self, path, job_dir, fmt, mode, rules):
+        pool = self.pool
+        try:
+            return pool.submit(process_upload, path, job_dir, fmt, mode, rules, self.store).result()
+        except BrokenProcessPool:
+            self._restart(pool)
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, 'worker หยุดทำงานระหว่างประมวลผล กรุณาลองใหม่')
+        except (ValueError, zipfile.BadZipFile) as e:
+            raise _bad_input(e)
+
+    def job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบงานที่ระบุ (อาจหมดอายุแล้ว)')
+        return job
+
+    def health(self):
+        counts = {}
+        for job in self.jobs.list():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {'status': 'ok', 'workers': self.workers, 'maxJobs': self.max_jobs,
+                'jobs': counts, 'rulesDb': bool(self.rules_db), 'uptime': round(time.time() - self.started)}
+
+
+def _bad_input(e):
+    if isinstance(e, zipfile.BadZipFile):
+        return ServiceError(HTTPStatus.BAD_REQUEST, 'ไฟล์ที่อัปโหลดไม่ใช่ไฟล์ Excel (.xlsx)')
+    return ServiceError(HTTPStatus.BAD_REQUEST, str(e))
+
+
+def _number(params, name, cast, default, minimum=0):
+    """Query parameter ``name`` as ``cast``; 400 when it is not a number >= ``minimum``."""
+    try:
+        value = cast(params.get(name) or default)
+    except ValueError:
+        value = None
+    if value is None or not value >= minimum:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"{name} ต้องเป็นตัวเลขตั้งแต่ {minimum} ขึ้นไป")
+    return value
+
+
+def _safe_name(name):
+    name = os.path.basename(name or '').strip() or 'upload.xlsx'
+    if not name.lower().endswith(('.xlsx', '.xlsm', '.xls')):
+        name += '.xlsx'
+    return name
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+    def _json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, handler):
+        try:
+            handler()
+        except ServiceError as e:
+            self._json(e.status, {'error': str(e)})
+        except Exception as e:
+            self._json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"})
+
+    def _parts(self):
+        url = urlsplit(self.path)
+        if not (url.path == PREFIX or url.path.startswith(PREFIX + '/')):
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบเส้นทางที่เรียก')
+        parts = [p for p in url.path[len(PREFIX):].split('/') if p]
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return parts, params
+
+    def do_GET(self):
+        self._route(self._get)
+
+    def do_POST(self):
+        self._route(self._post)
+
+    def do_DELETE(self):
+        self._route(self._delete)
+
+    def _get(self):
+        parts, params = self._parts()
+        if parts == ['health']:
+            return self._json(HTTPStatus.OK, self.service.health())
+        if parts == ['jobs']:
+            return self._json(HTTPStatus.OK, {'jobs': [j.to_dict() for j in self.service.jobs.list()]})
+        if len(parts) == 2 and parts[0] == 'jobs':
+            return self._poll(self.service.job(parts[1]), params)
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+            return self._stream(self.service.job(parts[1]), params)
+        if len(parts) == 2 and parts[1] == 'file':
+            return self._send_file(self.service.job_dir(parts[0]))
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'file':
+            return self._send_file(self.service.job_dir(parts[1]))
+        if len(parts) == 2 and parts[1] == 'cube':
+            return self._cube(self.service.job_dir(parts[0]), params)
+        raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบเส้นทางที่เรียก')
+
+    def _delete(self):
+        parts, _ = self._parts()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบเส้นทางที่เรียก')
+        job = self.service.job(parts[1])
+        if not self.service.jobs.cancel(job.id):
+            raise ServiceError(HTTPStatus.CONFLICT, f"ยกเลิกไม่ได้ งานอยู่ในสถานะ {job.status}")
+        self._json(HTTPStatus.OK, job.to_dict())
+
+    def _since(self, params):
+        since = params.get('since', self.headers.get('Last-Event-ID'))
+        try:
+            return int(since) + 1 if since is not None else 0
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, 'since ต้องเป็นตัวเลข')
+
+    def _poll(self, job, params):
+        """Job state plus the events after ``since``; ``wait`` long-polls."""
+        seen = self._since(params)
+        wait = min(_number(params, 'wait', float, 0), MAX_POLL_WAIT)
+        if wait > 0:
+            self.service.jobs.wait(job, seen, wait)
+        out = job.to_dict()
+        out['events'] = job.events[seen:]
+        done = job.status == jobs.DONE
+        out['download'] = f"{PREFIX}/{job.id}/file" if done else None
+        out['cube'] = f"{PREFIX}/{job.id}/cube" if done else None
+        self._json(HTTPStatus.OK, out)
+
+    def _stream(self, job, params):
+        """Server-sent events: one ``progress`` event per job event, then ``end``."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        seen = self._since(params)
+        try:
+            while True:
+                if not self.service.jobs.wait(job, seen, SSE_KEEPALIVE):
+                    self.wfile.write(b': keep-alive\n\n')
+                for event in job.events[seen:]:
+                    data = json.dumps(event, ensure_ascii=False)
+                    self.wfile.write(f"id: {event['seq']}\nevent: progress\ndata: {data}\n\n".encode('utf-8'))
+                    seen = event['seq'] + 1
+                if job.done and seen >= len(job.events):
+                    data = json.dumps(dict(job.to_dict(), download=f"{PREFIX}/{job.id}/file"
+                                           if job.status == jobs.DONE else None), ensure_ascii=False)
+                    self.wfile.write(f"event: end\ndata: {data}\n\n".encode('utf-8'))
+                    return
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _send_file(self, job_dir):
+        names = os.listdir(job_dir) if os.path.isdir(job_dir) else []
+        results = [n for n in names if '_Processed.' in n]
+        if not results:
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบผลลัพธ์ (อาจหมดอายุแล้ว)')
+        path = os.path.join(job_dir, results[0])
+        fmt = os.path.splitext(path)[1].lstrip('.')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', _CONTENT_TYPES.get(fmt, 'application/octet-stream'))
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(results[0])}")
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, READ_BLOCK)
+
+    def _cube(self, job_dir, params):
+        names = os.listdir(job_dir) if os.path.isdir(job_dir) else []
+        cubes = [n for n in names if n.endswith(CUBE_SUFFIX)]
+        if not cubes:
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบผลลัพธ์ (อาจหมดอายุแล้ว)')
+        by = [c for c in params.get('by', 'PEA,Group').split(',') if c]
+        if any(c not in KEYS for c in by):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"by ต้องเป็นคอลัมน์ใน {', '.join(KEYS)}")
+        where = {k: params[k].split(',') for k in KEYS if k in params}
+        out = rollup(read_cube(os.path.join(job_dir, cubes[0])), by, where)
+        self._json(HTTPStatus.OK, {'by': by, 'where': where, 'rows': to_records(out)})
+
+    def _receive(self, path):
+        """Stream the request body to ``path`` without holding it in memory."""
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise ServiceError(HTTPStatus.LENGTH_REQUIRED, 'ต้องระบุ Content-Length')
+        remaining = _number({'Content-Length': length}, 'Content-Length', int, 0)
+        if remaining <= 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, 'ไม่พบไฟล์ที่อัปโหลด')
+        if remaining > self.service.max_upload:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f"ไฟล์ใหญ่เกิน {self.service.max_upload // 1024 ** 2} MB")
+        with open(path, 'wb') as f:
+            while remaining:
+                block = self.rfile.read(min(READ_BLOCK, remaining))
+                if not block:
+                    raise ServiceError(HTTPStatus.BAD_REQUEST, 'การอัปโหลดไม่สมบูรณ์')
+                f.write(block)
+                remaining -= len(block)
+
+    def _upload(self, params):
+        """Validate the parameters and store the uploaded workbook.
+
+        Returns ``(job_id, job_dir, path, fmt, mode, rules)``.
+        """
+        fmt = params.get('format', 'xlsx')
+        mode = params.get('mode') or None
+        if fmt not in FORMATS:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"format ต้องเป็น {', '.join(FORMATS)}")
+        if mode not in (None, 'RD03', 'RD05'):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, 'mode ต้องเป็น RD03 หรือ RD05')
+
+        self.service.prune()
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.service.out_dir, job_id)
+        os.makedirs(job_dir)
+        path = os.path.join(job_dir, _safe_name(params.get('name')))
+        try:
+            self._receive(path)
+            try:
+                mode = mode or detect_mode(path)
+            except (ValueError, zipfile.BadZipFile) as e:
+                raise _bad_input(e)
+            rules = self.service.rules(mode, params.get('rules'), params.get('profile'))
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        return job_id, job_dir, path, fmt, mode, rules
+
+    def _post(self):
+        parts, params = self._parts()
+        if parts == ['jobs']:
+            return self._submit(params)
+        if parts:
+            raise ServiceError(HTTPStatus.NOT_FOUND, 'ไม่พบเส้นทางที่เรียก')
+        start = time.perf_counter()
+        job_id, job_dir, upload, fmt, mode, rules = self._upload(params)
+        try:
+            mode, target, summary, run_id = self.service.process(upload, job_dir, fmt, mode, rules)
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        finally:
+            if os.path.exists(upload):
+                os.remove(upload)
+        self._json(HTTPStatus.OK, {
+            'id': job_id,
+            'mode': mode,
+            'fileName': os.path.basename(target),
+            'rules': 'builtin' if rules is None else 'ui',
+            'seconds': round(time.perf_counter() - start, 3),
+            'summary': summary,
+            'runId': run_id,
+            'download': f"{PREFIX}/{job_id}/file",
+            'cube': f"{PREFIX}/{job_id}/cube",
+        })
+
+    def _submit(self, params):
+        # ตรวจพารามิเตอร์ก่อนรับไฟล์ จะได้ไม่มีไฟล์ค้างในโฟลเดอร์งานเมื่อค่าผิด
+        chunksize = _number(params, 'chunksize', int, jobs.DEFAULT_CHUNKSIZE, minimum=1)
+        job_id, job_dir, upload, fmt, mode, rules = self._upload(params)
+        job = self.service.jobs.submit(os.path.basename(upload), upload, job_dir, fmt, mode, rules,
+                                       chunksize, remove_input=True, store=self.service.store, job_id=job_id)
+        out = job.to_dict()
+        out.update(rules='builtin' if rules is None else 'ui',
+                   status_url=f"{PREFIX}/jobs/{job.id}", events_url=f"{PREFIX}/jobs/{job.id}/events")
+        self._json(HTTPStatus.ACCEPTED, out)
+
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, workers=None, out_dir=None, rules_db=None,
+          max_upload_mb=MAX_UPLOAD_MB, max_jobs=None, store=None):
+    """Run the service until interrupted."""
+    service = Service(workers, out_dir, rules_db, max_upload_mb, max_jobs, store).start()
+    handler = type('BoundHandler', (Handler,), {'service': service})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    print(f"🚀 RD service พร้อมใช้งานที่ http://{host}:{port}{PREFIX}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
@@ -0,0 +1,295 @@
+"""Coordinate parsing and a grid index over the route segments.
+
+``Start_Coordinates`` / ``End_Coordinates`` hold ``"lat,lon"`` text (also
+``"lat lon"`` or ``"(lat, lon)"``). :func:`parse_coordinates` turns a whole
+column into two float64 arrays in one vectorized pass (pyarrow's regex
+kernel, or pandas without pyarrow); unparsable or out-of-range cells become
+NaN, and pairs written as ``lon,lat`` are swapped back.
+
+:class:`SpatialIndex` is built once per classified dataset. Each route is a
+segment from its start to its end point (a point when one end is missing)
+and is filed under the grid cell of its bounding-box centre, in the first
+grid level (cell size ``cell`` x 2^k) whose cells are at least as large as
+the segment. Each level keeps its routes sorted by cell id, so a query only
+slices one contiguous range per grid row before the exact test. Queries
+return row positions:
+
+* :meth:`SpatialIndex.bbox`: segments whose bounding box meets a box;
+* :meth:`SpatialIndex.radius`: segments within ``meters`` of a point;
+* :meth:`SpatialIndex.polygon`: routes with an end point inside a polygon.
+
+Distances use a local equirectangular projection, which is well under 0.1%
+off over the few kilometres of a radius query. :meth:`SpatialIndex.save`
+stores the index as ``.npz``; :func:`cached_index` keeps it next to the
+dataset and rebuilds it when the dataset changes.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+
+COORDINATE_COLUMNS = ('Start_Coordinates', 'End_Coordinates')
+DEFAULT_CELL = 0.01
+INDEX_SUFFIX = '.spatial.npz'
+INDEX_VERSION = 1
+# เมตรต่อองศาละติจูด และต่อองศาลองจิจูดที่เส้นศูนย์สูตร
+M_PER_DEG_LAT = 110_574.0
+M_PER_DEG_LON = 111_320.0
+_PATTERN = r'^\s*\(?\s*\+?(?P<lat>-?\d+(?:\.\d*)?)\s*(?:,\s*|\s+)\+?(?P<lon>-?\d+(?:\.\d*)?)\s*\)?\s*$'
+
+
+def _parse_arrow(s):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = s.array
+    arr = getattr(values, '_pa_array', None)
+    if arr is None:
+        # ช่องที่เป็นตัวเลข (คอลัมน์ object ของไฟล์ที่ข้อมูลไม่สะอาด) แปลงเป็นข้อความก่อน แล้วจะได้ NaN ตามรูปแบบ
+        text = s.astype(object).map(str, na_action='ignore')
+        arr = pa.array(text.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    m = pc.extract_regex(arr, _PATTERN)
+    if isinstance(m, pa.ChunkedArray):
+        m = m.combine_chunks()
+    # struct_field ให้ค่าว่างกับแถวที่ไม่ตรงรูปแบบ (m.field จะได้ข้อความว่าง)
+    return [np.array(pc.cast(pc.struct_field(m, name), pa.float64()).to_numpy(zero_copy_only=False),
+                     dtype='float64') for name in ('lat', 'lon')]
+
+
+def _parse_pandas(s):
+    parts = s.astype('str').str.extract(_PATTERN)
+    return [pd.to_numeric(parts[name], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            for name in ('lat', 'lon')]
+
+
+def parse_coordinates(s):
+    """Return float64 ``(lat, lon)`` arrays parsed from a text column."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # แปลงเฉพาะค่าที่ไม่ซ้ำ แล้วกระจายกลับด้วยรหัส category
+        lat, lon = parse_coordinates(pd.Series(s.cat.categories.astype('str')))
+        codes = s.cat.codes.to_numpy()
+        lat, lon = np.append(lat, np.nan)[codes], np.append(lon, np.nan)[codes]
+        return lat, lon
+    try:
+        lat, lon = _parse_arrow(s)
+    except ImportError:
+        lat, lon = _parse_pandas(s)
+    swap = (np.abs(lat) > 90) & (np.abs(lon) <= 90)
+    lat[swap], lon[swap] = lon[swap], lat[swap]
+    bad = ~((np.abs(lat) <= 90) & (np.abs(lon) <= 180))
+    lat[bad] = lon[bad] = np.nan
+    return lat, lon
+
+
+def coordinates(df):
+    """``(start_lat, start_lon, end_lat, end_lon)`` arrays of ``df``."""
+    with metrics.stage('parse_coordinates') as info:
+        out = []
+        for col in COORDINATE_COLUMNS:
+            if col in df.columns:
+                out += parse_coordinates(df[col])
+            else:
+                out += [np.full(len(df), np.nan), np.full(len(df), np.nan)]
+        info['rows'] = len(df)
+    return tuple(out)
+
+
+def _meters_per_degree(lat):
+    return M_PER_DEG_LAT, M_PER_DEG_LON * np.cos(np.radians(lat))
+
+
+def _point_segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(length > 0, ((px - ax) * dx + (py - ay) * dy) / length, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(ax + t * dx - px, ay + t * dy - py)
+
+
+def _inside(lat, lon, ring):
+    """Even-odd rule; ``ring`` is an ``(n, 2)`` array of (lat, lon)."""
+    inside = np.zeros(len(lat), dtype=bool)
+    for (lat1, lon1), (lat2, lon2) in zip(ring, np.roll(ring, -1, axis=0)):
+        if lat1 == lat2:
+            continue
+        crosses = (lat1 > lat) != (lat2 > lat)
+        at = lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1)
+        inside ^= crosses & (lon < at)
+    return inside
+
+
+class _Level:
+    """Routes no longer than ``size`` degrees, sorted by the grid cell of
+    their bounding-box centre."""
+
+    def __init__(self, size, nx, order, ids):
+        self.size, self.nx, self.order, self.ids = size, nx, order, ids
+
+    @classmethod
+    def build(cls, size, origin, rows, lat, lon):
+        iy, ix = _cells(size, origin, lat, lon)
+        nx = int(ix.max()) + 2
+        ids = iy * nx + ix
+        order = np.argsort(ids, kind='stable')
+        return cls(size, nx, rows[order], ids[order])
+
+    def candidates(self, origin, min_lat, min_lon, max_lat, max_lon):
+        # เส้นทางยาวไม่เกินหนึ่งช่องและอยู่ในช่องของจุดกึ่งกลาง จึงขยายขอบเขตค้นหาออกไปอีกหนึ่งช่อง
+        (y0, y1), (x0, x1) = _cells(self.size, origin, [min_lat, max_lat], [min_lon, max_lon])
+        x0, x1 = max(x0 - 1, 0), min(x1 + 1, self.nx - 1)
+        if x0 > x1:
+            return []
+        iy = np.arange(max(y0 - 1, 0), max(y1 + 2, 0))
+        lo = np.searchsorted(self.ids, iy * self.nx + x0, 'left')
+        hi = np.searchsorted(self.ids, iy * self.nx + x1, 'right')
+        return [self.order[a:b] for a, b in zip(lo, hi) if b > a]
+
+
+def _cells(size, origin, lat, lon):
+    iy = np.floor((np.asarray(lat) - origin[0]) / size).astype(np.int64)
+    ix = np.floor((np.asarray(lon) - origin[1]) / size).astype(np.int64)
+    return iy, ix
+
+
+class SpatialIndex:
+    """Grid index over route segments; see the module docstring."""
+
+    def __init__(self, start_lat, start_lon, end_lat, end_lon, cell=DEFAULT_CELL):
+        # ปลายที่ไม่มีพิกัดใช้พิกัดของอีกปลายแทน (เส้นทางเป็นจุด)
+        self.start_lat = np.where(np.isnan(start_lat), end_lat, start_lat)
+        self.start_lon = np.where(np.isnan(start_lon), end_lon, start_lon)
+        self.end_lat = np.where(np.isnan(end_lat), self.start_lat, end_lat)
+        self.end_lon = np.where(np.isnan(end_lon), self.start_lon, end_lon)
+        self.cell = cell
+        self.meta = {}
+        self._bounds()
+        self._build()
+
+    def _bounds(self):
+        self.size = len(self.start_lat)
+        self.min_lat = np.fmin(self.start_lat, self.end_lat)
+        self.max_lat = np.fmax(self.start_lat, self.end_lat)
+        self.min_lon = np.fmin(self.start_lon, self.end_lon)
+        self.max_lon = np.fmax(self.start_lon, self.end_lon)
+
+    def _build(self):
+        valid = ~np.isnan(self.min_lat) & ~np.isnan(self.min_lon)
+        rows = np.flatnonzero(valid)
+        self.origin = (float(self.min_lat[rows].min()), float(self.min_lon[rows].min())) if len(rows) else (0.0, 0.0)
+        # เส้นทางที่ยาวกว่าหนึ่งช่องไปอยู่ในชั้นที่ช่องใหญ่ขึ้นทีละเท่าตัว
+        extent = np.fmax(self.max_lat[rows] - self.min_lat[rows], self.max_lon[rows] - self.min_lon[rows])
+        level = np.ceil(np.log2(np.maximum(extent / self.cell, 1.0))).astype(np.int64)
+        self.levels = []
+        for k in np.unique(level):
+            sub = rows[level == k]
+            self.levels.append(_Level.build(
+                self.cell * 2 ** int(k), self.origin, sub,
+                (self.min_lat[sub] + self.max_lat[sub]) / 2, (self.min_lon[sub] + self.max_lon[sub]) / 2))
+
+    @classmethod
+    def from_frame(cls, df, cell=DEFAULT_CELL):
+        return cls(*coordinates(df), cell=cell)
+
+    def __len__(self):
+        return self.size
+
+    def candidates(self, min_lat, min_lon, max_lat, max_lon):
+        """Rows that may meet the box (a superset, in no particular order)."""
+        parts = [np.empty(0, dtype=np.int64)]
+        for level in self.levels:
+            parts += level.candidates(self.origin, min_lat, min_lon, max_lat, max_lon)
+        return np.concatenate(parts)
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Sorted rows whose segment bounding box meets the box."""
+        rows = self.candidates(min_lat, min_lon, max_lat, max_lon)
+        keep = ((self.min_lat[rows] <= max_lat) & (self.max_lat[rows] >= min_lat)
+                & (self.min_lon[rows] <= max_lon) & (self.max_lon[rows] >= min_lon))
+        return np.sort(rows[keep])
+
+    def radius(self, lat, lon, meters):
+        """Rows whose segment passes within ``meters`` of a point.
+
+        Returns ``(rows, distances_m)``, nearest first.
+        """
+        my, mx = _meters_per_degree(lat)
+        dlat, dlon = meters / my, meters / mx
+        rows = self.candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        d = _point_segment_distance(
+            0.0, 0.0,
+            (self.start_lon[rows] - lon) * mx, (self.start_lat[rows] - lat) * my,
+            (self.end_lon[rows] - lon) * mx, (self.end_lat[rows] - lat) * my,
+        )
+        keep = d <= meters
+        rows, d = rows[keep], d[keep]
+        order = np.argsort(d, kind='stable')
+        return rows[order], d[order]
+
+    def polygon(self, ring, how='any'):
+        """Sorted rows with ``how`` = ``'any'`` / ``'all'`` end points inside.
+
+        ``ring`` is a sequence of (lat, lon) vertices (see :func:`read_polygon`).
+        """
+        ring = np.asarray(ring, dtype='float64')
+        rows = self.bbox(ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max())
+        start = _inside(self.start_lat[rows], self.start_lon[rows], ring)
+        end = _inside(self.end_lat[rows], self.end_lon[rows], ring)
+        return rows[start | end] if how == 'any' else rows[start & end]
+
+    def save(self, path, **meta):
+        levels = [[lv.size, lv.nx] for lv in self.levels]
+        info = dict(meta, version=INDEX_VERSION, cell=self.cell, origin=self.origin, levels=levels)
+        arrays = {f'{name}_{k}': getattr(lv, name) for k, lv in enumerate(self.levels) for name in ('order', 'ids')}
+        np.savez(path, start_lat=self.start_lat, start_lon=self.start_lon, end_lat=self.end_lat,
+                 end_lon=self.end_lon, meta=np.array(json.dumps(info)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved index; ``index.meta`` holds what was given to ``save``."""
+        index = cls.__new__(cls)
+        with np.load(path) as data:
+            index.meta = json.loads(str(data['meta']))
+            for name in ('start_lat', 'start_lon', 'end_lat', 'end_lon'):
+                setattr(index, name, data[name])
+            index.levels = [_Level(size, nx, data[f'order_{k}'], data[f'ids_{k}'])
+                            for k, (size, nx) in enumerate(index.meta['levels'])]
+        index.cell, index.origin = index.meta['cell'], tuple(index.meta['origin'])
+        index._bounds()
+        return index
+
+
+def cached_index(df, path, cell=DEFAULT_CELL):
+    """The index of ``df`` read from ``path`` + ``.spatial.npz``, built and
+    saved when missing, older than ``path`` or built for another row count.
+    """
+    index_path = path + INDEX_SUFFIX
+    if os.path.isfile(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(path):
+        try:
+            index = SpatialIndex.load(index_path)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if (index is not None and index.meta.get('version') == INDEX_VERSION
+                and index.size == len(df) and index.cell == cell):
+            return index
+    index = SpatialIndex.from_frame(df, cell)
+    index.save(index_path, source=os.path.basename(path))
+    return index
+
+
+def read_polygon(path):
+    """The outer ring of the first polygon in a GeoJSON file, as (lat, lon)."""
+    with open(path, encoding='utf-8') as f:
+        geo = json.load(f)
+    if geo.get('type') == 'FeatureCollection':
+        geo = geo['features'][0]
+    if geo.get('type') == 'Feature':
+        geo = geo['geometry']
+    coords = geo['coordinates'][0]
+    if geo['type'] == 'MultiPolygon':
+        coords = coords[0]
+    # GeoJSON เรียงเป็น (lon, lat)
+    return [(lat, lon) for lon, lat, *_ in coords]
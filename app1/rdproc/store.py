@@ -0,0 +1,301 @@
+"""Persistent SQLite store of classified routes, one run per classification.
+
+The scripts write every result to its own ``Processed_<file>.xlsx``, so finding
+"which Group was route Tag X in last month" means opening spreadsheets.
+:class:`RunStore` keeps the rows of every run in one SQLite file instead:
+
+* ``runs``: one row per run (id, source file, mode, rule set, time, rows);
+* ``routes``: the ``ROUTE_COLUMNS`` of every row plus its 64-bit content
+  hash, indexed by ``Tag`` and, within a run, by ``PEA``, ``Concession``
+  and ``Group``.
+
+Rows are inserted chunk by chunk in short transactions (several batch
+workers can share a store); a run only becomes visible when
+:meth:`RunWriter.finish` marks it complete. A run whose rows, labels and rule
+set are identical to an existing complete run is dropped, and the existing run id
+is returned instead. :meth:`RunStore.prune` removes old runs (and runs
+left incomplete by a crash).
+
+sqlite3 is in the standard library; DuckDB would need an extra dependency
+for the same point lookups.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from .incremental import row_hashes, state_key
+
+STORE_VERSION = 1
+DEFAULT_STORE = os.path.join(os.path.expanduser('~'), '.local', 'share', 'rdproc', 'runs.sqlite3')
+DEFAULT_RETENTION_DAYS = 400
+# เกินเวลานี้แล้วยังไม่ finish ถือว่า process ที่เขียนหยุดทำงานไปแล้ว
+STALE_SECONDS = 24 * 3600
+ROUTE_COLUMNS = ('Tag', 'PEA', 'Route_Name', 'Owner', 'Concession', 'Line_Type', 'Diameter', 'Cores',
+                 'Total_Poles', 'Poles_in_Area', 'Total_Distance', 'Distance_in_Area',
+                 'Start_Coordinates', 'End_Coordinates', 'GroupConcession', 'Group')
+LABEL_COLUMNS = ('GroupConcession', 'Group')
+FILTER_COLUMNS = ('Tag', 'PEA', 'Concession', 'Group')
+_REAL = ('Diameter', 'Total_Distance', 'Distance_in_Area')
+_INTEGER = ('Cores', 'Total_Poles', 'Poles_in_Area')
+_LABEL_MIX = np.uint64(0xC2B2AE3D27D4EB4F)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    source TEXT,
+    mode TEXT NOT NULL,
+    rules TEXT,
+    created REAL NOT NULL,
+    rows INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_runs_source ON runs (source, created);
+CREATE INDEX IF NOT EXISTS idx_runs_content ON runs (content_hash);
+CREATE TABLE IF NOT EXISTS routes (
+    run_id INTEGER NOT NULL,
+    {', '.join(f'"{c}" {"REAL" if c in _REAL else "INTEGER" if c in _INTEGER else "TEXT"}'
+               for c in ROUTE_COLUMNS)},
+    row_hash INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_routes_tag ON routes ("Tag", run_id);
+CREATE INDEX IF NOT EXISTS idx_routes_pea ON routes (run_id, "PEA");
+CREATE INDEX IF NOT EXISTS idx_routes_concession ON routes (run_id, "Concession");
+CREATE INDEX IF NOT EXISTS idx_routes_group ON routes (run_id, "Group");
+PRAGMA user_version = {STORE_VERSION};
+"""
+
+
+def _quoted(columns):
+    return ', '.join(f'"{c}"' for c in columns)
+
+
+_INSERT = (f'INSERT INTO routes (run_id, {_quoted(ROUTE_COLUMNS)}, row_hash) '
+           f'VALUES ({", ".join("?" * (len(ROUTE_COLUMNS) + 2))})')
+
+
+def _values(s):
+    """Python values for sqlite3, missing as ``None``."""
+    if s.dtype.kind in 'iuf' and isinstance(s.dtype, np.dtype):
+        values = s.to_numpy()
+        if s.dtype.kind == 'f' and np.isnan(values).any():
+            return s.astype(object).where(s.notna(), None).tolist()
+        return values.tolist()
+    return s.astype(object).where(s.notna(), None).tolist()
+
+
+def _content_hashes(df, hashes):
+    """Row hashes with the labels mixed in (``row_hashes`` leaves them out).
+
+    A re-classification that changes a Group must not look like a duplicate.
+    """
+    labels = df[[c for c in LABEL_COLUMNS if c in df.columns]].astype(object)
+    return (hashes * _LABEL_MIX) ^ pd.util.hash_pandas_object(labels, index=False).to_numpy()
+
+
+def _records(df, hashes, run_id):
+    n = len(df)
+    columns = [_values(df[c]) if c in df.columns else [None] * n for c in ROUTE_COLUMNS]
+    return zip([run_id] * n, *columns, hashes.view(np.int64).tolist())
+
+
+class RunWriter:
+    """Rows of one run being inserted; see :meth:`RunStore.begin`."""
+
+    def __init__(self, store, run_id, key):
+        self.store = store
+        self.run_id = run_id
+        self.rows = 0
+        self._hash = hashlib.sha256(key.encode())
+
+    def add(self, df, hashes=None):
+        if hashes is None:
+            _, hashes = row_hashes(df)
+        self._hash.update(_content_hashes(df, hashes).tobytes())
+        with self.store.db:
+            self.store.db.executemany(_INSERT, _records(df, hashes, self.run_id))
+        self.rows += len(df)
+        return self
+
+    def abort(self):
+        self.store._delete([self.run_id])
+
+    def finish(self):
+        """Mark the run complete; returns its id, or that of an identical run."""
+        content = self._hash.hexdigest()
+        db = self.store.db
+        with db:
+            same = self.store.find(content)
+            if same is None:
+                db.execute('UPDATE runs SET rows = ?, content_hash = ?, complete = 1 WHERE run_id = ?',
+                           (self.rows, content, self.run_id))
+        if same is not None:
+            self.abort()
+            return same
+        print(f"บันทึก run {self.run_id} ({self.rows:,} แถว) ลงใน {self.store.path}")
+        return self.run_id
+
+
+class RunStore:
+    """SQLite store of classified runs at ``path`` (created when missing)."""
+
+    def __init__(self, path=None, timeout=60):
+        self.path = path or os.environ.get('RD_STORE', DEFAULT_STORE)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=timeout)
+        if not self.db.execute('PRAGMA user_version').fetchone()[0]:
+            # ต้องตั้งก่อนสร้างตาราง จึงจะคืนพื้นที่ให้ระบบได้หลัง prune
+            self.db.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def begin(self, mode, source=None, rules=None):
+        """Start a run; feed it chunks with ``add`` and call ``finish``."""
+        key = state_key(mode, rules)
+        with self.db:
+            cur = self.db.execute('INSERT INTO runs (source, mode, rules, created) VALUES (?, ?, ?, ?)',
+                                  (source, mode, 'builtin' if rules is None else key, time.time()))
+        return RunWriter(self, cur.lastrowid, key)
+
+    def find(self, content_hash):
+        """Id of the complete run with this content hash, or ``None``."""
+        row = self.db.execute('SELECT run_id FROM runs WHERE content_hash = ? AND complete = 1',
+                              (content_hash,)).fetchone()
+        if row is None:
+            return None
+        print(f"ข้อมูลและกฎเหมือนกับ run {row[0]} ที่เก็บไว้แล้ว จึงไม่บันทึกซ้ำ")
+        return row[0]
+
+    def add_run(self, data, mode, source=None, rules=None):
+        """Store a classified frame (or iterable of chunks); returns the run id."""
+        if isinstance(data, pd.DataFrame):
+            # ทั้งเฟรมอยู่ในหน่วยความจำแล้ว ตรวจว่าซ้ำก่อนเขียนได้เลย
+            _, hashes = row_hashes(data)
+            h = hashlib.sha256(state_key(mode, rules).encode())
+            h.update(_content_hashes(data, hashes).tobytes())
+            same = self.find(h.hexdigest())
+            if same is not None:
+                return same
+            data = [(data, hashes)]
+        else:
+            data = ((chunk, None) for chunk in data)
+        writer = self.begin(mode, source, rules)
+        try:
+            for chunk, hashes in data:
+                writer.add(chunk, hashes)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.finish()
+
+    def _read(self, sql, params=()):
+        return pd.read_sql_query(sql, self.db, params=params)
+
+    def runs(self, source=None):
+        """Complete runs, newest first."""
+        where, params = 'complete = 1', []
+        if source is not None:
+            where += ' AND source = ?'
+            params.append(source)
+        df = self._read(f'SELECT run_id, source, mode, rules, created, rows FROM runs WHERE {where} '
+                        'ORDER BY created DESC, run_id DESC', params)
+        df['created'] = pd.to_datetime(df['created'], unit='s')
+        return df
+
+    def latest(self, source=None):
+        """Id of the newest complete run (of ``source``), or ``None``."""
+        runs = self.runs(source)
+        return None if runs.empty else int(runs['run_id'].iloc[0])
+
+    def lookup(self, tag):
+        """Every stored version of route ``tag``, oldest run first."""
+        df = self._read(f'SELECT r.run_id, runs.source, runs.created, {_quoted(ROUTE_COLUMNS)} '
+                        'FROM routes r JOIN runs USING (run_id) '
+                        'WHERE r."Tag" = ? AND runs.complete = 1 ORDER BY runs.created, r.run_id', (tag,))
+        df['created'] = pd.to_datetime(df['created'], unit='s')
+        return df
+
+    def query(self, run_id=None, limit=None, **filters):
+        """Routes of ``run_id`` (default: the newest run) matching ``filters``.
+
+        ``filters`` are ``FILTER_COLUMNS`` names mapped to a value or a list
+        of values, e.g. ``query(PEA='กฟจ.01', Group=['1.1', '1.2'])``. Like
+        the other lookups, a run that is not complete has no rows.
+        """
+        run_id = self.latest() if run_id is None else run_id
+        where = ['run_id = ?', 'run_id IN (SELECT run_id FROM runs WHERE complete = 1)']
+        params = [run_id]
+        for col, wanted in filters.items():
+            if col not in FILTER_COLUMNS:
+                raise ValueError(f"กรองได้เฉพาะคอลัมน์ {', '.join(FILTER_COLUMNS)}: {col}")
+            wanted = list(wanted) if isinstance(wanted, (list, tuple, set)) else [wanted]
+            where.append(f'"{col}" IN ({", ".join("?" * len(wanted))})')
+            params += [str(w) for w in wanted]
+        sql = f'SELECT {_quoted(ROUTE_COLUMNS)} FROM routes WHERE {" AND ".join(where)}'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        return self._read(sql, params)
+
+    def compare(self, old_run, new_run):
+        """Routes that differ between two runs, matched by ``Tag``.
+
+        ``Change`` is ``added`` / ``removed``, ``relabelled`` (GroupConcession
+        or Group changed) or ``modified`` (other values changed, same labels).
+        """
+        labels = ', '.join(f'{side}."{c}" AS "{c}_{name}"' for c in LABEL_COLUMNS
+                           for side, name in (('o', 'old'), ('n', 'new')))
+        changed = ' OR '.join(f'o."{c}" IS NOT n."{c}"' for c in LABEL_COLUMNS)
+        sql = f"""
+            SELECT n."Tag", n."PEA", {labels},
+                   CASE WHEN o."Tag" IS NULL THEN 'added' WHEN {changed} THEN 'relabelled'
+                        ELSE 'modified' END AS "Change"
+            FROM routes n LEFT JOIN routes o ON o.run_id = :old AND o."Tag" = n."Tag"
+            WHERE n.run_id = :new AND (o."Tag" IS NULL OR o.row_hash IS NOT n.row_hash OR {changed})
+            UNION ALL
+            SELECT o."Tag", o."PEA", {labels}, 'removed'
+            FROM routes o LEFT JOIN routes n ON n.run_id = :new AND n."Tag" = o."Tag"
+            WHERE o.run_id = :old AND n."Tag" IS NULL
+        """
+        return self._read(sql, {'old': old_run, 'new': new_run})
+
+    def _delete(self, run_ids):
+        with self.db:
+            for run_id in run_ids:
+                self.db.execute('DELETE FROM routes WHERE run_id = ?', (run_id,))
+                self.db.execute('DELETE FROM runs WHERE run_id = ?', (run_id,))
+
+    def prune(self, max_age_days=DEFAULT_RETENTION_DAYS, keep_last=None):
+        """Delete runs older than ``max_age_days`` and all but the newest
+        ``keep_last`` runs of each source; returns the deleted run ids.
+        """
+        now = time.time()
+        runs = self._read('SELECT run_id, source, created, complete FROM runs')
+        old = (runs['complete'] == 0) & (runs['created'] < now - STALE_SECONDS)
+        if max_age_days is not None:
+            old |= runs['created'] < now - max_age_days * 86400
+        if keep_last is not None:
+            done = runs[runs['complete'] == 1].sort_values(['created', 'run_id'], ascending=False)
+            rank = done.groupby(done['source'].fillna(''), sort=False).cumcount()
+            old |= runs['run_id'].isin(done.loc[rank >= keep_last, 'run_id'])
+        removed = [int(r) for r in runs.loc[old, 'run_id']]
+        if removed:
+            self._delete(removed)
+            # execute() รัน pragma นี้เพียงขั้นเดียว (คืนพื้นที่หน้าเดียว) จึงใช้ executescript
+            self.db.executescript('PRAGMA incremental_vacuum;')
+            self.db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            print(f"ลบ {len(removed):,} run ออกจาก {self.path}")
+        return removed
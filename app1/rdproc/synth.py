@@ -0,0 +1,183 @@
+"""Synthetic RD03/RD05 exports for benchmarks.
+
+:func:`frame` builds a frame shaped like ``read_rd(..., compact=False)``
+(the ``RD03_COLS``/``RD05_COLS`` layout, text as ``str``, numbers as float /
+int) with value distributions close to a real PEA export: most routes are NT
+or NT-concession fibre, Cores follow the line type, diameters cluster around
+the rule ranges (including their bounds) and a few percent of the cells are
+blank or hold values outside every list. :func:`write_workbook` writes the
+same rows as an export workbook: 8 header rows, a running number in column 0,
+the RD03 ``Date_Edit`` column 21 and some blank ``PEA`` rows.
+
+The output depends only on ``n``, ``mode`` and ``seed``.
+"""
+import numpy as np
+import pandas as pd
+
+from . import concession, rd03
+from .reader import COLUMNS, HEADER_ROWS
+
+# ทุกกลุ่ม Concession กับสัดส่วนโดยประมาณของข้อมูลจริง (ภายในกลุ่มค่าแรกๆ พบบ่อยกว่า)
+CONCESSION_WEIGHTS = [
+    (concession.DIGITAL_LIST, 0.02),
+    (concession.NBTC_LIST, 0.01),
+    (concession.NT_LIST, 0.45),
+    (concession.NT_CONCESSION_LIST, 0.20),
+    (concession.NON_NT_CONCESSION_LIST, 0.25),
+    (['บริษัท ตัวอย่าง จำกัด', 'ไม่ระบุ'], 0.04),
+    ([None], 0.03),
+]
+LINE_TYPE_WEIGHTS = {
+    rd03.FIG8: 0.35, rd03.OFC_DROPWIRE: 0.20, rd03.ADSS: 0.10, rd03.ARSS: 0.03,
+    rd03.CU: 0.12, rd03.CU_DROPWIRE: 0.12, rd03.COAXIAL: 0.05,
+    'เส้นใยแก้วนำแสง(อื่นๆ)': 0.01, None: 0.02,
+}
+# (ค่า Cores, สัดส่วน) และช่วง Diameter (mm) ตามชนิดสาย
+FIBRE_CORES = ([4, 6, 12, 24, 48, 60, 96, 120], [0.03, 0.03, 0.30, 0.25, 0.15, 0.08, 0.06, 0.10])
+DROPWIRE_CORES = ([1, 2, 4], [0.5, 0.4, 0.1])
+CU_CORES = ([1, 2, 10, 50, 100], [0.3, 0.3, 0.2, 0.1, 0.1])
+PROFILES = {
+    rd03.FIG8: (FIBRE_CORES, (10, 22)),
+    rd03.ADSS: (FIBRE_CORES, (8, 14)),
+    rd03.ARSS: (FIBRE_CORES, (8, 14)),
+    rd03.OFC_DROPWIRE: (DROPWIRE_CORES, (3, 9)),
+    rd03.CU: (CU_CORES, (5, 30)),
+    rd03.CU_DROPWIRE: (DROPWIRE_CORES, (3, 9)),
+}
+OTHER_PROFILE = (FIBRE_CORES, (3, 30))
+MISSING_RATE = 0.02
+BLANK_PEA_RATE = 0.01
+PEAS = [f'กฟจ.{i:02d}' for i in range(1, 13)]
+OWNERS = ['NT', 'AIS', 'TRUE', '3BB', 'DTAC', 'CATV']
+SPAN_KM = 0.04
+# กรอบพิกัดประเทศไทย (lat, lon)
+BBOX = (5.6, 97.3, 20.5, 105.6)
+
+
+def _choice(rng, values, weights, n):
+    weights = np.asarray(weights, dtype=float)
+    idx = rng.choice(len(values), n, p=weights / weights.sum())
+    return np.array(values, dtype=object)[idx]
+
+
+def _concessions(rng, n):
+    values, weights = [], []
+    for group, share in CONCESSION_WEIGHTS:
+        rank = 1.0 / np.arange(1, len(group) + 1)
+        values += list(group)
+        weights += list(share * rank / rank.sum())
+    return _choice(rng, values, weights, n)
+
+
+def _blank(rng, values, rate=MISSING_RATE):
+    values[rng.random(len(values)) < rate] = np.nan
+    return values
+
+
+def _text(values):
+    # ค่าว่างต้องยังว่างอยู่ (astype('str') บน pandas 2 จะได้ข้อความ 'None'/'nan')
+    return pd.Series(values, dtype=object).map(str, na_action='ignore')
+
+
+def _degrees(values):
+    # จัดรูปแบบทศนิยม 6 ตำแหน่งผ่านจำนวนเต็ม ซึ่งเร็วกว่าแปลง float เป็นข้อความโดยตรงมาก
+    micro = np.round(values * 1e6).astype(np.int64)
+    return _text(micro // 1000000) + '.' + _text(micro % 1000000 + 1000000).str.slice(1)
+
+
+def _coordinates(lat, lon):
+    return _degrees(lat) + ',' + _degrees(lon)
+
+
+def frame(n, mode='RD03', seed=0):
+    """Return ``n`` synthetic rows in the ``mode`` layout (un-normalized)."""
+    rng = np.random.default_rng(seed)
+    line_types = _choice(rng, list(LINE_TYPE_WEIGHTS), list(LINE_TYPE_WEIGHTS.values()), n)
+
+    cores = np.full(n, np.nan)
+    diameter = np.full(n, np.nan)
+    for line_type in [*PROFILES, None]:
+        if line_type is None:
+            rows = ~np.isin(line_types, list(PROFILES))
+            (values, weights), (lo, hi) = OTHER_PROFILE
+        else:
+            rows = line_types == line_type
+            (values, weights), (lo, hi) = PROFILES[line_type]
+        k = int(rows.sum())
+        cores[rows] = _choice(rng, values, weights, k).astype(float)
+        # ครึ่งมิลลิเมตร เพื่อให้มีค่าตรงขอบช่วงของกฎพอสมควร
+        diameter[rows] = rng.integers(lo * 2, hi * 2 + 1, k) / 2
+    cores[line_types == rd03.COAXIAL] = np.nan
+
+    distance = np.round(rng.lognormal(-1.5, 1.0, n), 3)
+    distance[rng.random(n) < 0.03] = 0.0
+    in_area = np.floor(distance * rng.random(n) * 1000) / 1000
+    poles = np.maximum(1, np.round(distance / SPAN_KM)).astype(np.int64)
+    poles_in_area = np.floor(poles * rng.random(n)).astype(np.int64)
+
+    lat0, lon0, lat1, lon1 = BBOX
+    start_lat = rng.uniform(lat0, lat1, n)
+    start_lon = rng.uniform(lon0, lon1, n)
+    angle = rng.uniform(0, 2 * np.pi, n)
+    end_lat = start_lat + np.sin(angle) * distance / 111.0
+    end_lon = start_lon + np.cos(angle) * distance / 111.0
+
+    number = np.arange(1, n + 1)
+    data = {
+        'PEA': _text(_choice(rng, PEAS, np.ones(len(PEAS)), n)),
+        'Route_Name': _text(pd.Series(number % 997).map('เส้นทาง {}'.format)),
+        'Tag': _text(pd.Series(number).map('R{:08d}'.format)),
+        'Owner': _text(_choice(rng, OWNERS, [0.5, 0.15, 0.15, 0.1, 0.05, 0.05], n)),
+        'Concession': _text(_concessions(rng, n)),
+        'Line_Type': _text(line_types),
+        'Diameter': _blank(rng, diameter),
+        'Cores': _blank(rng, cores),
+        'Total_Poles': poles,
+        'Poles_in_Area': poles_in_area,
+        'Total_Distance': _blank(rng, distance),
+        'Distance_in_Area': in_area,
+        'Installation': _text(_choice(rng, ['พาดสาย', 'ร้อยท่อ'], [0.9, 0.1], n)),
+        'Notes': _text(_choice(rng, [None, 'ตรวจสอบแล้ว'], [0.8, 0.2], n)),
+        'Compensation': _text(_choice(rng, [None, 'ชำระแล้ว', 'ค้างชำระ'], [0.6, 0.3, 0.1], n)),
+        'Start_Coordinates': _coordinates(start_lat, start_lon),
+        'End_Coordinates': _coordinates(end_lat, end_lon),
+        'Tag_of_Poles_Pass': _text(pd.Series(poles).map('P{}'.format)),
+        'Data_Source': _text(_choice(rng, ['TAMS', 'Mobile'], [0.7, 0.3], n)),
+        'Username': _text(_choice(rng, ['user01', 'user02', 'user03'], [1, 1, 1], n)),
+        'Name_Lastname': _text(_choice(rng, ['สมชาย ใจดี', 'สมหญิง รักงาน'], [1, 1], n)),
+        'Date_Edit': _text(_choice(rng, ['2024-01-15', '2024-02-20', '2024-03-05'], [1, 1, 1], n)),
+    }
+    return pd.DataFrame({col: data[col] for col in COLUMNS[mode]})
+
+
+def write_workbook(path, n, mode='RD03', seed=0):
+    """Write ``n`` synthetic rows as an RD export workbook; returns the frame.
+
+    Rows with a blank ``PEA`` are added on top of ``n`` (the readers drop
+    them). Uses xlsxwriter ``constant_memory``; one sheet holds at most
+    1,048,576 rows.
+    """
+    import xlsxwriter
+
+    df = frame(n, mode, seed)
+    rng = np.random.default_rng(seed + 1)
+    blank = rng.random(n) < BLANK_PEA_RATE
+    wb = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+    ws = wb.add_worksheet()
+    for r in range(HEADER_ROWS):
+        ws.write(r, 0, f'รายงาน {mode} แถวหัวเรื่อง {r + 1}')
+    r = HEADER_ROWS
+    for i, rec in enumerate(df.itertuples(index=False)):
+        if blank[i]:
+            ws.write(r, 2, 'แถวสรุป')
+            r += 1
+        ws.write(r, 0, i + 1)
+        for j, v in enumerate(rec, start=1):
+            if v is not None and v == v:
+                ws.write(r, j, v)
+        if mode == 'RD03':
+            # RD03 บางไฟล์มีคอลัมน์ Date_Edit ต่อท้าย (คอลัมน์ 21) ซึ่งตัวอ่านตัดทิ้ง
+            ws.write(r, len(rec) + 1, '2024-01-15')
+        r += 1
+    wb.close()
+    return df
@@ -0,0 +1,187 @@
+"""Output stage for classified RD frames.
+
+``write_output`` takes a DataFrame or an iterable of chunks (e.g. from
+``reader.iter_classified``) and writes:
+
+* ``xlsx``: xlsxwriter in ``constant_memory`` mode, rows streamed in order;
+  rolls over to a new sheet past Excel's row limit;
+* ``csv``: UTF-8 with BOM so Excel shows Thai text correctly;
+* ``parquet``: pyarrow, one row group per chunk.
+
+Every call returns (and prints) the write time and output size;
+``read_output`` reads any of them back.
+"""
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .dtypes import stringify
+
+FORMATS = ('xlsx', 'csv', 'parquet')
+EXCEL_MAX_ROWS = 1048576
+
+
+def _as_chunks(data):
+    if isinstance(data, pd.DataFrame):
+        return [data]
+    return data
+
+
+def output_format(path, fmt=None):
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.') or 'xlsx').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported output format: {fmt!r} (use one of {', '.join(FORMATS)})")
+    return fmt
+
+
+def _write_xlsx(chunks, path):
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+    })
+    header_fmt = wb.add_format({'bold': True})
+    date_fmt = wb.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    ws = None
+    columns = None
+    r = 0
+    rows = 0
+
+    def new_sheet():
+        sheet = wb.add_worksheet(f"Sheet{len(wb.worksheets()) + 1}")
+        sheet.write_row(0, 0, [str(c) for c in columns], header_fmt)
+        return sheet
+
+    try:
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+                ws = new_sheet()
+            for row in chunk.itertuples(index=False, name=None):
+                r += 1
+                if r >= EXCEL_MAX_ROWS:
+                    ws = new_sheet()
+                    r = 1
+                for c, v in enumerate(row):
+                    if v is None or v is pd.NA or v is pd.NaT:
+                        continue
+                    if isinstance(v, str):
+                        ws.write_string(r, c, v)
+                    elif isinstance(v, (bool, np.bool_)):
+                        ws.write_boolean(r, c, bool(v))
+                    elif isinstance(v, (int, float, np.integer, np.floating)):
+                        if v == v and not np.isinf(v):
+                            ws.write_number(r, c, v)
+                    elif isinstance(v, datetime.datetime):
+                        ws.write_datetime(r, c, v, date_fmt)
+                    else:
+                        ws.write_string(r, c, str(v))
+            rows += len(chunk)
+        if columns is None:
+            wb.add_worksheet()
+    finally:
+        wb.close()
+    return rows
+
+
+def _write_csv(chunks, path):
+    rows = 0
+    first = True
+    for chunk in chunks:
+        chunk.to_csv(path, index=False, header=first, mode='w' if first else 'a',
+                     encoding='utf-8-sig' if first else 'utf-8')
+        first = False
+        rows += len(chunk)
+    if first:
+        open(path, 'w').close()
+    return rows
+
+
+def _parquet_schema(chunk):
+    """Numbers, dates and bools as pyarrow infers them; every other column as string.
+
+    Inferring text columns from the first chunk would give ``null`` for a
+    column that happens to be empty there, which later chunks cannot be cast to.
+    """
+    import pyarrow as pa
+
+    api = pd.api.types
+    fields = []
+    for col in chunk.columns:
+        dtype = chunk[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            numeric = api.is_numeric_dtype(dtype.categories.dtype) and len(dtype.categories)
+            values = pa.Schema.from_pandas(chunk[[col]], preserve_index=False).field(col).type.value_type \
+                if numeric else pa.string()
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), values)))
+        elif api.is_numeric_dtype(dtype) or api.is_bool_dtype(dtype) or api.is_datetime64_any_dtype(dtype):
+            fields.append(pa.Schema.from_pandas(chunk[[col]], preserve_index=False).field(col))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def _write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            if writer is None:
+                writer = pq.ParquetWriter(path, _parquet_schema(chunk))
+            # คอลัมน์ object ที่มีทั้งตัวเลขและข้อความ (เช่น Route_Name, Tag) แปลงเป็นข้อความก่อน
+            table = pa.Table.from_pandas(stringify(chunk), schema=writer.schema, preserve_index=False, safe=False)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+_WRITERS = {'xlsx': _write_xlsx, 'csv': _write_csv, 'parquet': _write_parquet}
+
+
+def write_output(data, path, fmt=None):
+    """Write a frame or chunk iterable to ``path``; returns a report dict.
+
+    ``fmt`` defaults to the file extension. The report has ``path``,
+    ``format``, ``rows``, ``seconds`` and ``bytes``.
+    """
+    fmt = output_format(path, fmt)
+    start = time.perf_counter()
+    with metrics.stage('write') as info:
+        rows = info['rows'] = _WRITERS[fmt](_as_chunks(data), path)
+    report = {
+        'path': path,
+        'format': fmt,
+        'rows': rows,
+        'seconds': round(time.perf_counter() - start, 3),
+        'bytes': os.path.getsize(path),
+    }
+    print(f"บันทึกไฟล์สำเร็จ : {path} ({rows:,} แถว, {report['seconds']:.2f} วินาที, "
+          f"{report['bytes'] / 1024 ** 2:.1f} MB)")
+    return report
+
+
+def read_output(path, columns=None):
+    """Read back a file written by ``write_output`` (all sheets of an xlsx).
+
+    ``columns`` limits the columns read.
+    """
+    fmt = output_format(path)
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns, encoding='utf-8-sig', low_memory=False)
+    sheets = pd.read_excel(path, sheet_name=None, usecols=columns)
+    return pd.concat(sheets.values(), ignore_index=True)
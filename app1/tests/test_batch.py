@@ -0,0 +1,28 @@
+import pytest
+
+from rdproc import synth
+from rdproc.batch import detect_mode, output_stems
+
+
+@pytest.mark.parametrize('name, mode', [
+    ('RD03.xlsx', 'RD03'), ('rd05_jan.xlsx', 'RD05'), ('PEA RD-3 2024.xlsx', 'RD03'),
+    ('2024_RD_05.xlsx', 'RD05'), ('x/RD5.xlsx', 'RD05'),
+])
+def test_mode_from_file_name(name, mode):
+    assert detect_mode(name) == mode
+
+
+@pytest.mark.parametrize('name, mode', [
+    ('record3.xlsx', 'RD05'), ('board5_jan.xlsx', 'RD03'), ('RD035.xlsx', 'RD05'), ('RD30.xlsx', 'RD03'),
+])
+def test_words_containing_rd_fall_back_to_the_header(tmp_path, name, mode):
+    path = str(tmp_path / name)
+    synth.write_workbook(path, 5, mode)
+    assert detect_mode(path) == mode
+
+
+def test_same_named_workbooks_get_distinct_stems():
+    stems = output_stems(['a/RD03.xlsx', 'b/RD03.xlsx', 'b/RD05.xlsx'])
+    assert stems['b/RD05.xlsx'] == 'RD05'
+    assert stems['a/RD03.xlsx'] != stems['b/RD03.xlsx']
+    assert all(s.startswith('RD03_') for p, s in stems.items() if p.endswith('RD03.xlsx'))
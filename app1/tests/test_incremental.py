@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from rdproc import dtypes, synth
+from rdproc.api import classify
+from rdproc.incremental import classify_incremental, state_key
+
+RULES = [{'id': '1.1', 'resultValue': '1.1', 'targetField': 'Group', 'priority': 1,
+          'conditions': [{'column': 'Line_Type', 'operator': 'equals', 'value': 'Fig.8'}]}]
+
+
+def _normalized(raw):
+    return dtypes.normalize(raw.reset_index(drop=True), verbose=False)
+
+
+def _labels(df):
+    return df[['GroupConcession', 'Group']].astype(object).fillna('-').to_numpy()
+
+
+def _edited(raw):
+    """Edit, delete and add rows; some added rows re-use deleted Tags."""
+    df = raw.copy()
+    df.loc[10:59, 'Line_Type'] = 'Fig.8'
+    df.loc[60:79, 'Cores'] = 999.0
+    df.loc[80:89, 'Date_Edit'] = '2024-04-01'
+    df = df.drop(index=range(100, 200))
+    added = synth.frame(150, seed=2)
+    added.loc[:49, 'Tag'] = raw.loc[100:149, 'Tag'].to_numpy()
+    added.loc[50:, 'Tag'] = [f'N{i:08d}' for i in range(100)]
+    return pd.concat([df, added], ignore_index=True)
+
+
+def test_incremental_matches_full_classification(tmp_path):
+    state = str(tmp_path / 'rd03.state')
+    raw = synth.frame(2000, seed=1)
+    first, report = classify_incremental(_normalized(raw), 'RD03', state)
+    assert report['classified'] == report['new'] == 2000
+
+    df = _normalized(_edited(raw))
+    out, report = classify_incremental(df, 'RD03', state)
+    full = classify(df.copy(), 'RD03')
+    assert np.array_equal(_labels(out), _labels(full))
+    assert report['rows'] == 2050
+    assert report['removed'] == 50
+    # Date_Edit ไม่นับเป็นการแก้ไข และแถวที่เป็น Fig.8 อยู่แล้วก็ไม่เปลี่ยน
+    edited = int((raw.loc[10:59, 'Line_Type'] != 'Fig.8').sum()) + 20
+    assert report['modified'] == edited + 50
+    assert report['new'] == 100
+    assert report['unchanged'] == 2050 - 150 - edited
+    assert report['classified'] < len(df)
+
+    again, report = classify_incremental(df, 'RD03', state)
+    assert report['classified'] == 0
+    assert np.array_equal(_labels(again), _labels(full))
+
+
+def test_changed_rules_force_a_full_run(tmp_path):
+    state = str(tmp_path / 'rd03.state')
+    df = _normalized(synth.frame(500, seed=3))
+    assert state_key('RD03') != state_key('RD03', RULES)
+    assert state_key('RD03', RULES) != state_key('RD03', [dict(RULES[0], resultValue='1.2')])
+
+    classify_incremental(df, 'RD03', state)
+    out, report = classify_incremental(df, 'RD03', state, rules=RULES)
+    assert report['classified'] == len(df)
+    assert np.array_equal(_labels(out), _labels(classify(df.copy(), 'RD03', RULES)))
+
+    _, report = classify_incremental(df, 'RD03', state, rules=RULES)
+    assert report['classified'] == 0
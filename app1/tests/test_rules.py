@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdproc.rules import NOT_FOUND, apply_rules
+
+
+def _rule(value, conditions, target='Group', priority=0, **extra):
+    return dict(id=f'r-{value}', resultValue=value, targetField=target, priority=priority,
+                conditions=conditions, **extra)
+
+
+def _hits(values, operator, target):
+    df = pd.DataFrame({'X': pd.Series(values, dtype=object)})
+    out = apply_rules(df, [_rule('1.1', [{'column': 'X', 'operator': operator, 'value': target}])])
+    return (out['Group'].astype(object) == '1.1').tolist()
+
+
+@pytest.mark.parametrize('operator, target, values, expected', [
+    ('equals', ' Fig.8 ', ['Fig.8', 'fig.8', ' Fig.8', None], [True, False, True, False]),
+    ('equals', '12', [12, 12.0, '12', 12.5], [True, True, True, False]),
+    ('equals', '0', [0, '0', None], [False, True, False]),
+    ('not_equals', 'Fig.8', ['Fig.8', 'Duct', None, ''], [False, True, True, True]),
+    ('contains', ' PEA ', ['xpeax', 'PEA-1', 'TOT', None], [True, True, False, False]),
+    ('in_list', 'TOT, TRUE ,AIS', ['TRUE', 'AIS', 'DTAC', None], [True, True, False, False]),
+    ('in_list', [12, '24'], [12, '24', 48.0, None], [True, True, False, False]),
+    ('not_in_list', 'TOT,TRUE', ['TRUE', 'AIS', None], [False, True, True]),
+    ('between', ['10', 20], [10, '15mm', 20.0, 20.5, None], [True, True, True, False, False]),
+    ('between', [0, '5'], [None, '', 'abc', 6], [True, True, True, False]),
+    ('gt', '1e2', ['1e3', 100, '101.5', 'abc'], [True, False, True, False]),
+    ('gte', 100, ['100', 99.9, '100abc'], [True, False, True]),
+    ('lt', '0.5', [None, '0.4', '.6', 'x'], [True, True, False, True]),
+    ('lte', '-1', ['-1', '-2.5', 0], [True, True, False]),
+    ('unknown', 'x', ['x', None], [False, False]),
+])
+def test_operators_follow_check_condition(operator, target, values, expected):
+    assert _hits(values, operator, target) == expected
+
+
+def test_categorical_and_missing_cells_match_like_js():
+    df = pd.DataFrame({'X': pd.Categorical(['C', None, 'B', 'A']),
+                       'Y': pd.Series([np.nan, 3.0, 'B', pd.NA], dtype=object)})
+    out = apply_rules(df, [_rule('1.1', [{'column': 'X', 'operator': 'equals', 'value': 'A'}]),
+                           _rule('1.2', [{'column': 'Y', 'operator': 'equals', 'value': ''},
+                                         {'column': 'Missing', 'operator': 'equals', 'value': ''}])])
+    assert out['Group'].astype(object).tolist() == ['1.2', NOT_FOUND, NOT_FOUND, '1.1']
+
+
+def test_priority_order_and_first_group_match_stops_the_row():
+    df = pd.DataFrame({'Line_Type': ['Fig.8', 'Fig.8', 'Duct'], 'Cores': [12, 24, 12]})
+    rules = [
+        _rule('2.1', [{'column': 'Line_Type', 'operator': 'equals', 'value': 'Fig.8'}], priority=2),
+        _rule('1.1', [{'column': 'Cores', 'operator': 'equals', 'value': '12'}], priority=1),
+        _rule('9.9', [], priority=3),
+    ]
+    out = apply_rules(df, rules)
+    assert out['Group'].astype(object).tolist() == ['1.1', '2.1', '1.1']
+
+
+def test_group_concession_rules_do_not_stop_and_feed_later_rules():
+    df = pd.DataFrame({'Concession': ['TOT', 'TRUE', 'AIS']})
+    rules = [
+        _rule('TOT group', [{'column': 'Concession', 'operator': 'in_list', 'value': 'TOT,TRUE'}],
+              target='GroupConcession', priority=1),
+        _rule('TRUE group', [{'column': 'Concession', 'operator': 'equals', 'value': 'TRUE'}],
+              target='GroupConcession', priority=2),
+        _rule('1.1', [{'column': 'GroupConcession', 'operator': 'equals', 'value': 'TRUE group'}], priority=3),
+    ]
+    out = apply_rules(df, rules)
+    assert out['GroupConcession'].astype(object).tolist() == ['TOT group', 'TRUE group', NOT_FOUND]
+    assert out['Group'].astype(object).tolist() == [NOT_FOUND, '1.1', NOT_FOUND]
+
+
+def test_only_if_empty_skips_rows_whose_target_is_already_set():
+    df = pd.DataFrame({'Concession': ['TOT', 'TRUE', 'AIS']})
+    rules = [
+        _rule('first', [{'column': 'Concession', 'operator': 'equals', 'value': 'TOT'}],
+              target='GroupConcession', priority=1),
+        _rule('fallback', [], target='GroupConcession', priority=2, onlyIfEmpty=True),
+        _rule('override', [{'column': 'Concession', 'operator': 'equals', 'value': 'AIS'}],
+              target='GroupConcession', priority=3, onlyIfEmpty=True),
+    ]
+    out = apply_rules(df, rules)
+    assert out['GroupConcession'].astype(object).tolist() == ['first', 'fallback', 'fallback']
+
+
+def test_rd05_default_group_counts_as_empty():
+    df = pd.DataFrame({'Cores': [12, 24]})
+    rules = [_rule('5.1', [{'column': 'Cores', 'operator': 'gt', 'value': 20}], priority=1, onlyIfEmpty=True)]
+    out = apply_rules(df, rules, mode='RD05')
+    assert out['Group'].astype(object).tolist() == ['3.0', '5.1']
+
+
+def test_result_value_falls_back_to_name_or_id():
+    df = pd.DataFrame({'X': ['a']})
+    rules = [{'id': 'gc-1', 'name': 'Named', 'targetField': 'GroupConcession', 'conditions': []},
+             {'id': '4.2', 'name': 'ignored', 'targetField': 'Group', 'conditions': []}]
+    out = apply_rules(df, rules)
+    assert out['GroupConcession'].astype(object).tolist() == ['Named']
+    assert out['Group'].astype(object).tolist() == ['4.2']
@@ -0,0 +1,84 @@
+import time
+
+import pandas as pd
+import pytest
+
+from rdproc import dtypes, synth
+from rdproc.api import classify
+from rdproc.store import RunStore
+
+
+@pytest.fixture
+def runs(tmp_path):
+    with RunStore(str(tmp_path / 'runs.sqlite3')) as store:
+        yield store
+
+
+@pytest.fixture(scope='module')
+def classified():
+    df = dtypes.normalize(synth.frame(300, seed=4), verbose=False)
+    return classify(df, 'RD03')
+
+
+def _relabelled(df, row, group='9.9'):
+    out = df.copy()
+    out['Group'] = out['Group'].astype(object)
+    out.loc[row, 'Group'] = group
+    return out
+
+
+def test_identical_runs_are_stored_once(runs, classified):
+    first = runs.add_run(classified, 'RD03', 'a.xlsx')
+    assert runs.add_run(classified, 'RD03', 'a.xlsx') == first
+    chunks = (classified.iloc[i:i + 100] for i in range(0, len(classified), 100))
+    assert runs.add_run(chunks, 'RD03', 'a.xlsx') == first
+    assert runs.add_run(_relabelled(classified, 0), 'RD03', 'a.xlsx') != first
+    assert runs.add_run(classified, 'RD05', 'a.xlsx') != first
+    assert len(runs.runs()) == 3
+    assert len(runs.query(first)) == len(classified)
+
+
+def test_query_ignores_incomplete_runs(runs, classified):
+    writer = runs.begin('RD03', 'a.xlsx').add(classified)
+    assert runs.query(writer.run_id).empty
+    assert runs.latest() is None
+    assert writer.finish() == writer.run_id
+    assert len(runs.query(writer.run_id, PEA=classified['PEA'].iloc[0])) > 0
+    with pytest.raises(ValueError):
+        runs.query(writer.run_id, Owner='x')
+
+
+def test_compare_reports_each_kind_of_change(runs, classified):
+    old = runs.add_run(classified, 'RD03', 'a.xlsx')
+    new_df = _relabelled(classified, 1).drop(index=[2, 3])
+    new_df['Route_Name'] = new_df['Route_Name'].astype(object)
+    new_df.loc[4, 'Route_Name'] = 'เส้นทางใหม่'
+    added = classified.iloc[[5]].assign(Tag='NEW-1')
+    new = runs.add_run(pd.concat([new_df, added]), 'RD03', 'a.xlsx')
+
+    diff = runs.compare(old, new).set_index('Tag')
+    tags = classified['Tag'].astype(object)
+    assert diff['Change'].value_counts().to_dict() == {'removed': 2, 'relabelled': 1, 'modified': 1, 'added': 1}
+    assert diff.loc[tags[1], 'Change'] == 'relabelled'
+    assert diff.loc[tags[1], 'Group_new'] == '9.9'
+    assert diff.loc[tags[4], 'Change'] == 'modified'
+    assert set(diff.index[diff['Change'] == 'removed']) == {tags[2], tags[3]}
+    assert diff.loc['NEW-1', 'Change'] == 'added'
+    assert runs.compare(old, old).empty
+
+
+def test_prune_by_age_count_and_stale_incomplete_runs(runs, classified):
+    ids = [runs.add_run(_relabelled(classified, 0, f'9.{i}'), 'RD03', 'a.xlsx') for i in range(3)]
+    other = runs.add_run(classified, 'RD03', 'b.xlsx')
+    stale = runs.begin('RD03', 'a.xlsx').add(classified).run_id
+    running = runs.begin('RD03', 'a.xlsx').run_id
+    now = time.time()
+    with runs.db:
+        for age, run_id in zip((10, 9, 8, 500, 2), (*ids, other, stale)):
+            runs.db.execute('UPDATE runs SET created = ? WHERE run_id = ?', (now - age * 86400, run_id))
+
+    assert sorted(runs.prune(max_age_days=400, keep_last=2)) == sorted([ids[0], other, stale])
+    assert sorted(runs.runs()['run_id']) == sorted(ids[1:])
+    assert runs.db.execute('SELECT COUNT(*) FROM routes WHERE run_id IN (?, ?)', (ids[0], stale)).fetchone() == (0,)
+    assert runs.prune(max_age_days=None, keep_last=1) == [ids[1]]
+    assert runs.db.execute('SELECT complete FROM runs WHERE run_id = ?', (running,)).fetchone() == (0,)
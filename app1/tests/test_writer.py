@@ -0,0 +1,24 @@
+import pandas as pd
+
+from rdproc.writer import read_output, write_output
+
+
+def test_parquet_chunks_with_null_first_chunk_and_mixed_types(tmp_path):
+    df = pd.DataFrame({
+        'Tag': pd.Series([10, 'T11', 12, 13], dtype=object),
+        'Route_Name': pd.Series([1, 'เส้นทาง 2', 3.5, None], dtype=object),
+        'Notes': pd.Series([None, None, 'x', None], dtype=object),
+        'Cores': pd.array([12, None, 24, 48], dtype='Int16'),
+        'Group': pd.Categorical(['1.1', None, '4.1.1', '1.1']),
+    })
+    path = str(tmp_path / 'out.parquet')
+    report = write_output((df.iloc[i:i + 2] for i in range(0, len(df), 2)), path)
+
+    out = read_output(path)
+    assert report['rows'] == 4
+    assert out['Tag'].tolist() == ['10', 'T11', '12', '13']
+    assert out['Route_Name'].tolist()[:3] == ['1', 'เส้นทาง 2', '3.5']
+    assert out['Route_Name'].isna().tolist() == [False, False, False, True]
+    assert out['Notes'].isna().tolist() == [True, True, False, True]
+    assert out['Cores'].tolist()[::2] == [12, 24]
+    assert out['Group'].astype(object).tolist()[::2] == ['1.1', '4.1.1']
@@ -1,6 +1,7 @@
 'use strict';
 
 const express = require('express');
+const http = require('http');
 const router = express.Router();
 const { getDB } = require('../db');
 // No authentication required for now, or use verifyToken if needed.
@@ -53,4 +54,25 @@ router.post('/configs', (req, res) => {
     }
 });
 
+// /api/app1/process* -> Python RD classification service (python -m rdproc serve)
+const RD_SERVICE_URL = process.env.RD_SERVICE_URL || 'http://127.0.0.1:8001';
+
+router.use('/process', (req, res) => {
+    const target = new URL(req.originalUrl, RD_SERVICE_URL);
+    const upstream = http.request(target, {
+        method: req.method,
+        headers: { ...req.headers, host: target.host },
+    }, (response) => {
+        res.writeHead(response.statusCode, response.headers);
+        response.pipe(res);
+    });
+    upstream.on('error', (err) => {
+        if (!res.headersSent) {
+            res.status(502).json({ error: `RD service unavailable: ${err.message}` });
+        }
+    });
+    // The workbook is streamed through as-is (express.json only parses JSON bodies)
+    req.pipe(upstream);
+});
+
 module.exports = router;
@@ -21,6 +21,13 @@ PORT=3004 node index.js > /tmp/nexus-app4.log 2>&1 &
 APP4_PID=$!
 echo "  ✓ App4 Server started (PID: $APP4_PID)"
 
+# Start RD classification service (app1, /api/app1/process via Express)
+echo "Starting RD service on port 8001..."
+cd /home/nopparus2/www/app1
+python3 -m rdproc serve --port 8001 --rules-db /home/nopparus2/www/server/data/nexus.db > /tmp/nexus-rdservice.log 2>&1 &
+RD_PID=$!
+echo "  ✓ RD service started (PID: $RD_PID)"
+
 # Start Proxy Server
 echo "Starting Proxy Server on port 8080..."
 cd /home/nopparus2/www
@@ -32,20 +39,23 @@ echo "  ✓ Proxy Server started (PID: $PROXY_PID)"
 echo $API_PID > /tmp/nexus-api.pid
 echo $PROXY_PID > /tmp/nexus-proxy.pid
 echo $APP4_PID > /tmp/nexus-app4.pid
+echo $RD_PID > /tmp/nexus-rdservice.pid
 
 echo ""
 echo "✓ All services started!"
 echo ""
 echo "Services:"
 echo "  - Express API: http://localhost:3001"
+echo "  - RD service: http://localhost:8001/api/app1/process/health"
 echo "  - Proxy Server: http://localhost:8080"
 echo ""
 echo "Logs:"
 echo "  - API: tail -f /tmp/nexus-api.log"
 echo "  - Proxy: tail -f /tmp/nexus-proxy.log"
+echo "  - RD service: tail -f /tmp/nexus-rdservice.log"
 echo ""
 echo "To stop services:"
-echo "  kill $(cat /tmp/nexus-api.pid) $(cat /tmp/nexus-proxy.pid)"
+echo "  kill $(cat /tmp/nexus-api.pid) $(cat /tmp/nexus-proxy.pid) $(cat /tmp/nexus-rdservice.pid)"
 echo ""
 echo "⚠️  IMPORTANT: Update Cloudflare Tunnel to point to http://localhost:8080"
 echo "   Currently it's pointing to port 80 (nginx), change it to 8080"